@@ -0,0 +1,129 @@
+"""
+Streamlit-Bausteine, die app_deepl, app_azure und app_v2 gemeinsam verwenden: Uploads im Blob-Speicher ablegen,
+das Logo laden, den Fortschritt des Generierungs-Jobs anzeigen, Übersetzungs- und Messwerte in der Seitenleiste
+zeigen und die Bild-URLs der Vorlage für den Job bereitstellen.
+"""
+import base64
+
+import streamlit as st
+
+from blob_store import get_blob_store
+from generation_jobs import JOB_POLL_SECONDS, cancel_job, get_job
+from generation_metrics import STAGE_LABELS, metrics_rows
+from translation_cache import get_translation_cache
+from translation_memory import get_translation_memory
+from web_fonts import font_setup_error
+
+MAIN_IMAGE_PLACEHOLDER = 'https://placehold.co/400x400/e2e8f0/a0aec0?text=Hauptbild'
+DETAIL_IMAGE_PLACEHOLDERS = ('https://placehold.co/300x200/e2e8f0/a0aec0?text=Detail+1',
+                             'https://placehold.co/300x200/e2e8f0/a0aec0?text=Detail+2')
+
+
+def store_upload(uploaded_file, state_key):
+    """
+    Legt einen Upload im Blob-Speicher ab; im Session State steht nur seine ID. Die file_id des Uploads wird
+    gemerkt, damit dieselbe Datei bei Reruns nicht erneut gelesen und gehasht wird.
+    """
+    if uploaded_file is None:
+        st.session_state[state_key] = None
+    elif st.session_state.get(f"{state_key}_file_id") != uploaded_file.file_id:
+        st.session_state[state_key] = get_blob_store().put(uploaded_file.getvalue(), uploaded_file.type)
+        st.session_state[f"{state_key}_file_id"] = uploaded_file.file_id
+
+
+def load_local_svg(filepath: str) -> str:
+    try:
+        with open(filepath, "rb") as f:
+            contents = f.read()
+        b64_str = base64.b64encode(contents).decode("utf-8")
+        return f"data:image/svg+xml;base64,{b64_str}"
+    except FileNotFoundError:
+        st.error(f"Lokale SVG-Datei nicht gefunden: {filepath}")
+        return ""
+
+
+def extract_language_name(selected_option_with_code: str) -> str:
+    if selected_option_with_code:
+        return selected_option_with_code.split(" ", 1)[-1]
+    return ""
+
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def show_generation_job(owner: str = ""):
+    """Fortschritt des laufenden Jobs; fragt sich selbst regelmäßig neu ab, der Rest der Seite bleibt bedienbar."""
+    job = get_job(st.session_state.generation_job_id, owner)
+    if job is None or job.finished:
+        if job is not None and job.result:
+            st.session_state.update(job.result)
+            job.collected = True
+        elif job is not None:
+            st.session_state.error_message = f"Fehler bei der Generierung: {job.error or job.stage}"
+        st.session_state.generation_job_id = None
+        st.rerun()
+    progress = job.progress()
+    st.progress(progress["done"] / max(1, progress["total"]),
+                text=f"{progress['stage']}: {progress['done']} von {progress['total']} Sprachen fertig")
+    st.markdown(" · ".join(f"{state} {name}" for name, state in progress["languages"].items()))
+    if progress["metrics"]:
+        # Bisherige Dauer der Hauptstufen (ohne die eingerückten Feldarten)
+        st.caption(" · ".join(f"{STAGE_LABELS.get(name, name)} {values['duration_ms'] / 1000:.1f}s"
+                              for name, values in progress["metrics"]["stages"].items()
+                              if values["duration_ms"] and not STAGE_LABELS.get(name, name).startswith(" ")))
+    if st.button("Generierung abbrechen", key="cancel_generation_button", disabled=job.cancelled):
+        cancel_job(job.job_id, owner)
+
+
+def show_translation_stats(translation_router):
+    """Anbieter, Translation Memory und prozessweiter Cache in der Seitenleiste."""
+    st.sidebar.caption(f"Übersetzung: {translation_router.describe()}")
+    tm_stats = get_translation_memory().stats()
+    st.sidebar.caption(f"Translation Memory: {tm_stats['entries']} Einträge, "
+                       f"{tm_stats['hits']} Treffer / {tm_stats['misses']} Fehlschläge")
+    cache_stats = get_translation_cache().stats()
+    st.sidebar.caption(f"Übersetzungs-Cache (alle Sitzungen): {cache_stats['entries']} Einträge, "
+                       f"{cache_stats['hits']} Treffer / {cache_stats['misses']} Fehlschläge, "
+                       f"{cache_stats['coalesced']} zusammengefasst")
+
+
+def show_font_setup_error():
+    """Fehlende Schriftdateien sind ein Konfigurationsfehler und sollen beim Betrieb auffallen."""
+    font_error = font_setup_error()
+    if font_error:
+        st.sidebar.error(f"FEHLER: {font_error}")
+
+
+def show_generation_metrics():
+    """Messwerte der letzten Generierung in der Seitenleiste, sobald ein Job fertig ist."""
+    if not st.session_state.get("generation_metrics"):
+        return
+    summary = st.session_state.generation_metrics
+    with st.sidebar.expander("Messwerte der letzten Generierung"):
+        st.caption(f"{summary['languages']} Sprache(n) in {summary['wall_ms'] / 1000:.1f}s; "
+                   "Dauer je Stufe über alle Sprachen summiert.")
+        st.dataframe(metrics_rows(summary), hide_index=True)
+        for provider, counts in summary["providers"].items():
+            st.caption(f"{provider}: {counts['api_calls']} Requests, {counts['characters']} Zeichen")
+        if summary["page_bytes"]["before"]:
+            st.caption(f"Seitengröße: {summary['page_bytes']['before'] / 1024:.0f} KB → "
+                       f"{summary['page_bytes']['after'] / 1024:.0f} KB nach Optimierung")
+
+
+def asset_loader(detail_placeholders: bool = True):
+    """
+    Liest Bild-IDs und Logo jetzt aus dem Session State und gibt load_assets() für
+    generation_jobs.run_sheet_generation zurück; der Job läuft später ohne Streamlit-Kontext. Ohne
+    `detail_placeholders` bleiben fehlende Detailbilder leer und die Vorlage lässt sie weg.
+    """
+    image_blobs = (st.session_state.image_main_blob, st.session_state.image_detail1_blob,
+                   st.session_state.image_detail2_blob)
+    logo_url = st.session_state.suprima_logo_data_url
+    placeholders = DETAIL_IMAGE_PLACEHOLDERS if detail_placeholders else (None, None)
+
+    def load_assets():
+        blob_store = get_blob_store()
+        return {"image_main_url": blob_store.image_data_url(image_blobs[0]) or MAIN_IMAGE_PLACEHOLDER,
+                "image_detail1_url": blob_store.image_data_url(image_blobs[1], "detail") or placeholders[0],
+                "image_detail2_url": blob_store.image_data_url(image_blobs[2], "detail") or placeholders[1],
+                "suprima_logo_url": logo_url}
+
+    return load_assets
@@ -0,0 +1,277 @@
+"""
+Erzeugt Produktblätter für einen ganzen Artikelkatalog ohne Streamlit-Oberfläche.
+
+Eingabe ist eine CSV- oder JSON-Lines-Datei mit einer Zeile pro Artikel und denselben Feldern wie das Formular
+(product_name, ean_code_value, article_number_value, product_description_long, features, care_instructions,
+product_type, ...; Kurzformen wie name, ean, article_number, description, care sind ebenfalls erlaubt).
+In CSV-Dateien werden Merkmale durch Zeilenumbruch oder "|" und Pflegehinweise durch ";" getrennt.
+
+Die Datei wird zeilenweise gelesen und jedes Blatt sofort geschrieben, der Speicherbedarf bleibt also konstant.
+Erledigte (Artikel, Sprache)-Paare landen in einer Checkpoint-Datei, ein abgebrochener Lauf setzt dort wieder an.
+
+Beispiel:
+    python batch_generate.py artikel.csv --out ausgabe --lang Englisch --lang Französisch --workers 8
+    python batch_generate.py artikel.jsonl --out ausgabe --all-languages --bundle --precompress
+"""
+import argparse
+import csv
+import json
+import mimetypes
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from dotenv import load_dotenv
+
+from care_icons import CARE_ICON_MODE
+from catalogs import catalog_languages, load_all_catalogs
+from generation_metrics import GenerationMetrics
+from http_client import create_deepl_translator
+from page_optimizer import write_precompressed
+from image_pipeline import optimized_image_data_url
+from sheet_bundle import SheetBundle
+from sheet_generator import MAX_PARALLEL_LANGUAGES, SOURCE_LANGUAGE, generate_sheet, load_svg_data_url, \
+    sheet_filename
+from translation_providers import TRANSLATION_PROVIDERS, build_translation_router
+from web_fonts import font_setup_error
+
+load_dotenv()
+
+# Kurzformen der Spaltennamen -> Schlüssel des Formulars
+FIELD_ALIASES = {"name": "product_name", "ean": "ean_code_value", "article_number": "article_number_value",
+                 "description": "product_description_long", "care": "care_instructions",
+                 "warning": "warning_text", "color": "color_name", "sizes": "available_sizes_value",
+                 "package": "package_size_weight_value", "washing_instructions": "washing_instructions_before_first_use",
+                 "disclaimer": "disclaimer_text"}
+
+
+class CountingTranslator:
+    """
+    Reicht Aufrufe an deepl.Translator durch und zählt Übersetzungs-Requests und gesendete Zeichen
+    (thread-sicher). Alle anderen Methoden (z.B. die Glossar-Aufrufe aus protected_terms) gehen unverändert an
+    den Translator.
+    """
+
+    def __init__(self, translator):
+        self._translator = translator
+        self._lock = threading.Lock()
+        self.api_calls = 0
+        self.characters = 0
+
+    def __getattr__(self, name):
+        return getattr(self._translator, name)
+
+    def translate_text(self, text, **kwargs):
+        texts = text if isinstance(text, list) else [text]
+        with self._lock:
+            self.api_calls += 1
+            self.characters += sum(len(t) for t in texts)
+        return self._translator.translate_text(text, **kwargs)
+
+
+def normalize_row(row: dict) -> dict:
+    """Bringt eine CSV- oder JSON-Zeile in die Form des Formulars (siehe sheet_generator.translate_sheet)."""
+    product_form = {FIELD_ALIASES.get(key.strip(), key.strip()): value for key, value in row.items() if key}
+    features = product_form.get("features", "")
+    if isinstance(features, list):
+        features = "\n".join(features)
+    product_form["features"] = features.replace("|", "\n")
+    care = product_form.get("care_instructions", [])
+    if isinstance(care, str):
+        care = [c.strip() for c in care.split(";") if c.strip()]
+    product_form["care_instructions"] = care
+    has_oeko_tex = product_form.get("has_oeko_tex", True)
+    if isinstance(has_oeko_tex, str):
+        has_oeko_tex = has_oeko_tex.strip().lower() not in ("0", "false", "nein", "no", "")
+    product_form["has_oeko_tex"] = has_oeko_tex
+    product_form["product_type"] = product_form.get("product_type") or "Keine"
+    return {key: ("" if value is None else value) for key, value in product_form.items()}
+
+
+def read_articles(path: str):
+    """Liest die Artikel zeilenweise (Generator), damit auch große Kataloge nicht komplett im Speicher landen."""
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        if path.lower().endswith((".jsonl", ".ndjson", ".json")):
+            for line in f:
+                if line.strip():
+                    yield normalize_row(json.loads(line))
+        else:
+            for row in csv.DictReader(f):
+                yield normalize_row(row)
+
+
+def image_data_url(path: str, role: str = "main") -> str | None:
+    if not path:
+        return None
+    try:
+        with open(path, "rb") as f:
+            mime_type = mimetypes.guess_type(path)[0] or "image/jpeg"
+            return optimized_image_data_url(f.read(), role, mime_type)
+    except OSError as e:
+        print(f"DEBUG: Bild {path} konnte nicht gelesen werden: {e}")
+        return None
+
+
+def load_checkpoint(path: str) -> set[tuple[str, str]]:
+    done = set()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    if entry.get("status") == "ok":
+                        done.add((entry["article"], entry["language"]))
+    except FileNotFoundError:
+        pass
+    return done
+
+
+def article_assets(product_form: dict, logo_url: str) -> dict:
+    """Bild-URLs eines Artikels; einmal pro Artikel erzeugt und von allen Sprachen geteilt."""
+    return {"image_main_url": image_data_url(product_form.get("image_main")) or
+                              'https://placehold.co/400x400/e2e8f0/a0aec0?text=Hauptbild',
+            "image_detail1_url": image_data_url(product_form.get("image_detail1"), "detail"),
+            "image_detail2_url": image_data_url(product_form.get("image_detail2"), "detail"),
+            "suprima_logo_url": logo_url}
+
+
+def generate_one(product_form: dict, language: str, translate_batch, assets: dict,
+                 out_dir: str, icon_mode: str = CARE_ICON_MODE, bundle=None,
+                 metrics: GenerationMetrics | None = None, precompress: bool = False) -> tuple[str, dict[str, str]]:
+    html_content, errors = generate_sheet(product_form, language, translate_batch, assets, icon_mode, bundle,
+                                          metrics)
+    filename = sheet_filename(product_form["article_number_value"], language)
+    if bundle is not None:
+        bundle.add_page(filename, html_content)
+    else:
+        path = os.path.join(out_dir, filename)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(html_content)
+        if precompress:
+            write_precompressed(path, html_content.encode("utf-8"))
+    return filename, errors
+
+
+def run_batch(input_path: str, out_dir: str, languages: list[str], translator, workers: int,
+              checkpoint_path: str, icon_mode: str = CARE_ICON_MODE, bundle_output: bool = False,
+              providers: str = "deepl,gemini", hedge_after: float | None = None, precompress: bool = False) -> dict:
+    os.makedirs(out_dir, exist_ok=True)
+    # Im Bundle-Modus liegen Bilder, Symbole und CSS einmal unter <out>/assets/
+    bundle = SheetBundle(out_dir, precompress) if bundle_output else None
+    done = load_checkpoint(checkpoint_path)
+    counting_translator = CountingTranslator(translator) if translator else None
+    logo_url = load_svg_data_url("logo-3.svg")
+    stats = {"articles": 0, "sheets_ok": 0, "sheets_failed": 0, "skipped": 0, "invalid_rows": 0}
+    metrics = GenerationMetrics(app="batch")
+    metrics.languages = len(languages)
+
+    translation_router = build_translation_router(providers, counting_translator, hedge_after)
+    print(f"Übersetzung: {translation_router.describe()}")
+    # Fehlende Schriftdateien gleich zu Beginn melden, nicht erst beim ersten Blatt (web_fonts gibt sie aus)
+    font_setup_error()
+    translate_batch = translation_router.translate_batch
+
+    def record(checkpoint, article, language, status, errors=None):
+        checkpoint.write(json.dumps({"article": article, "language": language, "status": status,
+                                     "errors": errors or {}}, ensure_ascii=False) + "\n")
+        checkpoint.flush()
+
+    start = time.perf_counter()
+    # Höchstens doppelt so viele offene Aufgaben wie Worker, damit die Eingabe gestreamt bleibt
+    max_pending = workers * 2
+    with ThreadPoolExecutor(max_workers=workers) as executor, \
+            open(checkpoint_path, "a", encoding="utf-8") as checkpoint:
+        pending = {}
+
+        def collect(futures):
+            for future in futures:
+                article, language = pending.pop(future)
+                try:
+                    _, errors = future.result()
+                except Exception as e:
+                    errors = {"sheet": str(e)}
+                if errors:
+                    stats["sheets_failed"] += 1
+                    print(f"FEHLER: {article} ({language}): {', '.join(errors)}")
+                    record(checkpoint, article, language, "error", errors)
+                else:
+                    stats["sheets_ok"] += 1
+                    record(checkpoint, article, language, "ok")
+
+        for product_form in read_articles(input_path):
+            article = str(product_form.get("article_number_value", "")).strip()
+            if not article:
+                stats["invalid_rows"] += 1
+                print("FEHLER: Zeile ohne Artikelnummer übersprungen.")
+                continue
+            stats["articles"] += 1
+            assets = None
+            for language in languages:
+                if (article, language) in done:
+                    stats["skipped"] += 1
+                    continue
+                while len(pending) >= max_pending:
+                    finished, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+                    collect(finished)
+                if assets is None:
+                    with metrics.stage("assets"):
+                        assets = article_assets(product_form, logo_url)
+                future = executor.submit(generate_one, product_form, language, translate_batch, assets, out_dir,
+                                         icon_mode, bundle, metrics, precompress)
+                pending[future] = (article, language)
+        collect(wait(list(pending)).done)
+
+    duration = time.perf_counter() - start
+    sheets = stats["sheets_ok"] + stats["sheets_failed"]
+    stats.update({"duration_s": round(duration, 2), "sheets_per_s": round(sheets / duration, 2) if duration else 0.0,
+                  "api_calls": counting_translator.api_calls if counting_translator else 0,
+                  "characters_sent": counting_translator.characters if counting_translator else 0,
+                  **{f"router_{name}": value for name, value in translation_router.counters.items()}})
+    summary = metrics.finish()
+    stats.update({"page_bytes_before": summary["page_bytes"]["before"],
+                  "page_bytes_after": summary["page_bytes"]["after"]})
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Produktblätter für einen Artikelkatalog erzeugen")
+    parser.add_argument("input", help="CSV- oder JSON-Lines-Datei mit einem Artikel pro Zeile")
+    parser.add_argument("--out", default="ausgabe", help="Ausgabeverzeichnis für die HTML-Dateien")
+    parser.add_argument("--lang", action="append", help="Zielsprache, z.B. Englisch (mehrfach möglich)")
+    parser.add_argument("--all-languages", action="store_true", help="Alle unterstützten Zielsprachen")
+    parser.add_argument("--workers", type=int, default=MAX_PARALLEL_LANGUAGES, help="Anzahl paralleler Worker")
+    parser.add_argument("--checkpoint", help="Checkpoint-Datei (Standard: <out>/.checkpoint.jsonl)")
+    parser.add_argument("--icon-sprite", action="store_true",
+                        help="Pflegesymbole einmal als Inline-SVG-Sprite statt als einzelne Daten-URLs einbetten")
+    parser.add_argument("--bundle", action="store_true",
+                        help="Bilder, Pflegesymbole und CSS als gemeinsame Dateien unter <out>/assets/ ablegen")
+    parser.add_argument("--precompress", action="store_true",
+                        help="Zusätzlich .gz- und .br-Varianten der HTML-, CSS- und SVG-Dateien schreiben")
+    parser.add_argument("--providers", default=TRANSLATION_PROVIDERS or "deepl,gemini",
+                        help="Übersetzungsanbieter: Hauptanbieter, danach Ausweichanbieter (deepl, gemini, offline)")
+    parser.add_argument("--hedge-after", type=float,
+                        help="Sekunden, nach denen zusätzlich der Ausweichanbieter angefragt wird (Hedging)")
+    args = parser.parse_args()
+
+    languages = catalog_languages() if args.all_languages else (args.lang or [])
+    if not languages:
+        parser.error("Bitte --lang oder --all-languages angeben.")
+    api_key = os.getenv("DEEPL_API_KEY")
+    translator = create_deepl_translator(api_key) if api_key else None
+    provider_names = [name.strip() for name in args.providers.split(",") if name.strip()]
+    if not api_key and provider_names == ["deepl"] and any(language != SOURCE_LANGUAGE for language in languages):
+        parser.error("DEEPL_API_KEY ist nicht gesetzt.")
+    load_all_catalogs()
+
+    checkpoint_path = args.checkpoint or os.path.join(args.out, ".checkpoint.jsonl")
+    stats = run_batch(args.input, args.out, languages, translator, max(1, args.workers), checkpoint_path,
+                      "sprite" if args.icon_sprite else CARE_ICON_MODE, args.bundle, args.providers, args.hedge_after,
+                      args.precompress)
+    print("\n--- Zusammenfassung ---")
+    for name, value in stats.items():
+        print(f"{name}: {value}")
+
+
+if __name__ == "__main__":
+    main()
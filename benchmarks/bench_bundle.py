@@ -0,0 +1,91 @@
+"""
+Vergleicht Einzeldatei-Export und Bundle-Export (sheet_bundle.py) für einen Mehrsprachen-Export.
+
+Gemessen werden Gesamtgröße und Schreibzeit aller Dateien für ein Produkt mit Hauptbild, zwei Detailbildern
+und allen Pflegesymbolen. Übersetzt wird nicht (die Texte bleiben deutsch), es geht nur um die Ausgabe.
+
+    python benchmarks/bench_bundle.py [--languages 25]
+"""
+import argparse
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import catalogs  # noqa: E402
+from image_pipeline import optimized_image_data_url  # noqa: E402
+from product_data import get_product_catalog  # noqa: E402
+from sheet_bundle import SheetBundle  # noqa: E402
+from sheet_generator import generate_sheets, load_svg_data_url, sheet_filename  # noqa: E402
+
+SAMPLE_FORM = {"product_name": "suprima Protektor-Slip", "ean_code_value": "4051512345678",
+               "article_number_value": "ART-12345", "product_description_long": "Beschreibung " * 40,
+               "features": "schützt\nbequem\nhoher Tragekomfort", "has_oeko_tex": True,
+               "care_instructions": get_product_catalog().care_texts,
+               "product_type": "Overall", "available_sizes_value": "S M L"}
+
+
+def sample_photo(width: int, height: int) -> bytes:
+    """Verrauschtes Testbild, damit die Kompression nicht unrealistisch gut ausfällt."""
+    image = Image.effect_noise((width, height), 60).convert("RGB")
+    image = Image.blend(image, Image.new("RGB", (width, height), (random.randrange(256), 120, 90)), 0.5)
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=92)
+    return buffer.getvalue()
+
+
+def write_files(out_dir: str, files: dict[str, bytes]) -> None:
+    for filename, content in files.items():
+        path = os.path.join(out_dir, filename)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(content)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ausgabegröße Einzeldateien vs. Bundle messen")
+    parser.add_argument("--languages", type=int, default=25)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="bench_bundle_")
+    catalogs.CATALOG_DIR = os.path.join(work_dir, "catalogs")
+    catalogs.LEARNED_CATALOG_DIR = os.path.join(work_dir, "learned_catalogs")
+    languages = (["Deutsch"] + catalogs.catalog_languages())[:args.languages]
+    assets = {"image_main_url": optimized_image_data_url(sample_photo(3000, 2000), "main"),
+              "image_detail1_url": optimized_image_data_url(sample_photo(2000, 1500), "detail"),
+              "image_detail2_url": optimized_image_data_url(sample_photo(2000, 1500), "detail"),
+              "suprima_logo_url": load_svg_data_url("logo-3.svg")}
+
+    def translate_batch(texts, source_language, target_language):
+        return dict(texts), {}
+
+    results = generate_sheets(SAMPLE_FORM, languages, translate_batch, assets)
+    single_files = {sheet_filename("ART-12345", language): html.encode("utf-8")
+                    for language, (html, _) in results.items()}
+    start = time.perf_counter()
+    write_files(os.path.join(work_dir, "single"), single_files)
+    single_ms = (time.perf_counter() - start) * 1000
+
+    bundle = SheetBundle()
+    results = generate_sheets(SAMPLE_FORM, languages, translate_batch, assets, bundle=bundle)
+    for language, (html, _) in results.items():
+        bundle.add_page(sheet_filename("ART-12345", language), html)
+    start = time.perf_counter()
+    write_files(os.path.join(work_dir, "bundle"), bundle.files)
+    bundle_ms = (time.perf_counter() - start) * 1000
+
+    single_size = sum(len(content) for content in single_files.values())
+    print(f"{len(languages)} Sprachen, Ausgabe unter {work_dir}")
+    print(f"Einzeldateien: {single_size / 1024:.0f} KB, {len(single_files)} Dateien, Schreiben {single_ms:.1f} ms")
+    print(f"Bundle:        {bundle.total_size() / 1024:.0f} KB, {len(bundle.files)} Dateien, Schreiben {bundle_ms:.1f} ms")
+    print(f"Faktor Größe: {single_size / bundle.total_size():.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+End-to-End-Benchmark der Blatterzeugung gegen lokale Ersatzserver für DeepL und Gemini (fake_servers.py).
+
+Gemessen wird der echte Weg aus sheet_generator.generate_sheets mit Router, Translation Memory, Rate Limiter
+und Circuit Breaker, für repräsentative Artikel und Sprachanzahlen, jeweils mit leerem ("kalt") und gefülltem
+("warm") Translation Memory. Berichtet werden Zeit pro Blatt, API-Requests, abgerechnete Zeichen, Renderzeit
+und HTML-Größe. Die Ergebnisse landen als JSON-Datei, die sich mit --compare gegen einen früheren Lauf
+vergleichen lässt.
+
+    python benchmarks/bench_e2e.py [--languages 1 5 24] [--providers deepl,gemini]
+                                   [--deepl-latency 0.15] [--deepl-error-rate 0.1] [--deepl-throttle-rate 0.05]
+                                   [--hedge-after 0.5] [--json ergebnis.json] [--compare alt.json]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+from fake_servers import FakeDeepLServer, FakeGeminiServer  # noqa: E402
+
+ARTICLES = {
+    "kurz": {"product_name": "suprima Slip", "ean_code_value": "4051512345678", "article_number_value": "ART-1",
+             "product_description_long": "Bequemer Slip aus Baumwolle.", "features": "bequem\nweich\nwaschbar",
+             "has_oeko_tex": True, "care_instructions": ["Nicht bleichen", "Waschen 60 Grad", "Nicht bügeln"],
+             "product_type": "Keine", "available_sizes_value": "S M L", "color_name": "Weiß"},
+    "lang": {"product_name": "suprima Protektor-Overall mit Reißverschluss", "ean_code_value": "4051512345679",
+             "article_number_value": "ART-2",
+             "product_description_long": ("Der suprima Overall schützt zuverlässig und ist angenehm zu tragen. "
+                                          "Die Nähte sind flach verarbeitet, der Stoff ist atmungsaktiv. ") * 12,
+             "features": "\n".join(f"Merkmal {i}: robust und pflegeleicht" for i in range(8)),
+             "has_oeko_tex": True, "care_instructions": None, "product_type": "Overall",
+             "warning_text": "Nicht in der Nähe von offenem Feuer tragen.", "color_name": "Marine",
+             "available_sizes_value": "36 38 40 42 44 46", "washing_instructions_before_first_use": "Vor dem "
+             "ersten Tragen waschen.", "disclaimer_text": "Farbabweichungen sind möglich."},
+}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unbekannt"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="End-to-End-Benchmark mit lokalen DeepL-/Gemini-Ersatzservern")
+    parser.add_argument("--languages", type=int, nargs="+", default=[1, 5, 24], help="Anzahl Zielsprachen (höchstens alle Katalogsprachen)")
+    parser.add_argument("--articles", nargs="+", choices=list(ARTICLES), default=list(ARTICLES))
+    parser.add_argument("--providers", default="deepl,gemini", help="wie TRANSLATION_PROVIDERS")
+    parser.add_argument("--hedge-after", type=float, default=0.0, help="Hedging nach Sekunden (0 = aus)")
+    parser.add_argument("--workers", type=int, default=8, help="Parallele Sprachen (MAX_PARALLEL_LANGUAGES)")
+    parser.add_argument("--catalogs", action="store_true", help="Sprachkataloge vorher gegen den Fake-Server bauen")
+    parser.add_argument("--no-rate-limit", action="store_true", help="Token-Bucket praktisch abschalten")
+    for provider, latency in (("deepl", 0.15), ("gemini", 0.6)):
+        parser.add_argument(f"--{provider}-latency", type=float, default=latency, help="Sekunden pro Request")
+        parser.add_argument(f"--{provider}-error-rate", type=float, default=0.0, help="Anteil 500er")
+        parser.add_argument(f"--{provider}-throttle-rate", type=float, default=0.0, help="Anteil 429er")
+    parser.add_argument("--json", help="Ergebnisdatei (Standard: benchmarks/results/e2e_<commit>.json)")
+    parser.add_argument("--compare", help="Früheres Ergebnis zum Vergleich")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    servers = {"deepl": FakeDeepLServer(latency=args.deepl_latency, error_rate=args.deepl_error_rate,
+                                        throttle_rate=args.deepl_throttle_rate).start(),
+               "gemini": FakeGeminiServer(latency=args.gemini_latency, error_rate=args.gemini_error_rate,
+                                          throttle_rate=args.gemini_throttle_rate).start()}
+
+    # Alle Caches und Zustände in ein frisches Verzeichnis; muss vor den Imports der App-Module passieren
+    work_dir = tempfile.mkdtemp(prefix="bench_e2e_")
+    os.environ.update({"DEEPL_SERVER_URL": servers["deepl"].url, "GEMINI_API_BASE_URL": servers["gemini"].url,
+                       "GEMINI_API_KEY": "benchmark", "TRANSLATION_MEMORY_PATH": os.path.join(work_dir, "tm.sqlite3"),
+                       "RATE_LIMIT_DB_PATH": os.path.join(work_dir, "rate_limits.sqlite3"),
+                       "BLOB_STORE_DIR": os.path.join(work_dir, "blobs"),
+                       "IMAGE_CACHE_DIR": os.path.join(work_dir, "images"),
+                       "MAX_PARALLEL_LANGUAGES": str(args.workers)})
+
+    import catalogs
+    import rate_limiter
+    import sheet_generator
+    from bench_bundle import sample_photo
+    from http_client import circuit_states, create_deepl_translator
+    from image_pipeline import optimized_image_data_url
+    from product_data import get_product_catalog
+    from translation_cache import get_translation_cache
+    from translation_memory import get_translation_memory
+    from translation_providers import build_translation_router
+    catalogs.CATALOG_DIR = os.path.join(work_dir, "catalogs")
+    catalogs.LEARNED_CATALOG_DIR = os.path.join(work_dir, "learned_catalogs")
+    if args.no_rate_limit:
+        for limits in rate_limiter.PROVIDER_LIMITS.values():
+            limits.update({"initial_rate": 10000.0, "max_rate": 10000.0, "burst": 10000})
+
+    translator = create_deepl_translator("benchmark:fx")
+    if args.catalogs:
+        catalogs.build_catalogs(translator, catalogs.catalog_languages())
+    catalogs.load_all_catalogs()
+    router = build_translation_router(args.providers, translator, args.hedge_after)
+
+    # Renderzeit getrennt erfassen: die Vorlagenfunktion wird für den Lauf umhüllt
+    render_seconds = []
+    render_html = sheet_generator.create_html_from_template
+
+    def timed_render(template_filename, context):
+        start = time.perf_counter()
+        html = render_html(template_filename, context)
+        render_seconds.append(time.perf_counter() - start)
+        return html
+
+    sheet_generator.create_html_from_template = timed_render
+
+    all_languages = catalogs.catalog_languages()
+    photos = {"main": sample_photo(1600, 1200), "detail1": sample_photo(1200, 900), "detail2": sample_photo(1200, 900)}
+    memory = get_translation_memory()
+    memory.invalidate()
+    print(f"Übersetzung: {router.describe()}, Arbeitsverzeichnis {work_dir}")
+
+    scenarios = []
+    for article_name in args.articles:
+        product_form = dict(ARTICLES[article_name])
+        if product_form["care_instructions"] is None:
+            product_form["care_instructions"] = get_product_catalog().care_texts
+        for language_count in args.languages:
+            languages = all_languages[:language_count]
+            memory.invalidate()
+            get_translation_cache().invalidate()
+            for cache_state in ("kalt", "warm"):
+                for server in servers.values():
+                    server.reset_counters()
+                render_seconds.clear()
+                start = time.perf_counter()
+                assets = {"image_main_url": optimized_image_data_url(photos["main"], "main"),
+                          "image_detail1_url": optimized_image_data_url(photos["detail1"], "detail"),
+                          "image_detail2_url": optimized_image_data_url(photos["detail2"], "detail"),
+                          "suprima_logo_url": sheet_generator.load_svg_data_url("logo-3.svg")}
+                assets_seconds = time.perf_counter() - start
+                results = sheet_generator.generate_sheets(product_form, languages, router.translate_batch, assets,
+                                                          max_workers=args.workers)
+                wall_seconds = time.perf_counter() - start
+                failed_fields = sum(len(errors) for _, errors in results.values())
+                scenario = {
+                    "article": article_name, "languages": len(languages), "cache": cache_state,
+                    "wall_s": round(wall_seconds, 3), "per_sheet_ms": round(wall_seconds * 1000 / len(languages), 1),
+                    "assets_ms": round(assets_seconds * 1000, 1),
+                    "render_ms_total": round(sum(render_seconds) * 1000, 1),
+                    "render_ms_per_sheet": round(sum(render_seconds) * 1000 / max(1, len(render_seconds)), 2),
+                    "html_bytes_total": sum(len(html.encode("utf-8")) for html, _ in results.values()),
+                    "failed_fields": failed_fields,
+                    **{f"{name}_{counter}": value for name, server in servers.items()
+                       for counter, value in server.counters.items()},
+                }
+                scenarios.append(scenario)
+                print(f"{article_name:5} {len(languages):3} Sprachen {cache_state:5}: {scenario['wall_s']:7.2f}s "
+                      f"({scenario['per_sheet_ms']:.0f} ms/Blatt), DeepL {scenario['deepl_requests']} Requests/"
+                      f"{scenario['deepl_billed_characters']} Zeichen, Gemini {scenario['gemini_requests']} Requests, "
+                      f"Rendern {scenario['render_ms_per_sheet']:.1f} ms/Blatt, "
+                      f"HTML {scenario['html_bytes_total'] / 1024:.0f} KB, {failed_fields} Fehler")
+
+    for server in servers.values():
+        server.stop()
+    report = {"commit": git_commit(), "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+              "config": {key: value for key, value in vars(args).items() if key not in ("json", "compare")},
+              "router": dict(router.counters), "circuit_breakers": circuit_states(), "scenarios": scenarios}
+    json_path = args.json or os.path.join(BENCH_DIR, "results", f"e2e_{report['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(json_path)), exist_ok=True)
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Ergebnis gespeichert: {json_path}")
+    if args.compare:
+        compare(args.compare, report)
+
+
+def compare(previous_path: str, report: dict) -> None:
+    """Gibt die Veränderung von Zeit pro Blatt, Requests und HTML-Größe gegenüber einem früheren Lauf aus."""
+    with open(previous_path, "r", encoding="utf-8") as f:
+        previous = json.load(f)
+    previous_by_key = {(s["article"], s["languages"], s["cache"]): s for s in previous.get("scenarios", [])}
+    print(f"\nVergleich mit {previous.get('commit')} ({previous_path}):")
+    for scenario in report["scenarios"]:
+        old = previous_by_key.get((scenario["article"], scenario["languages"], scenario["cache"]))
+        if not old:
+            continue
+        changes = []
+        for metric in ("per_sheet_ms", "deepl_requests", "gemini_requests", "deepl_billed_characters",
+                       "render_ms_per_sheet", "html_bytes_total"):
+            if old.get(metric):
+                changes.append(f"{metric} {(scenario[metric] - old[metric]) / old[metric] * 100:+.0f}%")
+        print(f"{scenario['article']:5} {scenario['languages']:3} Sprachen {scenario['cache']:5}: {', '.join(changes)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Micro-Benchmark für das Rendern von produkt_vorlage_v2.html.
+
+Vergleicht den früheren Weg (neue jinja2.Environment pro Aufruf, Vorlage wird jedes Mal geparst und kompiliert)
+mit der prozessweiten Umgebung aus template_engine.py.
+
+    python benchmarks/bench_render.py [--runs 200]
+"""
+import argparse
+import os
+import sys
+import time
+
+import jinja2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from product_data import get_product_catalog  # noqa: E402
+from sheet_generator import TEMPLATE_FILENAME  # noqa: E402
+from template_engine import TEMPLATE_DIR, render_template  # noqa: E402
+
+PRODUCT_CATALOG = get_product_catalog()
+SAMPLE_CONTEXT = {**PRODUCT_CATALOG.default_texts, "product_name": "suprima Protektor-Slip", "lang_code": "en",
+                  "product_description_long": "Beschreibung " * 40, "warning_text": "Achtung",
+                  "features_list": ["schützt", "bequem", "hoher Tragekomfort"], "color_name": "Schwarz",
+                  "available_sizes_value": "S M L", "ean_code_value": "4051512345678",
+                  "article_number_value": "ART-12345", "size_chart": {**PRODUCT_CATALOG.size_chart("Briefs"), "tables": []},
+                  "care_instructions": [{"icon_url": "data:image/svg+xml;base64,", "text": "Trocknen"}] * 5,
+                  "image_main_url": "https://placehold.co/400x400", "suprima_logo_url": ""}
+
+
+def render_uncached(context: dict) -> str:
+    """So hat create_html_from_template vorher gerendert."""
+    template_env = jinja2.Environment(loader=jinja2.FileSystemLoader(searchpath=TEMPLATE_DIR))
+    return template_env.get_template(TEMPLATE_FILENAME).render(context)
+
+
+def measure(render, runs: int) -> float:
+    start = time.perf_counter()
+    for _ in range(runs):
+        render(SAMPLE_CONTEXT)
+    return (time.perf_counter() - start) / runs * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Renderkosten pro Produktblatt messen")
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    cold_start = time.perf_counter()
+    render_template(TEMPLATE_FILENAME, SAMPLE_CONTEXT)
+    cold_ms = (time.perf_counter() - cold_start) * 1000
+
+    before = measure(render_uncached, args.runs)
+    after = measure(lambda context: render_template(TEMPLATE_FILENAME, context), args.runs)
+    print(f"Erster Aufruf (Kaltstart, mit Bytecode-Cache falls vorhanden): {cold_ms:.2f} ms")
+    print(f"Vorher  (neue Environment pro Aufruf): {before:.3f} ms pro Blatt")
+    print(f"Nachher (prozessweite Environment):    {after:.3f} ms pro Blatt")
+    print(f"Faktor: {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Lokale Ersatzserver für die DeepL- und Gemini-API, damit Benchmarks den echten Generierungsweg (Clients,
+Rate Limiter, Circuit Breaker, Router) ohne Kosten und reproduzierbar messen können.
+
+Die "Übersetzung" stellt dem Text nur das Sprachkürzel voran. Latenz, Fehlerquote (500) und Drosselungsquote
+(429 mit Retry-After) sind je Server einstellbar; gezählt werden Requests und abgerechnete Zeichen.
+"""
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeProviderServer:
+    def __init__(self, name: str, latency: float = 0.05, jitter: float = 0.02, error_rate: float = 0.0,
+                 throttle_rate: float = 0.0, seed: int = 1):
+        self.name = name
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.reset_counters()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def start(self) -> "FakeProviderServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset_counters(self) -> None:
+        with self._lock:
+            self.counters = {"requests": 0, "ok": 0, "errors": 0, "throttled": 0, "billed_characters": 0}
+
+    def _outcome(self, characters: int) -> int:
+        """Würfelt das Ergebnis eines Requests aus und zählt es; gibt den HTTP-Status zurück."""
+        with self._lock:
+            self.counters["requests"] += 1
+            roll = self._random.random()
+            delay = max(0.0, self._random.gauss(self.latency, self.jitter))
+            if roll < self.throttle_rate:
+                status = 429
+                self.counters["throttled"] += 1
+            elif roll < self.throttle_rate + self.error_rate:
+                status = 500
+                self.counters["errors"] += 1
+            else:
+                status = 200
+                self.counters["ok"] += 1
+                self.counters["billed_characters"] += characters
+        time.sleep(delay)
+        return status
+
+    def handle(self, method: str, path: str, body: dict) -> tuple[int, dict]:
+        raise NotImplementedError
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _respond(self):
+                raw = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                try:
+                    body = json.loads(raw or b"{}")
+                except ValueError:
+                    body = {}
+                status, response = fake.handle(self.command, self.path, body)
+                payload = json.dumps(response, ensure_ascii=False).encode("utf-8") if status != 204 else b""
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                if status == 429:
+                    self.send_header("Retry-After", "0.2")
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = do_POST = do_DELETE = _respond
+
+        return Handler
+
+
+class FakeDeepLServer(FakeProviderServer):
+    """
+    Beantwortet POST /v2/translate wie die DeepL-API (JSON-Body mit text, target_lang) und legt Glossare an
+    (/v2/glossary-language-pairs, /v2/glossaries); Glossar-Aufrufe kosten weder Latenz noch Zeichen.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__("deepl", **kwargs)
+        self.glossaries = {}
+
+    def handle(self, method: str, path: str, body: dict) -> tuple[int, dict]:
+        if path.startswith("/v2/glossary-language-pairs"):
+            pairs = [{"source_lang": "de", "target_lang": target} for target in ("en", "fr", "es", "it", "nl", "pl")]
+            return 200, {"supported_languages": pairs}
+        if path.startswith("/v2/glossaries"):
+            if method == "DELETE":
+                deleted = self.glossaries.pop(path.rsplit("/", 1)[-1], None) is not None
+                return (204, {}) if deleted else (404, {"message": "Not found"})
+            glossary_id = f"fake-{len(self.glossaries) + 1}"
+            self.glossaries[glossary_id] = body.get("entries", "")
+            return 201, {"glossary_id": glossary_id, "name": body.get("name", ""), "ready": True,
+                         "source_lang": body.get("source_lang"), "target_lang": body.get("target_lang"),
+                         "creation_time": "2026-01-01T00:00:00.000Z",
+                         "entry_count": len(body.get("entries", "").splitlines())}
+        texts = body.get("text", [])
+        if isinstance(texts, str):
+            texts = [texts]
+        status = self._outcome(sum(len(text) for text in texts))
+        if status != 200:
+            return status, {"message": "Fake-DeepL: Fehler" if status == 500 else "Too many requests"}
+        target = body.get("target_lang", "")
+        return 200, {"translations": [{"detected_source_language": "DE", "text": f"[{target}] {text}",
+                                       "billed_characters": len(text)} for text in texts]}
+
+
+class FakeGeminiServer(FakeProviderServer):
+    """
+    Beantwortet generateContent. Strukturierte Requests (mit responseSchema) bekommen ein JSON-Objekt mit allen
+    erwarteten Schlüsseln, Einzel-Requests den "übersetzten" Text aus dem Prompt.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__("gemini", **kwargs)
+
+    def handle(self, method: str, path: str, body: dict) -> tuple[int, dict]:
+        prompt = body.get("contents", [{}])[0].get("parts", [{}])[0].get("text", "")
+        status = self._outcome(len(prompt))
+        if status != 200:
+            return status, {"error": {"code": status, "message": "Fake-Gemini"}}
+        language = re.search(r"nach (\S+)\. ", prompt)
+        language = language.group(1) if language else ""
+        if body.get("generationConfig", {}).get("responseSchema"):
+            texts = json.loads(prompt[prompt.index("\n") + 1:])
+            answer = json.dumps({key: f"[{language}] {text}" for key, text in texts.items()}, ensure_ascii=False)
+        else:
+            match = re.search(r'Der zu übersetzende Text lautet: "(.*)"$', prompt, re.DOTALL)
+            answer = f"[{language}] {match.group(1)}" if match else prompt
+        return 200, {"candidates": [{"content": {"parts": [{"text": answer}]}}]}
@@ -0,0 +1,134 @@
+"""
+Inhaltsadressierter Speicher für hochgeladene Bilder.
+
+Uploads landen einmal unter .cache/blobs/<sha256> auf der Platte; im Session State steht nur noch dieser Hash.
+Die fertigen (verkleinerten) Daten-URLs werden erst beim Rendern erzeugt und in einer LRU-Speicherstufe mit
+Byte-Obergrenze gehalten, die sich alle Sessions des Prozesses teilen. Der Speicherbedarf pro Session bleibt
+damit konstant, egal wie groß die Uploads sind.
+
+Auf der Platte gelten BLOB_STORE_MAX_BYTES und BLOB_MAX_AGE_DAYS: beim Start und nach neuen Uploads (höchstens
+einmal pro Minute) werden Blobs gelöscht, die zu alt sind oder am längsten nicht gelesen wurden. Eine Session,
+deren Upload so entfernt wurde, bekommt beim Rendern den Platzhalter.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from image_pipeline import CACHE_PRUNE_INTERVAL_SECONDS, mark_used, optimized_image_data_url, prune_directory
+
+BLOB_DIR = os.getenv("BLOB_STORE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "blobs"))
+BLOB_MEMORY_MAX_BYTES = int(os.getenv("BLOB_MEMORY_MAX_BYTES", str(64 * 1024 * 1024)))
+BLOB_STORE_MAX_BYTES = int(os.getenv("BLOB_STORE_MAX_BYTES", str(1024 * 1024 * 1024)))
+BLOB_MAX_AGE_DAYS = float(os.getenv("BLOB_MAX_AGE_DAYS", "7"))
+
+
+class BlobStore:
+    def __init__(self, directory: str = BLOB_DIR, memory_max_bytes: int = BLOB_MEMORY_MAX_BYTES,
+                 disk_max_bytes: int = BLOB_STORE_MAX_BYTES, max_age_days: float = BLOB_MAX_AGE_DAYS):
+        self.directory = directory
+        self.memory_max_bytes = memory_max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self.max_age_days = max_age_days
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._last_prune = 0.0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._prune()
+
+    def _path(self, blob_id: str) -> str:
+        return os.path.join(self.directory, blob_id)
+
+    def _remember(self, key: str, value, size: int) -> None:
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return
+            if size > self.memory_max_bytes:
+                return
+            self._memory[key] = (value, size)
+            self._memory_bytes += size
+            while self._memory_bytes > self.memory_max_bytes:
+                _, (_, evicted_size) = self._memory.popitem(last=False)
+                self._memory_bytes -= evicted_size
+
+    def _recall(self, key: str):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            self._memory.move_to_end(key)
+            return entry[0]
+
+    def put(self, data: bytes, mime_type: str) -> str:
+        """Speichert die Daten (falls noch nicht vorhanden) und gibt ihre ID (SHA-256) zurück."""
+        blob_id = hashlib.sha256(data).hexdigest()
+        path = self._path(blob_id)
+        if not os.path.exists(path):
+            # Erst den MIME-Typ, dann die Daten: ein vorhandener Blob hat damit immer auch seinen Typ
+            with open(f"{path}.type", "w", encoding="utf-8") as f:
+                f.write(mime_type or "application/octet-stream")
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+            self._prune()
+        else:
+            mark_used(path)
+        return blob_id
+
+    def _prune(self) -> None:
+        with self._lock:
+            if time.monotonic() - self._last_prune < CACHE_PRUNE_INTERVAL_SECONDS:
+                return
+            self._last_prune = time.monotonic()
+        # Daten und .type-Datei eines Blobs werden gemeinsam gelöscht
+        prune_directory(self.directory, self.disk_max_bytes, self.max_age_days * 86400,
+                        entry_name=lambda name: name.removesuffix(".type"))
+
+    def get(self, blob_id: str) -> tuple[bytes, str] | None:
+        """Gibt (Daten, MIME-Typ) zurück oder None, wenn die ID unbekannt ist."""
+        try:
+            with open(self._path(blob_id), "rb") as f:
+                data = f.read()
+            with open(f"{self._path(blob_id)}.type", "r", encoding="utf-8") as f:
+                mime_type = f.read().strip()
+        except FileNotFoundError:
+            return None
+        mark_used(self._path(blob_id))
+        return data, mime_type
+
+    def image_data_url(self, blob_id: str | None, role: str = "main") -> str | None:
+        """Optimierte Daten-URL eines gespeicherten Bildes (siehe image_pipeline), im Speicher zwischengespeichert."""
+        if not blob_id:
+            return None
+        key = f"{blob_id}:{role}"
+        data_url = self._recall(key)
+        if data_url is not None:
+            return data_url
+        blob = self.get(blob_id)
+        if blob is None:
+            print(f"DEBUG: Blob {blob_id} nicht gefunden")
+            return None
+        data_url = optimized_image_data_url(blob[0], role, blob[1])
+        self._remember(key, data_url, len(data_url))
+        return data_url
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"memory_entries": len(self._memory), "memory_bytes": self._memory_bytes,
+                    "memory_max_bytes": self.memory_max_bytes}
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_blob_store() -> BlobStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = BlobStore()
+        return _store
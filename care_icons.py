@@ -0,0 +1,124 @@
+"""
+Registry der Pflegesymbole aus Waschlabellen/.
+
+Alle Symbole werden einmal pro Prozess geladen, minifiziert und nach ihrem deutschen Pflegetext indiziert;
+alle Streamlit-Sessions teilen sich die Registry. Für jedes Symbol liegen eine Daten-URL (für <img>) und ein
+<symbol>-Element bereit. Im Sprite-Modus enthält ein Produktblatt jedes verwendete Symbol nur einmal als
+verstecktes Inline-SVG und verweist per <use href="#..."> darauf.
+"""
+import base64
+import os
+import re
+import threading
+
+from product_data import ICON_DIR, get_product_catalog
+
+# "data_url" (Standard): jedes Symbol als <img> mit Daten-URL; "sprite": gemeinsames Inline-SVG mit <symbol>
+CARE_ICON_MODE = os.getenv("CARE_ICON_MODE", "data_url")
+
+_registry = None
+_registry_catalog = None
+_registry_lock = threading.Lock()
+
+
+def minify_svg(svg_text: str) -> str:
+    """Entfernt XML-Deklaration, Kommentare, Titel und überflüssigen Leerraum aus einem SVG."""
+    svg_text = re.sub(r"<\?xml.*?\?>|<!DOCTYPE.*?>|<!--.*?-->", "", svg_text, flags=re.DOTALL)
+    svg_text = re.sub(r"<(title|desc|metadata)\b.*?</\1>", "", svg_text, flags=re.DOTALL)
+    svg_text = re.sub(r'\s(version="[^"]*"|xml:space="[^"]*"|data-name="[^"]*"|'
+                      r'style="enable-background:[^"]*")', "", svg_text)
+
+    def minify_style(match):
+        css = re.sub(r"\s+", " ", match.group(2))
+        css = re.sub(r"\s*([{};:,])\s*", r"\1", css).replace(";}", "}")
+        return f"{match.group(1)}{css.strip()}</style>"
+
+    svg_text = re.sub(r"(<style[^>]*>)(.*?)</style>", minify_style, svg_text, flags=re.DOTALL)
+    svg_text = re.sub(r">\s+<", "><", svg_text)
+    return re.sub(r"\s+", " ", svg_text).strip()
+
+
+def svg_to_symbol(svg_text: str, symbol_id: str) -> str:
+    """
+    Wandelt ein (minifiziertes) SVG in ein <symbol> um. Klassen und IDs bekommen das Präfix `symbol_id`,
+    weil CSS-Regeln aus <style> im HTML-Dokument global gelten und sich sonst zwischen Symbolen überschreiben.
+    """
+    root = re.match(r"\s*<svg\b([^>]*)>(.*)</svg>\s*$", svg_text, flags=re.DOTALL)
+    if not root:
+        return ""
+    view_box = re.search(r'viewBox="([^"]*)"', root.group(1))
+    inner = root.group(2)
+    prefix = f"{symbol_id}-"
+
+    class_names = set()
+    for classes in re.findall(r'class="([^"]*)"', inner):
+        class_names.update(classes.split())
+    inner = re.sub(r'class="([^"]*)"',
+                   lambda m: 'class="' + " ".join(prefix + name for name in m.group(1).split()) + '"', inner)
+    if class_names:
+        pattern = re.compile(r"\.(" + "|".join(re.escape(name) for name in class_names) + r")(?![\w-])")
+        inner = re.sub(r"(<style[^>]*>)(.*?)</style>",
+                       lambda m: m.group(1) + pattern.sub(lambda c: "." + prefix + c.group(1), m.group(2)) + "</style>",
+                       inner, flags=re.DOTALL)
+    inner = re.sub(r'\bid="([^"]*)"', lambda m: f'id="{prefix}{m.group(1)}"', inner)
+    inner = re.sub(r"url\(#([^)]*)\)", lambda m: f"url(#{prefix}{m.group(1)})", inner)
+    inner = re.sub(r'((?:xlink:)?href)="#([^"]*)"', lambda m: f'{m.group(1)}="#{prefix}{m.group(2)}"', inner)
+    view_box_attr = f' viewBox="{view_box.group(1)}"' if view_box else ""
+    return f'<symbol id="{symbol_id}"{view_box_attr}>{inner}</symbol>'
+
+
+def load_icon_registry(library: list[dict]) -> dict[str, dict]:
+    """Lädt alle Symbole der Bibliothek: {Pflegetext: {"filename", "svg", "data_url", "symbol_id", "symbol"}}."""
+    registry = {}
+    for index, item in enumerate(library):
+        path = os.path.join(ICON_DIR, item["icon_filename"])
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                svg_text = minify_svg(f.read())
+        except FileNotFoundError:
+            print(f"DEBUG: Pflegesymbol nicht gefunden: {path}")
+            continue
+        symbol_id = f"care-icon-{index}"
+        registry[item["text"]] = {
+            "filename": item["icon_filename"],
+            "svg": svg_text,
+            "data_url": f"data:image/svg+xml;base64,{base64.b64encode(svg_text.encode('utf-8')).decode('utf-8')}",
+            "symbol_id": symbol_id,
+            "symbol": svg_to_symbol(svg_text, symbol_id),
+        }
+    return registry
+
+
+def get_icon_registry() -> dict[str, dict]:
+    """Gibt die prozessweit geteilte Registry zurück (neu aufgebaut, wenn sich die Produktdaten ändern)."""
+    global _registry, _registry_catalog
+    product_catalog = get_product_catalog()
+    with _registry_lock:
+        if _registry is None or _registry_catalog is not product_catalog:
+            _registry = load_icon_registry(product_catalog.care_instructions)
+            _registry_catalog = product_catalog
+        return _registry
+
+
+def build_care_items(care_texts: list[str], translated_texts: list[str],
+                     icon_mode: str = CARE_ICON_MODE) -> tuple[list[dict], str]:
+    """
+    Baut die Einträge für care_instructions im Template und (im Sprite-Modus) das Inline-Sprite.
+    Gibt (Einträge, Sprite-Markup oder "") zurück.
+    """
+    registry = get_icon_registry()
+    care_items, symbols = [], {}
+    for text, translated_text in zip(care_texts, translated_texts):
+        icon = registry.get(text)
+        if not icon:
+            continue
+        if icon_mode == "sprite" and icon["symbol"]:
+            symbols[icon["symbol_id"]] = icon["symbol"]
+            care_items.append({"icon_symbol_id": icon["symbol_id"], "text": translated_text})
+        else:
+            care_items.append({"icon_url": icon["data_url"], "text": translated_text})
+    sprite = ""
+    if symbols:
+        sprite = ('<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+                  'style="display:none" aria-hidden="true">' + "".join(symbols.values()) + "</svg>")
+    return care_items, sprite
@@ -0,0 +1,238 @@
+"""
+Vorab übersetzte Kataloge für die festen deutschen Texte (Standardtexte, Pflegehinweise, Größentabellen).
+
+Pro Zielsprache gibt es eine Datei catalogs/<DeepL-Code>.json mit {deutscher Text: Übersetzung}. Die Apps
+lesen die Kataloge beim Start und schicken nur noch Benutzereingaben (und Texte, die im Katalog fehlen) an
+den Übersetzungsdienst. `build` übersetzt alle Sprachen, deren Quell-Hash nicht mehr zu den aktuellen
+Bibliotheken passt; nur dieser Befehl schreibt nach catalogs/, die Dateien werden eingecheckt.
+
+Ändert sich ein deutscher Quelltext, passt sein alter Eintrag nicht mehr; der Text wird dann einmal live
+übersetzt und, sofern DeepL ihn übersetzt hat, in einen gelernten Katalog unter .cache/catalogs/ geschrieben
+(LEARNED_CATALOG_DIR). get_catalog() liefert beide zusammen, der eingecheckte Katalog hat Vorrang.
+
+Kommandozeile:
+    python catalogs.py build [--lang Englisch ...] [--force]
+    python catalogs.py status
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+
+import deepl
+from dotenv import load_dotenv
+
+from deepl_batch import translate_texts_deepl_batch
+from generation_metrics import record_cache_hits
+from product_data import get_product_catalog
+from sheet_texts import STATIC_KEY_PREFIXES
+from translation_providers import track_providers
+
+load_dotenv()
+
+CATALOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "catalogs")
+# Zur Laufzeit gelernte Einträge; das Arbeitsverzeichnis des Repositorys bleibt dadurch unverändert
+LEARNED_CATALOG_DIR = os.getenv("LEARNED_CATALOG_DIR",
+                                os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "catalogs"))
+CATALOG_FORMAT_VERSION = 1
+SOURCE_LANGUAGE = "Deutsch"
+# Kataloge enthalten nur Übersetzungen dieses Anbieters (build und Rückschreiben aus Live-Übersetzungen)
+CATALOG_PROVIDER = "deepl"
+
+_catalog_cache = {}
+_catalog_lock = threading.Lock()
+
+
+def static_source_texts() -> list[str]:
+    """Alle festen deutschen Texte, die in einem Produktblatt vorkommen können."""
+    product_catalog = get_product_catalog()
+    texts = [text for text in product_catalog.default_texts.values()]
+    texts += product_catalog.care_texts
+    for chart_data in product_catalog.size_charts.values():
+        texts.append(chart_data["title"])
+        texts.append(chart_data.get("footer", ""))
+        texts += chart_data.get("headers", [])
+        for sub_table_data in chart_data.get("tables", []):
+            texts.append(sub_table_data["subtitle"])
+            texts.append(sub_table_data.get("title_full", ""))
+            texts += sub_table_data.get("headers", [])
+    # Reihenfolge beibehalten, Duplikate und leere Texte entfernen
+    return [text for text in dict.fromkeys(texts) if text.strip()]
+
+
+def source_hash(texts: list[str] | None = None) -> str:
+    texts = static_source_texts() if texts is None else texts
+    return hashlib.sha256("\n".join(sorted(texts)).encode("utf-8")).hexdigest()
+
+
+def catalog_languages() -> list[str]:
+    product_catalog = get_product_catalog()
+    languages = [product_catalog.language_name(option) for option in product_catalog.language_options]
+    return [language for language in languages if language != SOURCE_LANGUAGE]
+
+
+def catalog_path(language: str, directory: str | None = None) -> str:
+    directory = CATALOG_DIR if directory is None else directory
+    return os.path.join(directory, f"{get_product_catalog().deepl_code(language) or language}.json")
+
+
+def _read_catalog_file(language: str, directory: str | None = None) -> dict:
+    path = catalog_path(language, directory)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            catalog = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"DEBUG: Katalog {path} konnte nicht gelesen werden: {e}")
+        return {}
+    if catalog.get("format_version") != CATALOG_FORMAT_VERSION:
+        return {}
+    return catalog
+
+
+def _write_catalog_file(language: str, entries: dict[str, str], provider: str = CATALOG_PROVIDER,
+                        directory: str | None = None) -> None:
+    path = catalog_path(language, directory)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Nur Einträge für aktuelle Quelltexte behalten; veraltete fallen beim Schreiben heraus.
+    # Der Hash über die vorhandenen Quelltexte entspricht nur bei einem vollständigen Katalog source_hash().
+    entries = {text: entries[text] for text in static_source_texts() if text in entries}
+    catalog = {"format_version": CATALOG_FORMAT_VERSION, "language": language, "provider": provider,
+               "source_hash": source_hash(list(entries)), "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+               "entries": entries}
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(catalog, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _mtime(path: str) -> float | None:
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+def get_catalog(language: str) -> dict[str, str]:
+    """
+    Gibt die Katalogeinträge einer Sprache zurück: eingecheckter Katalog plus gelernte Einträge (einmal pro
+    Prozess geladen, neu bei Dateiänderung).
+    """
+    mtimes = (_mtime(catalog_path(language)), _mtime(catalog_path(language, LEARNED_CATALOG_DIR)))
+    with _catalog_lock:
+        cached = _catalog_cache.get(language)
+        if cached and cached[0] == mtimes:
+            return cached[1]
+        built = _read_catalog_file(language).get("entries", {}) if mtimes[0] is not None else {}
+        learned = (_read_catalog_file(language, LEARNED_CATALOG_DIR).get("entries", {})
+                   if mtimes[1] is not None else {})
+        entries = {**learned, **built}
+        _catalog_cache[language] = (mtimes, entries)
+        return entries
+
+
+def load_all_catalogs() -> int:
+    """Lädt alle vorhandenen Kataloge in den Prozess-Cache (beim App-Start) und gibt deren Anzahl zurück."""
+    return sum(1 for language in catalog_languages() if get_catalog(language))
+
+
+def update_catalog(language: str, new_entries: dict[str, str]) -> None:
+    """Schreibt live von DeepL übersetzte feste Texte in den gelernten Katalog (LEARNED_CATALOG_DIR)."""
+    with _catalog_lock:
+        entries = {**_read_catalog_file(language, LEARNED_CATALOG_DIR).get("entries", {}), **new_entries}
+        try:
+            _write_catalog_file(language, entries, directory=LEARNED_CATALOG_DIR)
+        except OSError as e:
+            print(f"DEBUG: Katalog für {language} konnte nicht aktualisiert werden: {e}")
+        _catalog_cache.pop(language, None)
+
+
+def is_static_key(key: str) -> bool:
+    return key.startswith(STATIC_KEY_PREFIXES)
+
+
+def translate_with_catalog(sheet_texts: dict[str, str], target_language: str,
+                           translate_batch) -> tuple[dict[str, str], dict[str, str]]:
+    """
+    Übersetzt die Texte eines Produktblatts, wobei feste Texte aus dem Katalog kommen.
+    `translate_batch` bekommt nur die übrigen Texte ({Schlüssel: Text}) und gibt (Übersetzungen, Fehler) zurück.
+    In den gelernten Katalog gehen nur feste Texte, die laut Router DeepL übersetzt hat; Übersetzungen anderer
+    Anbieter (z.B. Gemini als Hauptanbieter in app_v2) oder aus einem Snapshot lernt der Katalog nicht.
+    """
+    catalog = get_catalog(target_language)
+    translations, remaining = {}, {}
+    for key, text in sheet_texts.items():
+        if is_static_key(key) and text in catalog:
+            translations[key] = catalog[text]
+        else:
+            remaining[key] = text
+    record_cache_hits(translations)
+    if not remaining:
+        return translations, {}
+
+    with track_providers() as field_providers:
+        live_translations, errors = translate_batch(remaining)
+    translations.update(live_translations)
+    known_texts = set(static_source_texts())
+    learned = {text: live_translations[key] for key, text in remaining.items()
+               if is_static_key(key) and key not in errors and text in known_texts
+               and field_providers.get(key) == CATALOG_PROVIDER}
+    if learned:
+        update_catalog(target_language, learned)
+    return translations, errors
+
+
+def build_catalogs(translator, languages: list[str], force: bool = False) -> dict[str, str]:
+    """Übersetzt die festen Texte für alle veralteten (oder mit force: alle) Sprachen neu."""
+    texts = static_source_texts()
+    current_hash = source_hash(texts)
+    results = {}
+    for language in languages:
+        existing = _read_catalog_file(language)
+        if not force and existing.get("source_hash") == current_hash:
+            results[language] = "aktuell"
+            continue
+        # Unveränderte Einträge übernehmen, nur neue oder geänderte Quelltexte übersetzen
+        entries = {} if force else dict(existing.get("entries", {}))
+        missing = {str(i): text for i, text in enumerate(texts) if text not in entries}
+        translations, errors = translate_texts_deepl_batch(translator, missing, SOURCE_LANGUAGE, language)
+        for key, text in missing.items():
+            if key not in errors:
+                entries[text] = translations[key]
+        _write_catalog_file(language, entries)
+        results[language] = f"{len(missing) - len(errors)} übersetzt, {len(errors)} Fehler" if missing else "aktualisiert"
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sprachkataloge für feste Texte bauen")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="Veraltete Kataloge neu übersetzen")
+    build_parser.add_argument("--lang", action="append", help="Nur diese Sprache(n), z.B. Englisch")
+    build_parser.add_argument("--force", action="store_true", help="Auch aktuelle Kataloge neu übersetzen")
+    subparsers.add_parser("status", help="Zeigt, welche Kataloge veraltet sind")
+    args = parser.parse_args()
+
+    languages = args.lang if getattr(args, "lang", None) else catalog_languages()
+    current_hash = source_hash()
+    if args.command == "status":
+        for language in languages:
+            catalog = _read_catalog_file(language)
+            learned = _read_catalog_file(language, LEARNED_CATALOG_DIR)
+            state = "fehlt" if not catalog else ("aktuell" if catalog.get("source_hash") == current_hash else "veraltet")
+            print(f"{language}: {state} ({len(catalog.get('entries', {}))} Einträge, "
+                  f"{len(learned.get('entries', {}))} gelernt)")
+    elif args.command == "build":
+        api_key = os.getenv("DEEPL_API_KEY")
+        if not api_key:
+            parser.error("DEEPL_API_KEY ist nicht gesetzt.")
+        translator = deepl.Translator(api_key)
+        for language, result in build_catalogs(translator, languages, args.force).items():
+            print(f"{language}: {result}")
+
+
+if __name__ == "__main__":
+    main()
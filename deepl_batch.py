@@ -0,0 +1,149 @@
+import deepl
+
+from generation_metrics import record_api_call, record_cache_hits
+from http_client import call_provider
+from product_data import get_product_catalog
+from protected_terms import forget_deepl_glossary, get_deepl_glossary
+from translatability import translate_translatable
+from translation_cache import get_translation_cache
+from translation_memory import get_translation_memory
+
+# Grenzen eines einzelnen /translate-Requests laut DeepL-Dokumentation:
+# höchstens 50 Texte und 128 KiB Request-Body. Wir lassen etwas Luft für den Overhead.
+DEEPL_MAX_TEXTS_PER_REQUEST = 50
+DEEPL_MAX_REQUEST_BYTES = 120 * 1024
+
+# Wiederholungen bei 429/503 übernimmt rate_limiter.call_with_rate_limit (mit gemeinsamer, adaptiver Rate),
+# dauerhafte Störungen fängt der Circuit Breaker in http_client.call_provider ab.
+# Die eigenen Wiederholungen der deepl-Bibliothek würden Drosselungen nur verzögert melden.
+deepl.http_client.max_network_retries = 1
+
+
+def _translate_chunk(translator, chunk: list[str], source_lang_code: str, target_lang_code: str,
+                     glossary_id: str | None, terms, keys_by_text: dict[str, list[str]]) -> dict[str, str]:
+    """
+    Ein DeepL-Request für `chunk`. Mit Glossar gehen die Texte unverändert hinaus; ohne Glossar werden geschützte
+    Begriffe mit <keep>-Tags markiert (XML-Verarbeitung nur, wenn der Request überhaupt einen Begriff enthält).
+    """
+    tagged = glossary_id is None and any(terms.find(text) for text in chunk)
+    options = {"tag_handling": "xml", "ignore_tags": ["keep"]} if tagged else {}
+    results = call_provider("deepl", lambda: translator.translate_text(
+        [terms.keep_tags(text) if tagged else text for text in chunk],
+        source_lang=source_lang_code,
+        target_lang=target_lang_code,
+        glossary=glossary_id,
+        **options
+    ), characters=sum(len(text) for text in chunk))
+    record_api_call("deepl", {keys_by_text[text][0]: len(text) for text in chunk})
+    return {text: terms.strip_keep_tags(result.text) if tagged else result.text.strip()
+            for text, result in zip(chunk, results)}
+
+
+def _chunk_texts(texts: list[str]) -> list[list[str]]:
+    """Teilt die Texte so auf, dass jeder Teil die DeepL-Grenzen pro Request einhält."""
+    chunks, current, current_bytes = [], [], 0
+    for text in texts:
+        size = len(text.encode("utf-8"))
+        if current and (len(current) >= DEEPL_MAX_TEXTS_PER_REQUEST or
+                        current_bytes + size > DEEPL_MAX_REQUEST_BYTES):
+            chunks.append(current)
+            current, current_bytes = [], 0
+        current.append(text)
+        current_bytes += size
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def translate_texts_deepl_batch(translator, texts: dict[str, str], source_language: str,
+                                target_language: str) -> tuple[dict[str, str], dict[str, str]]:
+    """
+    Übersetzt alle Texte eines Produktblatts mit möglichst wenigen DeepL-Requests.
+
+    Gibt zwei Dictionaries mit denselben Schlüsseln wie `texts` zurück: die Übersetzungen und die
+    Fehlermeldungen der Felder, die nicht übersetzt werden konnten. Texte ohne Übersetzungsbedarf (leer, Zahlen,
+    Maße, Größen, Codes, nur geschützte Begriffe; siehe translatability) werden nicht gesendet, identische
+    Texte nur einmal und Texte aus dem prozessweiten Cache (translation_cache) oder dem Translation Memory gar
+    nicht. Fragt eine andere Sitzung denselben Text gerade an, wird auf deren Ergebnis gewartet.
+    """
+    return translate_translatable(texts, lambda pending: get_translation_cache().translate_batch(
+        pending, source_language, target_language, "deepl",
+        lambda uncached: _translate_pending(translator, uncached, source_language, target_language)))
+
+
+def _translate_pending(translator, texts: dict[str, str], source_language: str,
+                       target_language: str) -> tuple[dict[str, str], dict[str, str]]:
+    translations = {key: "" for key, text in texts.items() if not text or not text.strip()}
+    errors = {}
+    pending = {key: text for key, text in texts.items() if key not in translations}
+    if not pending:
+        return translations, errors
+
+    def fail_all(placeholder: str, error_msg: str, keys) -> None:
+        for key in keys:
+            translations[key] = placeholder
+            errors[key] = error_msg
+
+    # Gleiche Texte (z.B. "Größe" in mehreren Tabellen) nur einmal übersetzen
+    keys_by_text = {}
+    for key, text in pending.items():
+        keys_by_text.setdefault(text, []).append(key)
+
+    # Bereits bekannte Übersetzungen kommen aus dem Translation Memory und werden nicht erneut bezahlt
+    memory = get_translation_memory()
+    remembered = memory.lookup_many(list(keys_by_text), source_language, target_language, "deepl")
+    for text, translated_text in remembered.items():
+        for key in keys_by_text[text]:
+            translations[key] = translated_text
+    record_cache_hits(key for text in remembered for key in keys_by_text[text])
+    unique_texts = [text for text in keys_by_text if text not in remembered]
+    if not unique_texts:
+        return translations, errors
+    missing_keys = [key for text in unique_texts for key in keys_by_text[text]]
+
+    if not translator:
+        fail_all("[DeepL API Fehler]", "DeepL API-Schlüssel nicht konfiguriert oder ungültig.", missing_keys)
+        return translations, errors
+    target_lang_code = get_product_catalog().deepl_code(target_language)
+    if not target_lang_code:
+        fail_all("[Fehler]", f"Unbekannter Sprachcode für Zielsprache: {target_language}", missing_keys)
+        return translations, errors
+    source_lang_code = get_product_catalog().deepl_code(source_language)
+    if not source_lang_code:
+        fail_all("[Fehler]", f"Unbekannter Sprachcode für Quellsprache: {source_language}", missing_keys)
+        return translations, errors
+
+    terms = get_product_catalog().protected_terms
+    glossary_id = get_deepl_glossary(translator, terms, source_lang_code, target_lang_code, target_language,
+                                     call=lambda func: call_provider("deepl", func))
+    for chunk in _chunk_texts(unique_texts):
+        try:
+            try:
+                translated_chunk = _translate_chunk(translator, chunk, source_lang_code, target_lang_code,
+                                                    glossary_id, terms, keys_by_text)
+            except deepl.GlossaryNotFoundException:
+                print(f"DEBUG: DeepL-Glossar {glossary_id} nicht mehr vorhanden, weiter mit <keep>-Tags")
+                forget_deepl_glossary(glossary_id)
+                glossary_id = None
+                translated_chunk = _translate_chunk(translator, chunk, source_lang_code, target_lang_code,
+                                                    None, terms, keys_by_text)
+            # Hat das Glossar einen geschützten Begriff nicht gehalten, den Text einmal mit <keep>-Tags nachholen
+            lost = [text for text, translated_text in translated_chunk.items()
+                    if not terms.preserved(text, translated_text)]
+            if lost and glossary_id:
+                print(f"DEBUG: {len(lost)} Texte haben geschützte Begriffe verloren, Wiederholung mit <keep>-Tags")
+                translated_chunk.update(_translate_chunk(translator, lost, source_lang_code, target_lang_code,
+                                                         None, terms, keys_by_text))
+            for text, translated_text in translated_chunk.items():
+                for key in keys_by_text[text]:
+                    translations[key] = translated_text
+            memory.store_many(translated_chunk, source_language, target_language, "deepl")
+        except deepl.DeepLException as e:
+            print(f"DEBUG: DeepL API Fehler (Batch mit {len(chunk)} Texten): {str(e)}")
+            fail_all("[DeepL API Fehler]", str(e), [key for text in chunk for key in keys_by_text[text]])
+        except Exception as e:
+            print(f"DEBUG: Allgemeiner Fehler bei DeepL Batch-Übersetzung: {str(e)}")
+            fail_all("[Allgemeiner Fehler bei DeepL Übersetzung]", str(e),
+                     [key for text in chunk for key in keys_by_text[text]])
+
+    return translations, errors
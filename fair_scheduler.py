@@ -0,0 +1,258 @@
+"""
+Faire Verteilung der Übersetzungsanbieter zwischen den angemeldeten Benutzern (app_azure) und Tageskontingente.
+
+Alle Benutzer teilen sich einen DeepL-Schlüssel. Damit ein großer Mehrsprachen-Export nicht die Rate und das
+Zeichenkontingent aller anderen aufbraucht:
+- Jeder Anbieter-Aufruf trägt den Benutzer und eine Priorität ("interactive" für ein einzelnes Blatt, "bulk" für
+  Mehrsprachen-Jobs). Beides steht in einer ContextVar (use_requester), die Job-Pool und Sprach-Threads erben.
+- Vor dem gemeinsamen Token-Bucket (rate_limiter) steht pro Anbieter eine Warteschlange mit Weighted Fair
+  Queuing: wartende Aufrufe bekommen das nächste Token zuerst nach Priorität, innerhalb einer Priorität nach der
+  virtuellen Endzeit (gesendete Zeichen / Gewicht des Benutzers). Wer gerade viel sendet, lässt andere vor.
+  Die Warteschlange ordnet nur Aufrufe dieses Prozesses; die Rate selbst bleibt prozessübergreifend geteilt.
+- Optional gilt pro Benutzer und Tag ein Zeichenkontingent. Ohne Konfiguration ist es unbegrenzt; Betreiber
+  setzen USER_DAILY_CHARACTER_QUOTA für alle und/oder USER_CHARACTER_QUOTAS für einzelne Benutzer. Die Zeichen
+  werden vor dem Request reserviert und bei einem Fehler zurückgebucht; der Verbrauch liegt in SQLite und
+  überlebt Neustarts.
+  Aufrufe ohne Benutzer (app_deepl, batch_generate) zählen nicht gegen ein Kontingent.
+
+Gewichte abweichend von 1 über USER_SCHEDULER_WEIGHTS="chef@firma.de=2".
+"""
+import contextlib
+import contextvars
+import heapq
+import itertools
+import os
+import sqlite3
+import threading
+import time
+
+USAGE_DB_PATH = os.getenv("USER_USAGE_DB_PATH",
+                          os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "user_usage.sqlite3"))
+# Verbrauch älterer Tage wird beim Start gelöscht
+USAGE_RETENTION_DAYS = 90
+
+# Niedrigerer Rang wird zuerst bedient; "bulk" wartet, solange interaktive Aufrufe anstehen
+PRIORITIES = {"interactive": 0, "bulk": 1}
+PRIORITY_LABELS = {"interactive": "Einzelblatt", "bulk": "Mehrsprachen-Job"}
+QUOTA_ERROR_TEXT = "Tageskontingent erschöpft"
+
+_current = contextvars.ContextVar("requester", default=("", "interactive"))
+
+
+def parse_user_values(text: str) -> dict[str, float]:
+    """"anna@firma.de=2,ben@firma.de=0.5" -> {"anna@firma.de": 2.0, "ben@firma.de": 0.5}"""
+    values = {}
+    for item in text.split(","):
+        user, _, value = item.partition("=")
+        if user.strip() and value.strip():
+            try:
+                values[user.strip().lower()] = float(value)
+            except ValueError:
+                print(f"DEBUG: Ungültiger Wert für {user.strip()}: {value!r}")
+    return values
+
+
+# Tageskontingent in Zeichen für alle angemeldeten Benutzer, 0 = unbegrenzt (Standard)
+DAILY_CHARACTER_QUOTA = int(os.getenv("USER_DAILY_CHARACTER_QUOTA", "0"))
+# Abweichende Kontingente einzelner Benutzer, z.B. "anna@firma.de=500000,ben@firma.de=0" (0 = unbegrenzt)
+USER_CHARACTER_QUOTAS = parse_user_values(os.getenv("USER_CHARACTER_QUOTAS", ""))
+USER_SCHEDULER_WEIGHTS = parse_user_values(os.getenv("USER_SCHEDULER_WEIGHTS", ""))
+
+
+class QuotaExceededError(Exception):
+    """Das Tageskontingent des Benutzers reicht für den Request nicht mehr; er wurde nicht gesendet."""
+
+
+@contextlib.contextmanager
+def use_requester(user: str, priority: str = "interactive"):
+    """Ordnet alle Anbieter-Aufrufe im aktuellen Kontext `user` mit `priority` ("interactive"/"bulk") zu."""
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unbekannte Priorität: {priority}")
+    token = _current.set((user.lower(), priority))
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+def current_requester() -> tuple[str, str]:
+    """(Benutzer, Priorität) des aktuellen Kontexts; ohne use_requester ("", "interactive")."""
+    return _current.get()
+
+
+def user_weight(user: str) -> float:
+    return max(0.01, USER_SCHEDULER_WEIGHTS.get(user, 1.0))
+
+
+def daily_quota(user: str) -> int:
+    """Zeichen pro Tag für `user`; 0 = unbegrenzt (auch für Aufrufe ohne Benutzer)."""
+    if not user:
+        return 0
+    return int(USER_CHARACTER_QUOTAS.get(user, DAILY_CHARACTER_QUOTA))
+
+
+class FairScheduler:
+    """Vergibt den Zugang zum Token-Bucket eines Anbieters der Reihe nach (Weighted Fair Queuing)."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._virtual_time = 0.0
+        self._finish_tags = {}
+        self._waiting = []
+        self._sequence = itertools.count()
+        self._busy = False
+        self._condition = threading.Condition()
+
+    @contextlib.contextmanager
+    def turn(self, cost: float = 1.0):
+        """Wartet, bis der aktuelle Benutzer an der Reihe ist; im Block wird das Token geholt."""
+        user, priority = current_requester()
+        with self._condition:
+            start = max(self._virtual_time, self._finish_tags.get(user, 0.0))
+            finish = start + max(1.0, cost) / user_weight(user)
+            self._finish_tags[user] = finish
+            entry = [PRIORITIES[priority], finish, next(self._sequence), start, user, priority]
+            heapq.heappush(self._waiting, entry)
+            try:
+                while self._busy or self._waiting[0] is not entry:
+                    self._condition.wait()
+            except BaseException:
+                self._waiting.remove(entry)
+                heapq.heapify(self._waiting)
+                self._condition.notify_all()
+                raise
+            heapq.heappop(self._waiting)
+            self._busy = True
+            self._virtual_time = max(self._virtual_time, start)
+            # Benutzer ohne Vorsprung vor der virtuellen Zeit brauchen keinen Eintrag mehr
+            for stale in [name for name, tag in self._finish_tags.items() if tag <= self._virtual_time]:
+                del self._finish_tags[stale]
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._busy = False
+                self._condition.notify_all()
+
+    def waiting(self) -> dict[str, int]:
+        """Anzahl wartender Aufrufe je Priorität."""
+        with self._condition:
+            counts = dict.fromkeys(PRIORITIES, 0)
+            for entry in self._waiting:
+                counts[entry[5]] += 1
+            return counts
+
+
+class UsageStore:
+    """Zeichenverbrauch pro Benutzer und Tag, geteilt über alle Prozesse (SQLite)."""
+
+    def __init__(self, db_path: str = USAGE_DB_PATH):
+        self._lock = threading.Lock()
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS usage (
+                user TEXT NOT NULL,
+                day TEXT NOT NULL,
+                characters INTEGER NOT NULL,
+                PRIMARY KEY (user, day)
+            )""")
+        self._conn.execute("DELETE FROM usage WHERE day < ?",
+                           (time.strftime("%Y-%m-%d", time.localtime(time.time() - USAGE_RETENTION_DAYS * 86400)),))
+
+    @staticmethod
+    def today() -> str:
+        return time.strftime("%Y-%m-%d")
+
+    def used(self, user: str, day: str | None = None) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT characters FROM usage WHERE user = ? AND day = ?",
+                                     (user, day or self.today())).fetchone()
+        return row[0] if row else 0
+
+    def reserve(self, user: str, characters: int) -> str:
+        """Bucht `characters` für heute und gibt den Tag zurück; reicht das Kontingent nicht: QuotaExceededError."""
+        day = self.today()
+        quota = daily_quota(user)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT characters FROM usage WHERE user = ? AND day = ?",
+                                         (user, day)).fetchone()
+                used = row[0] if row else 0
+                if quota and used + characters > quota:
+                    raise QuotaExceededError(f"{QUOTA_ERROR_TEXT}: {user} hat heute {used} von {quota} Zeichen "
+                                             f"übersetzt, der Request bräuchte {characters}.")
+                self._conn.execute("INSERT INTO usage (user, day, characters) VALUES (?, ?, ?) "
+                                   "ON CONFLICT (user, day) DO UPDATE "
+                                   "SET characters = characters + excluded.characters",
+                                   (user, day, characters))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return day
+
+    def refund(self, user: str, day: str, characters: int) -> None:
+        with self._lock:
+            self._conn.execute("UPDATE usage SET characters = MAX(0, characters - ?) WHERE user = ? AND day = ?",
+                               (characters, user, day))
+
+
+_schedulers = {}
+_usage_store = None
+_registry_lock = threading.Lock()
+
+
+def get_fair_scheduler(provider: str) -> FairScheduler:
+    with _registry_lock:
+        if provider not in _schedulers:
+            _schedulers[provider] = FairScheduler(provider)
+        return _schedulers[provider]
+
+
+def get_usage_store() -> UsageStore:
+    global _usage_store
+    with _registry_lock:
+        if _usage_store is None:
+            _usage_store = UsageStore()
+        return _usage_store
+
+
+@contextlib.contextmanager
+def charge_quota(characters: int):
+    """
+    Reserviert `characters` im Tageskontingent des aktuellen Benutzers für den Request im Block und bucht sie
+    zurück, wenn der Block mit einem Fehler endet. Ohne Benutzer ohne Wirkung.
+    """
+    user, _ = current_requester()
+    if not user or characters <= 0:
+        yield
+        return
+    store = get_usage_store()
+    day = store.reserve(user, characters)
+    try:
+        yield
+    except BaseException:
+        store.refund(user, day, characters)
+        raise
+
+
+def quota_status(user: str) -> dict:
+    """{"used": heute übersetzte Zeichen, "quota": Kontingent (0 = unbegrenzt), "remaining": Rest oder None}."""
+    user = user.lower()
+    used = get_usage_store().used(user) if user else 0
+    quota = daily_quota(user)
+    return {"used": used, "quota": quota, "remaining": max(0, quota - used) if quota else None}
+
+
+def waiting_requests() -> dict[str, int]:
+    """Wartende Aufrufe je Priorität über alle Anbieter (für die Anzeige in der Seitenleiste)."""
+    with _registry_lock:
+        schedulers = list(_schedulers.values())
+    counts = dict.fromkeys(PRIORITIES, 0)
+    for scheduler in schedulers:
+        for priority, count in scheduler.waiting().items():
+            counts[priority] += count
+    return counts
@@ -0,0 +1,285 @@
+"""
+Übersetzung mit Gemini (generateContent); das Translation Memory und der gemeinsame Rate Limiter werden wie bei
+DeepL verwendet.
+
+Im strukturierten Modus (Standard) gehen alle Felder eines Blatts als ein JSON-Objekt in einem Request an
+Gemini, die Antwort ist ein JSON-Objekt mit denselben Schlüsseln. Zu große Blätter werden nach einem geschätzten
+Token-Budget aufgeteilt. Fehlende oder ungültige Felder einer erfolgreichen Antwort werden einzeln
+nachübersetzt (ein Request pro Text wie bisher); schlägt der Request selbst fehl, werden seine Felder zu Fehlern
+und der Router fällt auf den Ausweichanbieter zurück. GEMINI_STRUCTURED=0 schaltet zurück auf Einzel-Requests.
+
+Geschützte Begriffe gehen als Platzhalter ⟦0⟧, ⟦1⟧, ... hinaus und werden nach der Antwort wieder eingesetzt
+(siehe protected_terms); eine Antwort ohne alle Platzhalter gilt als ungültig.
+"""
+import json
+import os
+import re
+
+import requests
+from dotenv import load_dotenv
+
+from generation_metrics import record_api_call, record_cache_hits
+from http_client import HTTP_TIMEOUT, call_provider, get_http_session
+from product_data import get_product_catalog
+from protected_terms import ProtectedTerms
+from translatability import translate_translatable
+from translation_cache import get_translation_cache
+from translation_memory import cached_translation, get_translation_memory
+
+load_dotenv()
+
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
+# Andere Basis-URL z.B. für einen Proxy oder den Testserver der Benchmarks
+GEMINI_API_BASE_URL = os.getenv("GEMINI_API_BASE_URL", "https://generativelanguage.googleapis.com")
+GEMINI_API_URL_GENERATE_CONTENT = (f"{GEMINI_API_BASE_URL}/v1beta/models/{GEMINI_MODEL}"
+                                   f":generateContent?key={GEMINI_API_KEY}")
+GEMINI_STRUCTURED = os.getenv("GEMINI_STRUCTURED", "1") not in ("0", "false", "")
+# Geschätzte Ausgabe-Tokens pro strukturiertem Request; maxOutputTokens lässt Luft für Ausreißer
+GEMINI_TOKEN_BUDGET = int(os.getenv("GEMINI_TOKEN_BUDGET", "6000"))
+GEMINI_MAX_OUTPUT_TOKENS = 8192
+
+
+def _generate_content(payload: dict, characters: int = 0) -> dict:
+    """
+    Schickt einen generateContent-Request über die geteilte Session (Keep-Alive, Wiederholungen), den Circuit
+    Breaker und den gemeinsamen Rate Limiter und gibt die JSON-Antwort zurück. `characters` (zu übersetzende
+    Zeichen über alle Zielsprachen) zählen gegen das Tageskontingent des Benutzers.
+    """
+    session = get_http_session("gemini")
+
+    def post_request():
+        response = session.post(GEMINI_API_URL_GENERATE_CONTENT, headers={'Content-Type': 'application/json'},
+                                data=json.dumps(payload), timeout=HTTP_TIMEOUT)
+        response.raise_for_status()
+        return response
+
+    return call_provider("gemini", post_request, characters).json()
+
+
+def _response_text(response_json: dict) -> str | None:
+    candidates = response_json.get("candidates") or [{}]
+    parts = (candidates[0].get("content") or {}).get("parts") or [{}]
+    return parts[0].get("text")
+
+
+@cached_translation("gemini")
+def translate_text_gemini_api_call(text_to_translate: str, source_language: str, target_language: str) -> tuple[
+    str, str | None]:
+    if not text_to_translate:
+        return text_to_translate, "Kein Text zum Übersetzen angegeben."
+    if not target_language:
+        return text_to_translate, "Keine Zielsprache für die Übersetzung angegeben."
+    if not GEMINI_API_KEY:
+        return "[Gemini API Fehler]", "Gemini API-Schlüssel nicht konfiguriert."
+
+    terms = get_product_catalog().protected_terms
+    masked_text, originals = terms.mask(text_to_translate)
+    prompt = (
+        f"Du bist ein reiner Textübersetzer. Deine einzige Aufgabe ist es, den gegebenen Text zu übersetzen. "
+        f"Übersetze den folgenden Text von {source_language} nach {target_language}. "
+        f"WICHTIG: Platzhalter wie ⟦0⟧ stehen für Markennamen und müssen exakt so und an passender Stelle erhalten bleiben. "
+        f"{terms.glossary_hint([text_to_translate], target_language)}"
+        f"Deine Antwort darf AUSSCHLIESSLICH den übersetzten Text in {target_language} enthalten. "
+        f"Gib KEINE Einleitungen, KEINE Erklärungen, KEINE Formatierungen (wie Markdown), KEINE alternativen Übersetzungen und KEINE zusätzlichen Informationen oder Kommentare aus. "
+        f"Nur der reine, direkt übersetzte Text in {target_language}, wobei alle Platzhalter unverändert bleiben. "
+        f"Der zu übersetzende Text lautet: \"{masked_text}\""
+    )
+
+    payload = {
+        "contents": [{"parts": [{"text": prompt}]}],
+        "generationConfig": {"temperature": 0.2, "maxOutputTokens": 2048}
+    }
+
+    try:
+        response_json = _generate_content(payload, len(text_to_translate))
+        # Einzel-Requests kennen ihr Feld nicht und zählen nur in der Gesamtsumme
+        record_api_call("gemini", {"": len(text_to_translate)})
+
+        if _response_text(response_json):
+            translated_text = _response_text(response_json).strip()
+            if translated_text.startswith('"') and translated_text.endswith('"'):
+                translated_text = translated_text[1:-1]
+            if translated_text.startswith("'") and translated_text.endswith("'"):
+                translated_text = translated_text[1:-1]
+            unmasked_text = terms.unmask(translated_text.strip(), originals)
+            if unmasked_text is None:
+                error_detail = f"Geschützter Begriff fehlt in der Gemini-Antwort: {translated_text}"
+                print(f"DEBUG: {error_detail}")
+                return "[Gemini Antwort-Verarbeitungsfehler]", error_detail
+            return unmasked_text, None
+        else:
+            error_detail = f"Unerwartete Antwortstruktur von Gemini: {response_json}"
+            print(f"DEBUG: Unerwartete Gemini-Antwortstruktur: {error_detail}")
+            return "[Gemini Antwort-Verarbeitungsfehler]", error_detail
+    except requests.exceptions.RequestException as e:
+        print(f"DEBUG: Gemini API Request Fehler: {str(e)}")
+        return "[Gemini API Fehler]", str(e)
+    except Exception as e:
+        print(f"DEBUG: Allgemeiner Fehler bei Gemini Übersetzung: {str(e)}")
+        return "[Allgemeiner Fehler bei Gemini Übersetzung]", str(e)
+
+
+def translate_texts_gemini_per_field(texts: dict[str, str], source_language: str,
+                                     target_language: str) -> tuple[dict[str, str], dict[str, str]]:
+    """Übersetzt mehrere Texte nacheinander mit Gemini; gibt (Übersetzungen, Fehler) je Schlüssel zurück."""
+    translations, errors = {}, {}
+    for key, text in texts.items():
+        if not text.strip():
+            translations[key] = ""
+            continue
+        translations[key], err = translate_text_gemini_api_call(text, source_language, target_language)
+        if err:
+            errors[key] = err
+    return translations, errors
+
+
+def estimate_tokens(text: str) -> int:
+    """Grobe Schätzung der Ausgabe-Tokens einer Übersetzung samt JSON-Schlüssel (eher zu hoch als zu niedrig)."""
+    return len(text.encode("utf-8")) // 3 + 8
+
+
+def plan_structured_requests(texts: dict[str, str], token_budget: int = GEMINI_TOKEN_BUDGET) -> list[dict[str, str]]:
+    """Teilt die Texte in Requests auf, deren geschätzte Antwort ins Token-Budget passt."""
+    chunks, current, current_tokens = [], {}, 0
+    for key, text in texts.items():
+        tokens = estimate_tokens(text)
+        if current and current_tokens + tokens > token_budget:
+            chunks.append(current)
+            current, current_tokens = {}, 0
+        current[key] = text
+        current_tokens += tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _structured_payload(texts: dict[str, str], source_language: str, target_language: str,
+                        glossary_hint: str = "") -> dict:
+    prompt = (
+        f"Du bist ein reiner Textübersetzer. Übersetze jeden Wert des folgenden JSON-Objekts von {source_language} "
+        f"nach {target_language}. "
+        "Platzhalter wie ⟦0⟧ stehen für Markennamen und bleiben exakt so erhalten. "
+        + glossary_hint +
+        "Antworte nur mit einem JSON-Objekt mit genau denselben Schlüsseln und dem übersetzten Text als Wert, "
+        "ohne Erklärungen.\n"
+        + json.dumps(texts, ensure_ascii=False)
+    )
+    return {
+        "contents": [{"parts": [{"text": prompt}]}],
+        "generationConfig": {"temperature": 0.2, "maxOutputTokens": GEMINI_MAX_OUTPUT_TOKENS,
+                             "responseMimeType": "application/json",
+                             "responseSchema": {"type": "OBJECT",
+                                                "properties": {key: {"type": "STRING"} for key in texts},
+                                                "required": list(texts)}}
+    }
+
+
+def parse_structured_response(response_text: str | None, texts: dict[str, str],
+                              originals: dict[str, list[str]] | None = None) -> dict[str, str]:
+    """
+    Prüft die JSON-Antwort gegen die erwarteten Schlüssel. Gibt nur die gültigen Übersetzungen zurück
+    ({Schlüssel: Text}) und setzt dabei die geschützten Begriffe aus `originals` ({Schlüssel: Begriffe}, siehe
+    ProtectedTerms.mask) wieder ein; leere Werte und Werte mit fehlenden Platzhaltern gelten als ungültig.
+    """
+    if not response_text:
+        return {}
+    response_text = re.sub(r"^```(?:json)?\s*|\s*```$", "", response_text.strip())
+    try:
+        data = json.loads(response_text)
+    except ValueError as e:
+        print(f"DEBUG: Gemini-Antwort ist kein gültiges JSON: {e}")
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    valid = {}
+    for key in texts:
+        value = data.get(key)
+        if not isinstance(value, str) or not value.strip():
+            continue
+        value = ProtectedTerms.unmask(value.strip(), (originals or {}).get(key, []))
+        if value is not None:
+            valid[key] = value
+    return valid
+
+
+def translate_texts_gemini_structured(texts: dict[str, str], source_language: str,
+                                      target_language: str) -> tuple[dict[str, str], dict[str, str]]:
+    """
+    Übersetzt alle Texte mit möglichst wenigen strukturierten Requests; gibt (Übersetzungen, Fehler) mit denselben
+    Schlüsseln wie `texts` zurück. Einzeln nachübersetzt werden nur Texte, die in einer erfolgreichen Antwort
+    fehlen oder ungültig sind. Schlägt ein Request selbst fehl (Kontingent, Circuit Breaker, HTTP-Fehler,
+    Timeout), werden seine Texte zu Fehlern je Feld, damit der Router den Ausweichanbieter nehmen kann.
+    """
+    translations = {key: "" for key, text in texts.items() if not text or not text.strip()}
+    errors = {}
+    unique_texts = list(dict.fromkeys(text for key, text in texts.items() if key not in translations))
+    memory = get_translation_memory()
+    remembered = memory.lookup_many(unique_texts, source_language, target_language, "gemini")
+    translations.update({key: remembered[text] for key, text in texts.items() if text in remembered})
+    record_cache_hits(key for key, text in texts.items() if text in remembered)
+    pending = [text for text in unique_texts if text not in remembered]
+    if not pending:
+        return translations, errors
+
+    # Gleiche Texte nur einmal senden; im Request stehen kurze Schlüssel statt der Feldnamen
+    ids = {text: f"t{i}" for i, text in enumerate(pending)}
+    first_key = {}
+    for key, text in texts.items():
+        first_key.setdefault(text, key)
+    done, failed = {}, {}
+    if GEMINI_API_KEY:
+        terms = get_product_catalog().protected_terms
+        for chunk in plan_structured_requests({ids[text]: text for text in pending}):
+            masked = {id_: terms.mask(text) for id_, text in chunk.items()}
+            masked_texts = {id_: masked_text for id_, (masked_text, _) in masked.items()}
+            try:
+                response_json = _generate_content(_structured_payload(
+                    masked_texts, source_language, target_language,
+                    terms.glossary_hint(chunk.values(), target_language)), sum(len(text) for text in chunk.values()))
+            except Exception as e:
+                print(f"DEBUG: Strukturierter Gemini-Request fehlgeschlagen: {e}")
+                failed.update({text: str(e) for text in chunk.values()})
+                continue
+            record_api_call("gemini", {first_key[text]: len(text) for text in chunk.values()})
+            parsed = parse_structured_response(_response_text(response_json), masked_texts,
+                                               {id_: originals for id_, (_, originals) in masked.items()})
+            by_text = {chunk[id_]: value for id_, value in parsed.items()}
+            done.update(by_text)
+            memory.store_many(by_text, source_language, target_language, "gemini")
+
+    missing = {}
+    for key, text in texts.items():
+        if key in translations:
+            continue
+        if text in done:
+            translations[key] = done[text]
+        elif text in failed:
+            translations[key] = "[Gemini API Fehler]"
+            errors[key] = failed[text]
+        else:
+            missing[key] = text
+    if missing:
+        print(f"DEBUG: {len(missing)} Felder ({target_language}) fehlen in der strukturierten Antwort, "
+              f"Einzelübersetzung")
+        fallback_translations, fallback_errors = translate_texts_gemini_per_field(missing, source_language,
+                                                                                   target_language)
+        translations.update(fallback_translations)
+        errors.update(fallback_errors)
+    return translations, errors
+
+
+def translate_texts_gemini(texts: dict[str, str], source_language: str,
+                           target_language: str) -> tuple[dict[str, str], dict[str, str]]:
+    """
+    Übersetzt die Texte eines Blatts in eine Zielsprache; gibt (Übersetzungen, Fehler) je Schlüssel zurück.
+    Texte ohne Übersetzungsbedarf (siehe translatability) werden nicht gesendet, Texte aus dem prozessweiten
+    Cache (translation_cache) ebenfalls nicht.
+    """
+    def translate_uncached(uncached):
+        if not GEMINI_STRUCTURED:
+            return translate_texts_gemini_per_field(uncached, source_language, target_language)
+        return translate_texts_gemini_structured(uncached, source_language, target_language)
+
+    return translate_translatable(texts, lambda pending: get_translation_cache().translate_batch(
+        pending, source_language, target_language, "gemini", translate_uncached))
@@ -0,0 +1,234 @@
+"""
+Produktblatt-Generierung als Hintergrund-Job, damit die Streamlit-Sitzung während der Übersetzung bedienbar bleibt.
+
+Die Apps starten eine Generierung mit submit_job und merken sich nur die Job-ID (im Session State und als
+?job=... in der URL). Die Arbeit läuft in einem prozessweiten Thread-Pool (GENERATION_JOB_WORKERS Jobs
+gleichzeitig, weitere warten); die Oberfläche fragt den Fortschritt je Stufe und Sprache regelmäßig über
+progress() ab. Nach einem Neuladen der Seite findet die App den Job über die URL (oder den angemeldeten
+Benutzer) wieder und übernimmt das fertige Ergebnis.
+
+Abgebrochen wird kooperativ: noch nicht begonnene Sprachen fallen weg, bereits laufende werden fertig übersetzt,
+damit keine bezahlten Requests verloren gehen. Fertige Jobs bleiben GENERATION_JOB_RETENTION_SECONDS im
+Speicher und werden danach beim nächsten submit_job entfernt.
+"""
+import contextvars
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from fair_scheduler import QUOTA_ERROR_TEXT, current_requester, quota_status
+from sheet_bundle import SheetBundle
+from sheet_generator import build_zip, generate_sheets, sheet_filename
+from sheet_texts import describe_failed_fields
+
+JOB_WORKERS = int(os.getenv("GENERATION_JOB_WORKERS", "4"))
+JOB_RETENTION_SECONDS = int(os.getenv("GENERATION_JOB_RETENTION_SECONDS", "3600"))
+# Abfrageintervall der Fortschrittsanzeige in den Apps
+JOB_POLL_SECONDS = float(os.getenv("GENERATION_JOB_POLL_SECONDS", "1"))
+
+STATUS_LABELS = {"queued": "Wartet auf einen freien Platz", "running": "Läuft", "done": "Fertig",
+                 "failed": "Fehlgeschlagen", "cancelled": "Abgebrochen"}
+LANGUAGE_STATES = {"pending": "⏳", "ok": "✅", "warning": "⚠️", "cancelled": "⛔"}
+
+
+class GenerationJob:
+    def __init__(self, owner: str, languages: list[str], metrics=None):
+        self.job_id = uuid.uuid4().hex[:16]
+        self.owner = owner
+        self.metrics = metrics
+        self.status = "queued"
+        self.stage = STATUS_LABELS["queued"]
+        self.languages = {language: "pending" for language in languages}
+        self.result = None
+        self.error = ""
+        self.collected = False
+        self.created_at = time.time()
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed", "cancelled")
+
+    def set_stage(self, stage: str) -> None:
+        with self._lock:
+            self.stage = stage
+
+    def language_done(self, language: str, errors: dict[str, str]) -> None:
+        """Passt als on_done-Callback für sheet_generator.generate_sheets."""
+        with self._lock:
+            if errors.get("sheet") == "abgebrochen":
+                self.languages[language] = "cancelled"
+            else:
+                self.languages[language] = "warning" if errors else "ok"
+
+    def progress(self) -> dict:
+        """Momentaufnahme für die Fortschrittsanzeige (thread-sicher)."""
+        with self._lock:
+            languages = dict(self.languages)
+            stage = self.stage
+        return {"status": self.status, "status_label": STATUS_LABELS[self.status], "stage": stage,
+                "languages": {language: LANGUAGE_STATES[state] for language, state in languages.items()},
+                "done": sum(1 for state in languages.values() if state != "pending"), "total": len(languages),
+                "metrics": self.metrics.summary() if self.metrics is not None else None, "error": self.error}
+
+
+_executor = None
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=max(1, JOB_WORKERS), thread_name_prefix="generation-job")
+    return _executor
+
+
+def cancelled_message(finished: int, total: int) -> str:
+    return f"Generierung abgebrochen: {finished} von {total} Sprachen wurden noch fertig."
+
+
+def _run(job: GenerationJob, work) -> None:
+    if job.cancelled:
+        # Vor dem Start abgebrochen: dieselbe Meldung wie bei einem Abbruch während der Generierung
+        for language in job.languages:
+            job.language_done(language, {"sheet": "abgebrochen"})
+        job.result = {"error_message": cancelled_message(0, len(job.languages))}
+        job.status = "cancelled"
+        job.set_stage(STATUS_LABELS[job.status])
+        job.finished_at = time.time()
+        return
+    job.status = "running"
+    try:
+        job.result = work(job)
+        job.status = "cancelled" if job.cancelled and any(
+            state == "cancelled" for state in job.languages.values()) else "done"
+    except Exception as e:
+        print(f"DEBUG: Generierungs-Job {job.job_id} fehlgeschlagen: {e}")
+        job.error = str(e)
+        job.status = "failed"
+    finally:
+        job.set_stage(STATUS_LABELS[job.status])
+        job.finished_at = time.time()
+
+
+def submit_job(work, owner: str = "", languages: list[str] | None = None, metrics=None) -> GenerationJob:
+    """
+    Startet `work(job)` im Job-Pool und gibt den Job sofort zurück. `work` meldet Fortschritt über
+    job.set_stage / job.language_done, prüft job.cancelled und gibt das Ergebnis zurück (landet in job.result).
+    Der Job läuft im Kontext des Aufrufers, erbt also z.B. Benutzer und Priorität aus fair_scheduler.use_requester.
+    """
+    job = GenerationJob(owner, languages or [], metrics)
+    with _jobs_lock:
+        now = time.time()
+        for job_id in [job_id for job_id, old in _jobs.items()
+                       if old.finished_at and now - old.finished_at > JOB_RETENTION_SECONDS]:
+            del _jobs[job_id]
+        _jobs[job.job_id] = job
+        _get_executor().submit(contextvars.copy_context().run, _run, job, work)
+    return job
+
+
+def get_job(job_id: str | None, owner: str = "") -> GenerationJob | None:
+    """Job zur ID; Jobs eines anderen Benutzers bleiben unsichtbar."""
+    with _jobs_lock:
+        job = _jobs.get(job_id) if job_id else None
+    if job is None or (job.owner and job.owner != owner):
+        return None
+    return job
+
+
+def latest_job(owner: str) -> GenerationJob | None:
+    """Jüngster noch nicht abgeholte Job eines angemeldeten Benutzers (für die Wiederaufnahme ohne URL)."""
+    if not owner:
+        return None
+    with _jobs_lock:
+        jobs = [job for job in _jobs.values() if job.owner == owner and not job.collected]
+    return max(jobs, key=lambda job: job.created_at) if jobs else None
+
+
+def cancel_job(job_id: str, owner: str = "") -> bool:
+    job = get_job(job_id, owner)
+    if job is None or job.finished:
+        return False
+    job.cancel_event.set()
+    job.set_stage("Wird abgebrochen...")
+    return True
+
+
+def run_sheet_generation(job: GenerationJob, product_form: dict, target_languages: list[str], load_assets,
+                         translate_batch, snapshot, multi_language_mode: bool, bundle_output: bool) -> dict:
+    """
+    Die Generierung der Apps (app_deepl, app_azure) als Job-Funktion: Bilder laden, alle Sprachen übersetzen und
+    rendern, Vorschau und ZIP bauen. `load_assets()` liefert die Bild-URLs der Vorlage; `snapshot` ist der
+    TranslationSnapshot der Sitzung. Gibt die Werte zurück, die die App in den Session State übernimmt.
+    """
+    metrics = job.metrics
+    job.set_stage("Bilder laden")
+    with metrics.stage("assets"):
+        assets = load_assets()
+
+    # Nur seit dem letzten Lauf geänderte Felder gehen an den Anbieter, der Rest kommt aus dem Schnappschuss
+    snapshot.reset_last_run()
+    job.set_stage("Übersetzen und rendern")
+    # Bundle: Bilder, Symbole und CSS liegen nur einmal im ZIP und werden von allen Sprachen referenziert
+    bundle = SheetBundle() if multi_language_mode and bundle_output else None
+    results = generate_sheets(product_form, target_languages, snapshot.wrap(translate_batch), assets,
+                              on_done=job.language_done, bundle=bundle, metrics=metrics,
+                              cancel_event=job.cancel_event)
+
+    translation_errors, skipped_languages = {}, []
+    for language, (html_content, errors) in results.items():
+        for key, err in errors.items():
+            if err == "abgebrochen":
+                skipped_languages.append(language)
+                continue
+            print(f"DEBUG: Übersetzung fehlgeschlagen für '{key}' ({language}): {err}")
+            translation_errors[f"{key} ({language})" if multi_language_mode else key] = err
+    finished_languages = [language for language in target_languages if results[language][0]]
+
+    if skipped_languages:
+        error_message = cancelled_message(len(finished_languages), len(target_languages))
+    elif translation_errors:
+        error_message = ("Einige Texte konnten nicht übersetzt werden "
+                         f"({describe_failed_fields(translation_errors)}). Prüfen Sie die Konsole für Details.")
+        if any(QUOTA_ERROR_TEXT in err for err in translation_errors.values()):
+            quota = quota_status(current_requester()[0])
+            error_message += (f" {QUOTA_ERROR_TEXT}: heute {quota['used']} von {quota['quota']} Zeichen übersetzt, "
+                              "weitere Übersetzungen sind erst morgen wieder möglich.")
+    else:
+        error_message = "Produktblatt erfolgreich generiert!"
+    snapshot.save()
+    result = {"error_message": error_message, "reuse_message": snapshot.describe_last_run(),
+              "generation_metrics": metrics.finish(), "generated_html_content": "", "preview_language": "",
+              "generated_zip_content": None}
+    if not finished_languages:
+        return result
+
+    job.set_stage("Dateien packen")
+    # Vorschau zeigt die erste Sprache; im Mehrsprachen-Modus gibt es zusätzlich ein ZIP mit allen Dateien
+    article_number = product_form["article_number_value"]
+    preview_language = finished_languages[0]
+    preview_html = results[preview_language][0]
+    result.update({"preview_language": preview_language,
+                   "generated_html_content": bundle.inline_assets(preview_html) if bundle else preview_html,
+                   "download_filename": sheet_filename(article_number, preview_language)})
+    if bundle:
+        for language in finished_languages:
+            bundle.add_page(sheet_filename(article_number, language), results[language][0])
+        result.update({"generated_zip_content": bundle.to_zip(),
+                       "zip_filename": f"{article_number}_produktblaetter.zip"})
+    elif multi_language_mode:
+        result.update({"generated_zip_content": build_zip({sheet_filename(article_number, language):
+                                                           results[language][0]
+                                                           for language in finished_languages}),
+                       "zip_filename": f"{article_number}_produktblaetter.zip"})
+    return result
@@ -0,0 +1,216 @@
+"""
+Messwerte einer Generierung: Dauer je Stufe sowie API-Requests, gesendete Zeichen und Cache-Treffer.
+
+Ein GenerationMetrics-Objekt wird pro Klick auf "Generieren" (bzw. pro Batch-Lauf) angelegt und an
+sheet_generator übergeben. Die Übersetzungsschichten (Katalog, Schnappschuss, Translation Memory, DeepL,
+Gemini) melden ihre Zahlen über record_cache_hits / record_api_call an das gerade aktive Objekt; welches das ist,
+steht in einer ContextVar, damit parallele Sprachen und Sessions sich nicht vermischen.
+
+Übersetzt wird ein Blatt in einem Rutsch. Die Dauer steht daher unter "translation"; Zeichen, Requests und
+Treffer werden zusätzlich nach Feldart (Felder, Merkmale, Beschriftungen, Pflegehinweise, Größentabelle)
+aufgeschlüsselt. Ein Request zählt bei jeder Feldart, deren Texte er enthielt. page_optimizer meldet zusätzlich
+die Seitengröße vor und nach der Optimierung (record_page_bytes).
+
+finish() schreibt eine JSON-Logzeile und, wenn METRICS_FILE gesetzt ist, die aufsummierten Zähler des Prozesses
+im Prometheus-Textformat (z.B. für den Textfile-Collector des node_exporter).
+"""
+import contextlib
+import contextvars
+import json
+import os
+import threading
+import time
+
+METRICS_FILE = os.getenv("METRICS_FILE")
+
+STAGE_LABELS = {"assets": "Bilder laden", "translation": "Übersetzung", "fields": "  Felder",
+                "features": "  Merkmale", "labels": "  Beschriftungen", "care_texts": "  Pflegehinweise",
+                "size_chart": "  Größentabelle", "context": "Kontext aufbauen", "care_items": "Pflegesymbole",
+                "render": "Vorlage rendern", "fonts": "Schriften einbetten", "optimize": "Seite optimieren"}
+# Schlüsselpräfix (siehe sheet_texts.collect_sheet_texts) -> Feldart
+KEY_STAGES = {"user.": "fields", "feature.": "features", "default.": "labels", "care.": "care_texts",
+              "chart.": "size_chart"}
+
+_current = contextvars.ContextVar("generation_metrics", default=None)
+
+
+def stage_for_key(key: str) -> str | None:
+    for prefix, stage in KEY_STAGES.items():
+        if key.startswith(prefix):
+            return stage
+    return None
+
+
+class GenerationMetrics:
+    def __init__(self, app: str = "", user: str = ""):
+        self.app = app
+        self.user = user
+        self.stages = {}
+        self.providers = {}
+        self.languages = 0
+        self.page_bytes = {"before": 0, "after": 0}
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def _stage(self, name: str) -> dict:
+        return self.stages.setdefault(name, {"duration_ms": 0.0, "api_calls": 0, "characters": 0, "cache_hits": 0})
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        """Misst die Dauer eines Abschnitts; parallele Sprachen werden aufsummiert."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._stage(name)["duration_ms"] += (time.perf_counter() - start) * 1000
+
+    def record_api_call(self, provider: str, characters_by_key: dict[str, int]) -> None:
+        with self._lock:
+            characters = sum(characters_by_key.values())
+            provider_counts = self.providers.setdefault(provider, {"api_calls": 0, "characters": 0})
+            provider_counts["api_calls"] += 1
+            provider_counts["characters"] += characters
+            translation = self._stage("translation")
+            translation["api_calls"] += 1
+            translation["characters"] += characters
+            by_stage = {}
+            for key, key_characters in characters_by_key.items():
+                stage = stage_for_key(key)
+                if stage:
+                    by_stage[stage] = by_stage.get(stage, 0) + key_characters
+            for stage, stage_characters in by_stage.items():
+                self._stage(stage)["api_calls"] += 1
+                self._stage(stage)["characters"] += stage_characters
+
+    def record_cache_hits(self, keys) -> None:
+        with self._lock:
+            keys = list(keys)
+            self._stage("translation")["cache_hits"] += len(keys)
+            for key in keys:
+                stage = stage_for_key(key)
+                if stage:
+                    self._stage(stage)["cache_hits"] += 1
+
+    def record_page_bytes(self, before: int, after: int) -> None:
+        with self._lock:
+            self.page_bytes["before"] += before
+            self.page_bytes["after"] += after
+
+    def summary(self) -> dict:
+        with self._lock:
+            ordered = {name: dict(self.stages[name]) for name in STAGE_LABELS if name in self.stages}
+            ordered.update({name: dict(values) for name, values in self.stages.items() if name not in ordered})
+            for values in ordered.values():
+                values["duration_ms"] = round(values["duration_ms"], 1)
+            return {"app": self.app, "user": self.user, "languages": self.languages,
+                    "wall_ms": round((time.perf_counter() - self._started) * 1000, 1), "stages": ordered,
+                    "providers": {name: dict(values) for name, values in self.providers.items()},
+                    "page_bytes": dict(self.page_bytes)}
+
+    def finish(self) -> dict:
+        """Schließt die Messung ab: JSON-Logzeile, Prometheus-Datei; gibt die Zusammenfassung zurück."""
+        summary = self.summary()
+        print(json.dumps({"event": "generation_metrics", "ts": round(time.time(), 3), **summary},
+                         ensure_ascii=False), flush=True)
+        publish(summary)
+        return summary
+
+
+@contextlib.contextmanager
+def use_metrics(metrics: GenerationMetrics | None):
+    """Macht `metrics` für den aktuellen Thread (bzw. Kontext) zum Ziel von record_*; None = nichts messen."""
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+
+
+@contextlib.contextmanager
+def measure_stage(name: str):
+    """Wie GenerationMetrics.stage für das gerade aktive Objekt; ohne aktives Objekt ohne Wirkung."""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+    else:
+        with metrics.stage(name):
+            yield
+
+
+def record_api_call(provider: str, characters_by_key: dict[str, int]) -> None:
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.record_api_call(provider, characters_by_key)
+
+
+def record_cache_hits(keys) -> None:
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.record_cache_hits(keys)
+
+
+def record_page_bytes(before: int, after: int) -> None:
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.record_page_bytes(before, after)
+
+
+def metrics_rows(summary: dict) -> list[dict]:
+    """Tabellenzeilen für die Anzeige in der Seitenleiste."""
+    return [{"Stufe": STAGE_LABELS.get(name, name), "ms": values["duration_ms"] or None,
+             "Requests": values["api_calls"], "Zeichen": values["characters"], "Cache-Treffer": values["cache_hits"]}
+            for name, values in summary["stages"].items()]
+
+
+# --- Prozessweite Summen für die Prometheus-Datei ---
+_totals = {"generations": {}, "stage_seconds": {}, "stage_api_calls": {}, "stage_characters": {},
+           "stage_cache_hits": {}, "provider_api_calls": {}, "provider_characters": {}, "page_bytes": {}}
+_totals_lock = threading.Lock()
+
+
+def _label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def _sample(value) -> str:
+    """Zähler exakt ausgeben; "{:g}" würde ab 1e6 Zeichen auf sechs Stellen runden."""
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+def publish(summary: dict) -> None:
+    with _totals_lock:
+        app_key = (("app", summary["app"]),)
+        _totals["generations"][app_key] = _totals["generations"].get(app_key, 0) + 1
+        for stage, values in summary["stages"].items():
+            stage_key = (("stage", stage),)
+            for total_name, value in (("stage_seconds", values["duration_ms"] / 1000),
+                                      ("stage_api_calls", values["api_calls"]),
+                                      ("stage_characters", values["characters"]),
+                                      ("stage_cache_hits", values["cache_hits"])):
+                _totals[total_name][stage_key] = _totals[total_name].get(stage_key, 0) + value
+        for provider, values in summary["providers"].items():
+            provider_key = (("provider", provider), ("user", summary["user"] or "anonym"))
+            for total_name, value in (("provider_api_calls", values["api_calls"]),
+                                      ("provider_characters", values["characters"])):
+                _totals[total_name][provider_key] = _totals[total_name].get(provider_key, 0) + value
+        for phase, value in summary["page_bytes"].items():
+            phase_key = (("phase", phase),)
+            _totals["page_bytes"][phase_key] = _totals["page_bytes"].get(phase_key, 0) + value
+        if not METRICS_FILE:
+            return
+        lines = []
+        for total_name, series in _totals.items():
+            metric = f"produktblatt_{total_name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for labels, value in series.items():
+                label_text = ",".join(f'{name}="{_label(label_value)}"' for name, label_value in labels)
+                lines.append(f"{metric}{{{label_text}}} {_sample(value)}")
+        if os.path.dirname(METRICS_FILE):
+            os.makedirs(os.path.dirname(METRICS_FILE), exist_ok=True)
+        temp_path = f"{METRICS_FILE}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(temp_path, METRICS_FILE)
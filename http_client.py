@@ -0,0 +1,183 @@
+"""
+Gemeinsame HTTP-Schicht für die Übersetzungsanbieter.
+
+- Eine requests.Session pro Anbieter mit Connection-Pool (Keep-Alive), passend zur Anzahl paralleler Worker,
+  damit nicht jedes Feld einen neuen TCP-/TLS-Handshake bezahlt. Auch der deepl.Translator bekommt einen
+  solchen Pool (ohne Wiederholungen, siehe create_deepl_translator).
+- Wiederholungen mit exponentiellem Backoff bei Verbindungsfehlern, Timeouts und 500/502/504. 429/503
+  (Drosselung) behandelt weiterhin rate_limiter.call_with_rate_limit mit der gemeinsamen, adaptiven Rate.
+- Ein Circuit Breaker pro Anbieter: nach CIRCUIT_FAILURE_THRESHOLD aufeinanderfolgenden vorübergehenden
+  Fehlern schlagen Aufrufe für CIRCUIT_RESET_SECONDS sofort fehl (der Router nimmt dann den Ausweichanbieter),
+  danach darf ein einzelner Probe-Aufruf durch.
+- Die Zeichen eines Requests werden vorher im Tageskontingent des angemeldeten Benutzers reserviert
+  (fair_scheduler); reicht es nicht, schlägt der Aufruf mit QuotaExceededError fehl, ohne gesendet zu werden.
+
+Sessions und Breaker sind thread-sicher und werden von allen Sessions des Prozesses geteilt.
+"""
+import os
+import threading
+import time
+
+import deepl
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from fair_scheduler import charge_quota
+from rate_limiter import call_with_rate_limit, is_throttling_error
+
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", str(2 * int(os.getenv("MAX_PARALLEL_LANGUAGES", "8")))))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+HTTP_BACKOFF_SECONDS = 0.5
+# (Verbindungsaufbau, Antwort) in Sekunden
+HTTP_TIMEOUT = (5, 60)
+TRANSIENT_STATUS_CODES = (500, 502, 504)
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_SECONDS = float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
+# Andere DeepL-Adresse z.B. für einen Proxy oder den Testserver der Benchmarks (sonst wählt deepl sie selbst)
+DEEPL_SERVER_URL = os.getenv("DEEPL_SERVER_URL") or None
+
+
+class CircuitOpenError(Exception):
+    """Der Anbieter gilt gerade als gestört; der Aufruf wurde gar nicht erst versucht."""
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 reset_seconds: float = CIRCUIT_RESET_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self._probe_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            return "half_open" if time.monotonic() - self.opened_at >= self.reset_seconds else "open"
+
+    def before_call(self) -> None:
+        with self._lock:
+            if self.opened_at is None:
+                return
+            if time.monotonic() - self.opened_at < self.reset_seconds or self._probe_running:
+                raise CircuitOpenError(f"{self.name} ist vorübergehend gesperrt "
+                                       f"({self.failures} Fehler in Folge), Aufruf übersprungen.")
+            # Halb offen: genau ein Probe-Aufruf darf durch
+            self._probe_running = True
+
+    def on_success(self) -> None:
+        with self._lock:
+            if self.opened_at is not None:
+                print(f"DEBUG: {self.name} antwortet wieder, Circuit Breaker geschlossen")
+            self.failures = 0
+            self.opened_at = None
+            self._probe_running = False
+
+    def on_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._probe_running or self.failures >= self.failure_threshold:
+                if self.opened_at is None or self._probe_running:
+                    print(f"DEBUG: {self.name} gestört ({self.failures} Fehler in Folge), "
+                          f"Circuit Breaker für {self.reset_seconds:g}s offen")
+                self.opened_at = time.monotonic()
+            self._probe_running = False
+
+
+_breakers = {}
+_sessions = {}
+_registry_lock = threading.Lock()
+
+
+def get_circuit_breaker(provider: str) -> CircuitBreaker:
+    with _registry_lock:
+        if provider not in _breakers:
+            _breakers[provider] = CircuitBreaker(provider)
+        return _breakers[provider]
+
+
+def circuit_states() -> dict[str, str]:
+    with _registry_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.state for breaker in breakers}
+
+
+def _pooled_adapter(retries: int = HTTP_RETRIES) -> HTTPAdapter:
+    retry = Retry(total=retries, connect=retries, read=retries, status=retries,
+                  backoff_factor=HTTP_BACKOFF_SECONDS, status_forcelist=TRANSIENT_STATUS_CODES,
+                  allowed_methods=frozenset({"GET", "POST"}), raise_on_status=False)
+    return HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+
+
+def get_http_session(provider: str) -> requests.Session:
+    """Gibt die geteilte Session des Anbieters zurück (Keep-Alive, Pool, Wiederholungen)."""
+    with _registry_lock:
+        if provider not in _sessions:
+            session = requests.Session()
+            adapter = _pooled_adapter()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _sessions[provider] = session
+        return _sessions[provider]
+
+
+def create_deepl_translator(auth_key: str) -> deepl.Translator:
+    """
+    deepl.Translator mit ausreichend großem Connection-Pool für parallele Sprachen. Die deepl-Bibliothek bietet
+    keinen Parameter für eine eigene Session; der Pool wird deshalb auf ihrer internen Session
+    (translator._client._session, vorhanden in deepl 1.x, siehe requirements.txt) eingehängt. Fehlt sie nach
+    einem Update, läuft der Translator mit dem Standard-Pool weiter und es wird eine Warnung ausgegeben.
+
+    Ohne urllib3-Retries: 429/503 wiederholt rate_limiter.call_with_rate_limit, die deepl-Bibliothek selbst
+    versucht einen Request höchstens einmal erneut (deepl_batch setzt max_network_retries = 1).
+    """
+    translator = deepl.Translator(auth_key, server_url=DEEPL_SERVER_URL)
+    session = getattr(getattr(translator, "_client", None), "_session", None)
+    if isinstance(session, requests.Session):
+        adapter = _pooled_adapter(retries=0)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+    else:
+        print(f"WARNUNG: deepl {getattr(deepl, '__version__', '?')} hat keine interne requests.Session mehr; "
+              f"DeepL läuft ohne den Connection-Pool (HTTP_POOL_SIZE={HTTP_POOL_SIZE}). "
+              "Bitte die deepl-Version in requirements.txt prüfen.")
+    return translator
+
+
+def is_transient_error(exc: Exception) -> bool:
+    """Fehler, die auf einen gestörten Anbieter hindeuten (nicht auf eine fehlerhafte Anfrage)."""
+    if is_throttling_error(exc):
+        return True
+    if isinstance(exc, (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                        deepl.ConnectionException)):
+        return True
+    response = getattr(exc, "response", None)
+    status_code = response.status_code if response is not None else getattr(exc, "http_status_code", None)
+    return status_code is not None and status_code >= 500
+
+
+def call_provider(provider: str, func, characters: int = 0):
+    """
+    Ruft `func()` über Tageskontingent, Circuit Breaker und gemeinsamen Rate Limiter auf. `characters` sind die
+    Zeichen, die der Request übersetzen lässt. Bei offenem Breaker wird sofort CircuitOpenError geworfen, bei
+    erschöpftem Kontingent QuotaExceededError, jeweils ohne den Anbieter zu belasten.
+    """
+    with charge_quota(characters):
+        breaker = get_circuit_breaker(provider)
+        breaker.before_call()
+        try:
+            result = call_with_rate_limit(provider, func, cost=characters or 1)
+        except Exception as e:
+            if is_transient_error(e):
+                breaker.on_failure()
+            else:
+                # Der Anbieter hat geantwortet (z.B. 400 oder 403), ist also erreichbar
+                breaker.on_success()
+            raise
+        breaker.on_success()
+        return result
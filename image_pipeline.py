@@ -0,0 +1,174 @@
+"""
+Bereitet hochgeladene Produktbilder für die Produktblätter auf.
+
+Bilder werden auf die Anzeigegröße der Vorlage verkleinert (Hauptbild 400 px, Detailbilder 300 px), als WebP
+bzw. optimiertes JPEG neu komprimiert und ohne Metadaten (EXIF, GPS, ICC-Kommentare) gespeichert. Ist das
+Ergebnis größer als IMAGE_MAX_BYTES, wird die Qualität schrittweise gesenkt. Ergebnisse werden über den
+SHA-256 des Originals unter .cache/images abgelegt, dasselbe Bild wird also nie zweimal verarbeitet. Das
+Verzeichnis ist auf IMAGE_CACHE_MAX_BYTES begrenzt: nach dem Schreiben werden (höchstens einmal pro
+CACHE_PRUNE_INTERVAL_SECONDS) die am längsten nicht mehr gelesenen Dateien gelöscht. Die Speicherstufe für
+fertige Daten-URLs liegt in blob_store.py.
+"""
+import base64
+import hashlib
+import io
+import os
+import threading
+import time
+
+from PIL import Image, ImageOps
+
+IMAGE_CACHE_DIR = os.getenv("IMAGE_CACHE_DIR",
+                            os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "images"))
+# "webp" oder "jpeg"
+IMAGE_FORMAT = os.getenv("IMAGE_FORMAT", "webp").lower()
+IMAGE_QUALITY = int(os.getenv("IMAGE_QUALITY", "82"))
+IMAGE_MIN_QUALITY = int(os.getenv("IMAGE_MIN_QUALITY", "50"))
+IMAGE_MAX_BYTES = int(os.getenv("IMAGE_MAX_BYTES", str(120 * 1024)))
+IMAGE_CACHE_MAX_BYTES = int(os.getenv("IMAGE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+CACHE_PRUNE_INTERVAL_SECONDS = 60
+# Temporäre Dateien abgebrochener Schreibvorgänge
+STALE_TEMP_SECONDS = 3600
+
+# Maximale Kantenlänge in Pixeln je Verwendung in der Vorlage
+IMAGE_SIZES = {"main": 400, "detail": 300}
+
+_MIME_TYPES = {"webp": "image/webp", "jpeg": "image/jpeg"}
+
+_last_prune = 0.0
+_prune_lock = threading.Lock()
+
+
+def prune_directory(directory: str, max_bytes: int, max_age_seconds: float = 0, entry_name=None) -> int:
+    """
+    Löscht die am längsten nicht verwendeten Einträge in `directory` (nach Änderungszeit, Treffer setzen sie
+    mit mark_used neu), bis höchstens `max_bytes` übrig sind; mit `max_age_seconds` zusätzlich alle älteren.
+    `entry_name(dateiname)` fasst zusammengehörige Dateien zu einem Eintrag zusammen. Gibt die Anzahl
+    gelöschter Einträge zurück.
+    """
+    entries = {}
+    now = time.time()
+    try:
+        with os.scandir(directory) as scanned:
+            for item in scanned:
+                if not item.is_file():
+                    continue
+                stat = item.stat()
+                if item.name.endswith(".tmp"):
+                    if now - stat.st_mtime > STALE_TEMP_SECONDS:
+                        entries[item.name] = [stat.st_mtime, stat.st_size, [item.path]]
+                    continue
+                name = entry_name(item.name) if entry_name else item.name
+                entry = entries.setdefault(name, [0.0, 0, []])
+                entry[0] = max(entry[0], stat.st_mtime)
+                entry[1] += stat.st_size
+                entry[2].append(item.path)
+    except OSError as e:
+        print(f"DEBUG: Cache-Verzeichnis {directory} nicht lesbar: {e}")
+        return 0
+    total = sum(entry[1] for entry in entries.values())
+    removed = 0
+    for mtime, size, paths in sorted(entries.values()):
+        if total <= max_bytes and not (max_age_seconds and now - mtime > max_age_seconds):
+            break
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"DEBUG: Cache-Datei {path} nicht löschbar: {e}")
+        total -= size
+        removed += 1
+    if removed:
+        print(f"DEBUG: {removed} Einträge aus {directory} entfernt, {total} Bytes verbleiben")
+    return removed
+
+
+def mark_used(path: str) -> None:
+    """Setzt die Änderungszeit neu, damit prune_directory die Datei als zuletzt verwendet behandelt."""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def _prune_image_cache() -> None:
+    global _last_prune
+    with _prune_lock:
+        if time.monotonic() - _last_prune < CACHE_PRUNE_INTERVAL_SECONDS:
+            return
+        _last_prune = time.monotonic()
+    prune_directory(IMAGE_CACHE_DIR, IMAGE_CACHE_MAX_BYTES)
+
+
+def _cache_key(contents: bytes, role: str) -> str:
+    digest = hashlib.sha256(contents).hexdigest()
+    settings = f"{role}-{IMAGE_SIZES[role]}-{IMAGE_FORMAT}-{IMAGE_QUALITY}-{IMAGE_MIN_QUALITY}-{IMAGE_MAX_BYTES}"
+    return f"{digest}-{hashlib.sha256(settings.encode('utf-8')).hexdigest()[:12]}"
+
+
+def _encode(image: Image.Image, quality: int) -> bytes:
+    buffer = io.BytesIO()
+    if IMAGE_FORMAT == "jpeg":
+        image.save(buffer, "JPEG", quality=quality, optimize=True, progressive=True)
+    else:
+        image.save(buffer, "WEBP", quality=quality, method=6)
+    return buffer.getvalue()
+
+
+def optimize_image(contents: bytes, role: str = "main") -> tuple[bytes, str]:
+    """
+    Verkleinert und komprimiert ein Bild für die Verwendung `role` ("main" oder "detail").
+    Gibt (Bilddaten, MIME-Typ) zurück; Metadaten werden nicht übernommen.
+    """
+    with Image.open(io.BytesIO(contents)) as image:
+        # EXIF-Ausrichtung anwenden, bevor die Metadaten verworfen werden
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((IMAGE_SIZES[role], IMAGE_SIZES[role]), Image.Resampling.LANCZOS)
+        has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+        if IMAGE_FORMAT == "jpeg" and has_alpha:
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image.convert("RGBA"), mask=image.convert("RGBA").getchannel("A"))
+            image = background
+        else:
+            image = image.convert("RGBA" if has_alpha else "RGB")
+
+    quality = IMAGE_QUALITY
+    data = _encode(image, quality)
+    while len(data) > IMAGE_MAX_BYTES and quality > IMAGE_MIN_QUALITY:
+        quality = max(IMAGE_MIN_QUALITY, quality - 8)
+        data = _encode(image, quality)
+    return data, _MIME_TYPES[IMAGE_FORMAT]
+
+
+def optimized_image_data_url(contents: bytes, role: str = "main", fallback_mime_type: str = "image/jpeg") -> str:
+    """
+    Gibt das optimierte Bild als Daten-URL zurück (aus dem Platten-Cache, falls schon einmal verarbeitet).
+    Kann das Bild nicht gelesen werden, wird das Original unverändert eingebettet.
+    """
+    key = _cache_key(contents, role)
+    extension = "jpg" if IMAGE_FORMAT == "jpeg" else IMAGE_FORMAT
+    cache_path = os.path.join(IMAGE_CACHE_DIR, f"{key}.{extension}")
+    try:
+        with open(cache_path, "rb") as f:
+            data, mime_type = f.read(), _MIME_TYPES[IMAGE_FORMAT]
+        mark_used(cache_path)
+    except FileNotFoundError:
+        try:
+            data, mime_type = optimize_image(contents, role)
+        except Exception as e:
+            print(f"DEBUG: Bild konnte nicht optimiert werden, Original wird verwendet: {e}")
+            return f"data:{fallback_mime_type};base64,{base64.b64encode(contents).decode('utf-8')}"
+        print(f"DEBUG: Bild optimiert ({role}): {len(contents)} -> {len(data)} Bytes")
+        try:
+            os.makedirs(IMAGE_CACHE_DIR, exist_ok=True)
+            temp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, cache_path)
+        except OSError as e:
+            print(f"DEBUG: Bild-Cache nicht beschreibbar: {e}")
+        _prune_image_cache()
+
+    return f"data:{mime_type};base64,{base64.b64encode(data).decode('utf-8')}"
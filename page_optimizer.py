@@ -0,0 +1,197 @@
+"""
+Letzte Stufe der Produktblatt-Erzeugung: verkleinert die fertige Seite, bevor sie angezeigt, heruntergeladen
+oder geschrieben wird.
+
+- CSS: Regeln für Klassen, die auf der Seite nicht vorkommen (z.B. Größentabelle oder Detailbilder, wenn das
+  Blatt keine hat), fallen weg; danach werden Kommentare und Leerraum entfernt. Das gemeinsame Stylesheet im
+  Bundle-Modus gilt für alle Seiten und wird nur minifiziert.
+- HTML: Kommentare und der Einrückungs-Leerraum der Jinja-Vorlage fallen weg. Leerraum zwischen Inline-
+  Elementen (<span>, <strong>, ...) bleibt als ein Leerzeichen erhalten, damit sich der Text nicht verändert.
+- Optional entstehen neben jeder geschriebenen Datei .gz- und (mit brotli) .br-Varianten für Webserver, die
+  vorkomprimierte Dateien ausliefern (gzip_static / brotli_static).
+
+Die Größe vor und nach der Optimierung wird an generation_metrics gemeldet. Im Entwicklungsmodus
+(TEMPLATE_DEV_MODE=1) oder mit PAGE_OPTIMIZE=0 bleibt die Seite unverändert und lesbar.
+"""
+import gzip
+import importlib.util
+import os
+import re
+
+from generation_metrics import record_page_bytes
+from template_engine import TEMPLATE_DEV_MODE
+
+PAGE_OPTIMIZE = os.getenv("PAGE_OPTIMIZE", "1") not in ("0", "false", "") and not TEMPLATE_DEV_MODE
+# Nur diese Dateiarten lohnen eine Vorkompression; Bilder und WOFF2 sind bereits komprimiert
+PRECOMPRESS_EXTENSIONS = (".html", ".css", ".svg")
+
+_CSS_COMMENT = re.compile(r"/\*.*?\*/", re.DOTALL)
+_CSS_CLASS = re.compile(r"\.(-?[_a-zA-Z][\w-]*)")
+_HTML_COMMENT = re.compile(r"<!--(?!\[if).*?-->", re.DOTALL)
+_HTML_TOKEN = re.compile(r"(<(?:style|script|pre|textarea)\b.*?</(?:style|script|pre|textarea)>|<[^>]+>)",
+                         re.DOTALL | re.IGNORECASE)
+_CLASS_ATTRIBUTE = re.compile(r"""\sclass\s*=\s*(?:"([^"]*)"|'([^']*)')""", re.IGNORECASE)
+_STYLE_BLOCK = re.compile(r"(<style\b[^>]*>)(.*?)(</style>)", re.DOTALL | re.IGNORECASE)
+_TAG_NAME = re.compile(r"</?([a-zA-Z][\w-]*)")
+# Zwischen diesen Elementen ist Leerraum bedeutungslos und fällt ganz weg
+_BLOCK_TAGS = frozenset((
+    "html", "head", "body", "meta", "title", "link", "style", "script", "div", "header", "footer", "section",
+    "main", "p", "h1", "h2", "h3", "h4", "ul", "ol", "li", "table", "thead", "tbody", "tr", "th", "td", "br",
+    "svg", "symbol", "defs", "g", "path", "use"))
+
+
+def minify_css(css: str) -> str:
+    css = _CSS_COMMENT.sub("", css)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,>])\s*", r"\1", css)
+    css = re.sub(r":\s+", ":", css)
+    return css.replace(";}", "}").strip()
+
+
+def _css_blocks(css: str):
+    """Zerlegt CSS in (Prelude, Inhalt) der obersten Ebene; Anweisungen ohne Block (@import) haben Inhalt None."""
+    position = 0
+    while position < len(css):
+        brace = css.find("{", position)
+        semicolon = css.find(";", position)
+        if brace == -1:
+            if css[position:].strip():
+                yield css[position:].strip(), None
+            return
+        if semicolon != -1 and semicolon < brace and css[position:semicolon].lstrip().startswith("@"):
+            yield css[position:semicolon + 1].strip(), None
+            position = semicolon + 1
+            continue
+        depth, end = 1, brace + 1
+        while end < len(css) and depth:
+            depth += {"{": 1, "}": -1}.get(css[end], 0)
+            end += 1
+        yield css[position:brace].strip(), css[brace + 1:end - 1]
+        position = end
+
+
+def _split_selectors(prelude: str) -> list[str]:
+    """Trennt eine Selektorliste an den Kommas der obersten Ebene (nicht in :is(.a, .b) oder [title="a,b"])."""
+    selectors, depth, quote, start = [], 0, None, 0
+    for i, character in enumerate(prelude):
+        if quote:
+            quote = None if character == quote else quote
+        elif character in "\"'":
+            quote = character
+        elif character in "([":
+            depth += 1
+        elif character in ")]":
+            depth -= 1
+        elif character == "," and not depth:
+            selectors.append(prelude[start:i])
+            start = i + 1
+    selectors.append(prelude[start:])
+    return selectors
+
+
+def required_classes(selector: str) -> set[str]:
+    """
+    Klassen, ohne die `selector` auf keiner Seite passen kann. Nur die oberste Ebene zählt: Klassen in :not(.x)
+    müssen gerade fehlen, in :is()/:where() genügt eine von mehreren, und in Attributselektoren ([href$=".pdf"])
+    sind es gar keine Klassen.
+    """
+    top_level, depth, quote = [], 0, None
+    for character in selector:
+        if quote:
+            quote = None if character == quote else quote
+        elif character in "\"'":
+            quote = character
+        elif character in "([":
+            depth += 1
+        elif character in ")]":
+            depth -= 1
+        elif not depth:
+            top_level.append(character)
+            continue
+        # Klammern und ihren Inhalt durch ein Trennzeichen ersetzen, damit keine Klassennamen zusammenwachsen
+        if not top_level or top_level[-1] != " ":
+            top_level.append(" ")
+    return set(_CSS_CLASS.findall("".join(top_level)))
+
+
+def prune_css(css: str, classes: set[str]) -> str:
+    """
+    Entfernt Selektoren, die eine auf der Seite nicht verwendete Klasse brauchen (siehe required_classes), und
+    Regeln ohne verbleibende Selektoren. @media-Blöcke werden rekursiv bereinigt, andere @-Regeln (@font-face,
+    @page) bleiben.
+    """
+    rules = []
+    for prelude, body in _css_blocks(_CSS_COMMENT.sub("", css)):
+        if body is None:
+            rules.append(prelude)
+        elif prelude.startswith("@media"):
+            inner = prune_css(body, classes)
+            if inner.strip():
+                rules.append(f"{prelude}{{{inner}}}")
+        elif prelude.startswith("@"):
+            rules.append(f"{prelude}{{{body}}}")
+        else:
+            selectors = [selector for selector in _split_selectors(prelude)
+                         if required_classes(selector) <= classes]
+            if selectors:
+                rules.append(f"{','.join(selectors)}{{{body}}}")
+    return "\n".join(rules)
+
+
+def used_classes(page_html: str) -> set[str]:
+    return {name for match in _CLASS_ATTRIBUTE.finditer(page_html)
+            for name in (match.group(1) or match.group(2) or "").split()}
+
+
+def minify_html(page_html: str) -> str:
+    parts = _HTML_TOKEN.split(_HTML_COMMENT.sub("", page_html))
+    result = []
+    for i, part in enumerate(parts):
+        if i % 2:
+            result.append(part)
+        elif part.strip():
+            result.append(re.sub(r"\s+", " ", part))
+        elif part:
+            # Reiner Leerraum zwischen zwei Tags: weg, wenn einer der beiden ein Block-Element ist
+            neighbours = [_TAG_NAME.match(parts[j]) for j in (i - 1, i + 1) if 0 <= j < len(parts)]
+            if any(match is None or match.group(1).lower() in _BLOCK_TAGS for match in neighbours):
+                continue
+            result.append(" ")
+    return "".join(result).strip()
+
+
+def optimize_page(page_html: str) -> str:
+    """Bereinigt und minifiziert eingebettetes CSS sowie das HTML einer gerenderten Seite."""
+    if not PAGE_OPTIMIZE:
+        return page_html
+    classes = used_classes(page_html)
+    optimized = _STYLE_BLOCK.sub(lambda match: f"{match.group(1)}{minify_css(prune_css(match.group(2), classes))}"
+                                               f"{match.group(3)}", page_html)
+    optimized = minify_html(optimized)
+    record_page_bytes(len(page_html.encode("utf-8")), len(optimized.encode("utf-8")))
+    return optimized
+
+
+def optimize_stylesheet(css: str) -> str:
+    """Minifiziert ein gemeinsames Stylesheet (ohne Bereinigung, es gilt für alle Seiten)."""
+    return minify_css(css) if PAGE_OPTIMIZE else css
+
+
+def compressed_variants(content: bytes) -> dict[str, bytes]:
+    """{".gz": ..., ".br": ...}; .br nur, wenn brotli installiert ist."""
+    variants = {".gz": gzip.compress(content, compresslevel=9, mtime=0)}
+    if importlib.util.find_spec("brotli") is not None:
+        import brotli
+        variants[".br"] = brotli.compress(content, quality=11)
+    return variants
+
+
+def write_precompressed(path: str, content: bytes) -> None:
+    """Schreibt .gz/.br-Varianten neben `path`, sofern sich die Dateiart dafür eignet."""
+    if not path.endswith(PRECOMPRESS_EXTENSIONS):
+        return
+    for extension, compressed in compressed_variants(content).items():
+        temp_path = f"{path}{extension}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(compressed)
+        os.replace(temp_path, f"{path}{extension}")
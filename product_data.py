@@ -0,0 +1,171 @@
+"""
+Daten-Schicht für die deutschen Bibliotheken (Pflegehinweise, Größentabellen, Standardtexte, Beispielwerte), die
+unterstützten Sprachen sowie geschützte Begriffe und Glossar (siehe protected_terms).
+
+Die Daten liegen versioniert in data/product_data.json. Sie werden einmal pro Prozess geladen, geprüft und mit
+Nachschlage-Indizes (Pflegetext -> Symbol, Produkttyp -> Größentabelle, Sprache -> Codes) versehen; alle
+Streamlit-Sessions und der Batch-Lauf teilen sich dieses Objekt (wie st.cache_resource, aber auch außerhalb von
+Streamlit nutzbar). Ändert sich die Datei, wird sie beim nächsten Zugriff neu geladen (höchstens alle
+PRODUCT_DATA_RELOAD_SECONDS geprüft). Eine fehlerhafte neue Datei wird verworfen und die bisherigen Daten
+bleiben aktiv.
+
+Prüfen der Datei von Hand:
+    python product_data.py [Pfad]
+"""
+import json
+import os
+import sys
+import threading
+import time
+
+from protected_terms import ProtectedTerms, validate_protected_terms
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PRODUCT_DATA_PATH = os.getenv("PRODUCT_DATA_PATH", os.path.join(BASE_DIR, "data", "product_data.json"))
+PRODUCT_DATA_FORMAT_VERSION = 1
+PRODUCT_DATA_RELOAD_SECONDS = float(os.getenv("PRODUCT_DATA_RELOAD_SECONDS", "2"))
+ICON_DIR = os.path.join(BASE_DIR, "Waschlabellen")
+
+_REQUIRED_SECTIONS = ("care_instructions", "size_charts", "default_texts", "product_defaults", "languages")
+
+
+def validate_product_data(raw: dict) -> list[str]:
+    """Prüft Aufbau und Verweise der Datendatei; gibt eine Liste von Fehlermeldungen zurück (leer = gültig)."""
+    if not isinstance(raw, dict):
+        return ["Die Datei muss ein JSON-Objekt enthalten."]
+    if raw.get("format_version") != PRODUCT_DATA_FORMAT_VERSION:
+        return [f"format_version {raw.get('format_version')!r} wird nicht unterstützt "
+                f"(erwartet: {PRODUCT_DATA_FORMAT_VERSION})."]
+    problems = [f"Abschnitt '{section}' fehlt." for section in _REQUIRED_SECTIONS if section not in raw]
+    if problems:
+        return problems
+
+    care_texts = set()
+    for index, item in enumerate(raw["care_instructions"]):
+        if not item.get("text") or not item.get("icon_filename"):
+            problems.append(f"care_instructions[{index}]: 'text' und 'icon_filename' sind Pflicht.")
+            continue
+        if item["text"] in care_texts:
+            problems.append(f"care_instructions[{index}]: Pflegetext '{item['text']}' ist doppelt.")
+        care_texts.add(item["text"])
+        if not os.path.exists(os.path.join(ICON_DIR, item["icon_filename"])):
+            problems.append(f"care_instructions[{index}]: Symbol '{item['icon_filename']}' fehlt in Waschlabellen/.")
+
+    for product_type, chart in raw["size_charts"].items():
+        if product_type == "Keine":
+            problems.append("size_charts: 'Keine' ist als Produkttyp reserviert.")
+        if chart.get("type") == "simple":
+            if not chart.get("title") or not chart.get("headers") or not isinstance(chart.get("groups"), list):
+                problems.append(f"size_charts.{product_type}: 'title', 'headers' und 'groups' sind Pflicht.")
+        elif chart.get("type") == "complex":
+            if not chart.get("title") or not isinstance(chart.get("tables"), list) or \
+                    any(not table.get("subtitle") for table in chart["tables"]):
+                problems.append(f"size_charts.{product_type}: 'title' und 'tables' mit 'subtitle' sind Pflicht.")
+        else:
+            problems.append(f"size_charts.{product_type}: unbekannter Typ {chart.get('type')!r}.")
+
+    for section in ("default_texts", "product_defaults"):
+        problems += [f"{section}.{key}: Wert muss ein Text sein." for key, value in raw[section].items()
+                     if not isinstance(value, str)]
+
+    language_names = set()
+    if not isinstance(raw["languages"], list) or not raw["languages"]:
+        problems.append("languages: Liste mit mindestens einer Sprache erwartet.")
+    for index, language in enumerate(raw["languages"] if isinstance(raw["languages"], list) else []):
+        missing = [field for field in ("name", "label", "deepl", "html") if not language.get(field)]
+        if missing:
+            problems.append(f"languages[{index}]: {', '.join(missing)} fehlt.")
+        elif language["name"] in language_names:
+            problems.append(f"languages[{index}]: Sprache '{language['name']}' ist doppelt.")
+        language_names.add(language.get("name"))
+    return problems + validate_protected_terms(raw, language_names)
+
+
+class ProductCatalog:
+    """Geprüfte, unveränderliche Sicht auf eine Version der Datendatei samt Indizes."""
+
+    def __init__(self, raw: dict, mtime: float = 0.0):
+        self.version = raw.get("version", "")
+        self.mtime = mtime
+        self.care_instructions = raw["care_instructions"]
+        self.size_charts = raw["size_charts"]
+        self.default_texts = raw["default_texts"]
+        self.product_defaults = raw["product_defaults"]
+        self.languages = raw["languages"]
+        self.protected_terms = ProtectedTerms(raw.get("protected_terms", []), raw.get("glossary", {}))
+
+        self.icon_by_care_text = {item["text"]: item["icon_filename"] for item in self.care_instructions}
+        self.care_texts = [item["text"] for item in self.care_instructions]
+        self.product_types = list(self.size_charts)
+        self.language_by_name = {language["name"]: language for language in self.languages}
+        self.language_options = [language["label"] for language in self.languages
+                                 if language.get("selectable", True)]
+        self._language_by_label = {language["label"]: language for language in self.languages}
+
+    def size_chart(self, product_type: str) -> dict | None:
+        return self.size_charts.get(product_type)
+
+    def deepl_code(self, language_name: str) -> str | None:
+        language = self.language_by_name.get(language_name)
+        return language["deepl"] if language else None
+
+    def html_lang_code(self, language_name: str) -> str:
+        language = self.language_by_name.get(language_name)
+        return language["html"] if language else language_name[:2].lower()
+
+    def language_name(self, label: str) -> str:
+        """'(GB) Englisch' -> 'Englisch'."""
+        language = self._language_by_label.get(label)
+        return language["name"] if language else (label.split(" ", 1)[-1] if label else "")
+
+
+def load_product_catalog(path: str | None = None) -> ProductCatalog:
+    """Lädt und prüft die Datendatei; wirft ValueError mit allen Fehlern, wenn sie ungültig ist."""
+    path = path or PRODUCT_DATA_PATH
+    mtime = os.path.getmtime(path)
+    with open(path, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+    problems = validate_product_data(raw)
+    if problems:
+        raise ValueError(f"{path} ist ungültig: " + " ".join(problems))
+    return ProductCatalog(raw, mtime)
+
+
+_catalog = None
+_catalog_checked_at = 0.0
+_catalog_lock = threading.Lock()
+
+
+def get_product_catalog() -> ProductCatalog:
+    """Gibt die prozessweit geteilten Produktdaten zurück und lädt sie bei Dateiänderung neu."""
+    global _catalog, _catalog_checked_at
+    with _catalog_lock:
+        now = time.monotonic()
+        if _catalog is not None and now - _catalog_checked_at < PRODUCT_DATA_RELOAD_SECONDS:
+            return _catalog
+        _catalog_checked_at = now
+        if _catalog is None:
+            _catalog = load_product_catalog()
+            return _catalog
+        try:
+            if os.path.getmtime(PRODUCT_DATA_PATH) != _catalog.mtime:
+                _catalog = load_product_catalog()
+                print(f"DEBUG: Produktdaten neu geladen (Version {_catalog.version})")
+        except (OSError, ValueError) as e:
+            print(f"DEBUG: Produktdaten nicht neu geladen, bisherige Version bleibt aktiv: {e}")
+        return _catalog
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else PRODUCT_DATA_PATH
+    try:
+        product_catalog = load_product_catalog(path)
+    except (OSError, ValueError) as e:
+        print(f"FEHLER: {e}")
+        sys.exit(1)
+    print(f"{path}: Version {product_catalog.version}, {len(product_catalog.care_instructions)} Pflegehinweise, "
+          f"{len(product_catalog.product_types)} Produkttypen, {len(product_catalog.languages)} Sprachen")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""
+Geschützte Begriffe (Marke, Produktlinien, Zertifikate, Modellnamen) und feste Übersetzungen (Glossar).
+
+Beides steht in data/product_data.json: "protected_terms" ist eine Liste von Begriffen, die in jeder Sprache
+unverändert bleiben, "glossary" enthält je Zielsprache feste Übersetzungen {deutscher Begriff: Übersetzung}.
+Pro Version der Produktdaten wird ein ProtectedTerms-Objekt mit einem einzigen vorkompilierten Muster für alle
+Begriffe gebaut (längere Begriffe zuerst, damit "OEKO-TEX® STANDARD 100" vor "OEKO-TEX®" greift).
+
+- DeepL: Pro Sprachpaar ein Glossar auf dem Server (geschützte Begriffe auf sich selbst plus feste
+  Übersetzungen). Es wird einmal angelegt und seine ID in .cache/deepl_glossaries.json gemerkt; ändern sich
+  Begriffe oder Glossar, entsteht ein neues und das alte wird gelöscht. Texte, in denen ein geschützter Begriff
+  trotzdem verloren geht, und Sprachpaare ohne Glossar-Unterstützung laufen über <keep>-Tags.
+- Gemini: Geschützte Begriffe werden vor dem Request durch Platzhalter ⟦0⟧, ⟦1⟧, ... ersetzt und danach
+  zurückgesetzt; fehlt ein Platzhalter in der Antwort, gilt sie als ungültig. Feste Übersetzungen stehen als
+  Vorgabe im Prompt.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+GLOSSARY_CACHE_PATH = os.getenv("DEEPL_GLOSSARY_CACHE_PATH", os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), ".cache", "deepl_glossaries.json"))
+# Nach einem Fehler beim Anlegen (oder ohne Unterstützung des Sprachpaars) erst nach dieser Zeit erneut versuchen
+GLOSSARY_RETRY_SECONDS = 300
+
+_PLACEHOLDER = re.compile(r"⟦(\d+)⟧")
+_KEEP_TAG = re.compile(r"</?keep>")
+
+
+class ProtectedTerms:
+    def __init__(self, terms: list[str], glossary: dict[str, dict[str, str]] | None = None):
+        self.terms = sorted(dict.fromkeys(term.strip() for term in terms if term.strip()), key=len, reverse=True)
+        self.glossary = glossary or {}
+        self.version = hashlib.sha256(json.dumps([self.terms, self.glossary], sort_keys=True,
+                                                 ensure_ascii=False).encode("utf-8")).hexdigest()[:12]
+        self.matcher = re.compile(r"(?<!\w)(?:" + "|".join(re.escape(term) for term in self.terms) + r")(?!\w)",
+                                  re.IGNORECASE) if self.terms else None
+
+    def find(self, text: str) -> list[str]:
+        """Alle Vorkommen geschützter Begriffe in `text`, so geschrieben wie im Text."""
+        return self.matcher.findall(text) if self.matcher and text else []
+
+    def strip_terms(self, text: str) -> str:
+        return self.matcher.sub("", text) if self.matcher else text
+
+    def preserved(self, source_text: str, translated_text: str) -> bool:
+        """True, wenn jeder geschützte Begriff des Quelltexts auch in der Übersetzung steht."""
+        translated_lower = translated_text.lower()
+        return all(term.lower() in translated_lower for term in self.find(source_text))
+
+    def keep_tags(self, text: str) -> str:
+        """Umschließt geschützte Begriffe mit <keep>-Tags (für DeepL mit ignore_tags)."""
+        return self.matcher.sub(r"<keep>\g<0></keep>", text) if self.matcher else text
+
+    @staticmethod
+    def strip_keep_tags(text: str) -> str:
+        return _KEEP_TAG.sub("", text).strip()
+
+    def mask(self, text: str) -> tuple[str, list[str]]:
+        """Ersetzt geschützte Begriffe durch ⟦0⟧, ⟦1⟧, ...; gibt Text und ersetzte Begriffe zurück."""
+        originals = []
+
+        def placeholder(match):
+            originals.append(match.group(0))
+            return f"⟦{len(originals) - 1}⟧"
+
+        return (self.matcher.sub(placeholder, text) if self.matcher else text), originals
+
+    @staticmethod
+    def unmask(text: str, originals: list[str]) -> str | None:
+        """Setzt die Begriffe wieder ein; None, wenn ein Platzhalter fehlt oder unbekannt ist."""
+        found = [int(number) for number in _PLACEHOLDER.findall(text)]
+        if sorted(set(found)) != list(range(len(originals))):
+            return None
+        return _PLACEHOLDER.sub(lambda match: originals[int(match.group(1))], text)
+
+    def glossary_entries(self, target_language: str) -> dict[str, str]:
+        """Einträge des DeepL-Glossars für eine Zielsprache (Sprachname wie in den Produktdaten)."""
+        return {**{term: term for term in self.terms}, **self.glossary.get(target_language, {})}
+
+    def glossary_hint(self, texts, target_language: str) -> str:
+        """Vorgabe fester Übersetzungen für den Gemini-Prompt, nur für Begriffe, die in `texts` vorkommen."""
+        entries = self.glossary.get(target_language, {})
+        joined = "\n".join(texts).lower()
+        used = {source: target for source, target in entries.items() if source.lower() in joined}
+        if not used:
+            return ""
+        return (f"Verwende für {target_language} diese festen Übersetzungen: "
+                + "; ".join(f"{source} = {target}" for source, target in used.items()) + ". ")
+
+
+def validate_protected_terms(raw: dict, language_names: set[str]) -> list[str]:
+    """Prüft die optionalen Abschnitte protected_terms und glossary der Datendatei."""
+    problems = []
+    terms = raw.get("protected_terms", [])
+    if not isinstance(terms, list) or any(not isinstance(term, str) or not term.strip() for term in terms):
+        problems.append("protected_terms: Liste nicht-leerer Texte erwartet.")
+    glossary = raw.get("glossary", {})
+    if not isinstance(glossary, dict):
+        return problems + ["glossary: Objekt {Sprache: {Begriff: Übersetzung}} erwartet."]
+    for language, entries in glossary.items():
+        if language not in language_names:
+            problems.append(f"glossary.{language}: unbekannte Sprache.")
+        if not isinstance(entries, dict) or any(not isinstance(source, str) or not isinstance(target, str) or
+                                                not source.strip() or not target.strip()
+                                                for source, target in entries.items()):
+            problems.append(f"glossary.{language}: {{Begriff: Übersetzung}} mit nicht-leeren Texten erwartet.")
+    return problems
+
+
+# --- DeepL-Glossare ---
+# _glossary_lock schützt nur die Merklisten; die API-Aufrufe laufen unter der Sperre des jeweiligen Sprachpaars,
+# damit das Anlegen eines Glossars keine Übersetzungen für andere Sprachpaare aufhält
+_glossary_ids = None
+_glossary_failed_at = {}
+_glossary_pairs = None
+_glossary_pair_locks = {}
+_glossary_lock = threading.Lock()
+
+
+def _base_code(code: str) -> str:
+    return code.split("-")[0].upper()
+
+
+def _load_glossary_ids() -> dict[str, str]:
+    try:
+        with open(GLOSSARY_CACHE_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_glossary_ids(ids: dict[str, str]) -> None:
+    try:
+        if os.path.dirname(GLOSSARY_CACHE_PATH):
+            os.makedirs(os.path.dirname(GLOSSARY_CACHE_PATH), exist_ok=True)
+        temp_path = f"{GLOSSARY_CACHE_PATH}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(ids, f, indent=2, sort_keys=True)
+        os.replace(temp_path, GLOSSARY_CACHE_PATH)
+    except OSError as e:
+        print(f"DEBUG: Glossar-IDs konnten nicht gespeichert werden: {e}")
+
+
+def _known_glossary(cache_key: str, pair: str) -> tuple[bool, str | None]:
+    """(True, ID oder None), wenn für das Sprachpaar nichts anzulegen ist; sonst (False, None)."""
+    global _glossary_ids
+    with _glossary_lock:
+        if _glossary_ids is None:
+            _glossary_ids = _load_glossary_ids()
+        if cache_key in _glossary_ids:
+            return True, _glossary_ids[cache_key]
+        if time.monotonic() - _glossary_failed_at.get(pair, -GLOSSARY_RETRY_SECONDS) < GLOSSARY_RETRY_SECONDS:
+            return True, None
+        return False, None
+
+
+def get_deepl_glossary(translator, terms: ProtectedTerms, source_code: str, target_code: str,
+                       target_language: str, call=lambda func: func()) -> str | None:
+    """
+    Gibt die ID des Glossars für das Sprachpaar zurück und legt es beim ersten Bedarf an. None, wenn das
+    Sprachpaar keine Glossare unterstützt, es nichts zu schützen gibt oder das Anlegen fehlgeschlagen ist.
+    `call` führt die API-Aufrufe aus (z.B. über http_client.call_provider).
+    """
+    global _glossary_pairs
+    entries = terms.glossary_entries(target_language)
+    if not translator or not entries:
+        return None
+    source, target = _base_code(source_code), _base_code(target_code)
+    pair = f"{source}>{target}"
+    cache_key = f"{pair}:{terms.version}"
+    known, glossary_id = _known_glossary(cache_key, pair)
+    if known:
+        return glossary_id
+    with _glossary_lock:
+        pair_lock = _glossary_pair_locks.setdefault(pair, threading.Lock())
+    with pair_lock:
+        # Wer auf das Sprachpaar gewartet hat, bekommt das Ergebnis des Vorgängers
+        known, glossary_id = _known_glossary(cache_key, pair)
+        if known:
+            return glossary_id
+        try:
+            supported_pairs = _glossary_pairs
+            if supported_pairs is None:
+                supported_pairs = {(_base_code(p.source_lang), _base_code(p.target_lang))
+                                   for p in call(translator.get_glossary_languages)}
+                _glossary_pairs = supported_pairs
+            if (source, target) not in supported_pairs:
+                with _glossary_lock:
+                    _glossary_failed_at[pair] = time.monotonic()
+                return None
+            glossary = call(lambda: translator.create_glossary(f"produktblatt {pair} {terms.version}", source,
+                                                               target, entries))
+        except Exception as e:
+            print(f"DEBUG: DeepL-Glossar {pair} konnte nicht angelegt werden, <keep>-Tags stattdessen: {e}")
+            with _glossary_lock:
+                _glossary_failed_at[pair] = time.monotonic()
+            return None
+        print(f"DEBUG: DeepL-Glossar {pair} angelegt ({len(entries)} Einträge): {glossary.glossary_id}")
+        with _glossary_lock:
+            # Glossare älterer Begriffslisten für dasselbe Sprachpaar werden nicht mehr gebraucht
+            old_ids = [_glossary_ids.pop(key) for key in [key for key in _glossary_ids if key.startswith(f"{pair}:")]]
+            _glossary_ids[cache_key] = glossary.glossary_id
+            _save_glossary_ids(_glossary_ids)
+        for old_id in old_ids:
+            try:
+                call(lambda: translator.delete_glossary(old_id))
+            except Exception as e:
+                print(f"DEBUG: Altes DeepL-Glossar {old_id} nicht gelöscht: {e}")
+        return glossary.glossary_id
+
+
+def forget_deepl_glossary(glossary_id: str) -> None:
+    """Vergisst eine Glossar-ID, die DeepL nicht mehr kennt; beim nächsten Bedarf wird neu angelegt."""
+    with _glossary_lock:
+        if _glossary_ids:
+            for key in [key for key, value in _glossary_ids.items() if value == glossary_id]:
+                del _glossary_ids[key]
+            _save_glossary_ids(_glossary_ids)
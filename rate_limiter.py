@@ -0,0 +1,170 @@
+"""
+Adaptiver Token-Bucket pro Übersetzungsanbieter, den alle Streamlit-Sessions und Worker-Prozesse teilen.
+
+Der Zustand (Tokens, aktuelle Rate, Sperre nach Drosselung) liegt in einer SQLite-Datei und wird in einer
+`BEGIN IMMEDIATE`-Transaktion gelesen und geschrieben, damit mehrere Prozesse sich abstimmen. Die Rate steigt
+nach jedem erfolgreichen Aufruf leicht an und halbiert sich bei 429/503 (AIMD). Gedrosselte Aufrufe werden mit
+zufällig gestreutem exponentiellem Backoff (bzw. Retry-After) wiederholt. Wer innerhalb des Prozesses das nächste
+Token bekommt, entscheidet die faire Warteschlange pro Anbieter (fair_scheduler).
+"""
+import os
+import random
+import sqlite3
+import threading
+import time
+
+import deepl
+import requests
+
+from fair_scheduler import get_fair_scheduler
+
+RATE_LIMIT_DB_PATH = os.getenv("RATE_LIMIT_DB_PATH",
+                               os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "rate_limits.sqlite3"))
+
+# Requests pro Sekunde: Startwert, Unter- und Obergrenze sowie maximale Burst-Größe
+PROVIDER_LIMITS = {
+    "deepl": {"initial_rate": 5.0, "min_rate": 0.5, "max_rate": 20.0, "burst": 10},
+    "gemini": {"initial_rate": 2.0, "min_rate": 0.2, "max_rate": 10.0, "burst": 4},
+}
+THROTTLE_STATUS_CODES = (429, 503)
+MAX_ATTEMPTS = 5
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 30.0
+
+
+class AdaptiveRateLimiter:
+    def __init__(self, name: str, initial_rate: float, min_rate: float, max_rate: float, burst: int,
+                 db_path: str = RATE_LIMIT_DB_PATH):
+        self.name = name
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self._lock = threading.Lock()
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS buckets (
+                name TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                rate REAL NOT NULL,
+                updated REAL NOT NULL,
+                blocked_until REAL NOT NULL
+            )""")
+        self._conn.execute("INSERT OR IGNORE INTO buckets (name, tokens, rate, updated, blocked_until) "
+                           "VALUES (?, ?, ?, ?, 0)", (name, float(burst), initial_rate, time.time()))
+
+    def _update(self, change) -> float:
+        """Führt `change(state, now)` atomar über alle Prozesse aus und gibt dessen Rückgabewert zurück."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                tokens, rate, updated, blocked_until = self._conn.execute(
+                    "SELECT tokens, rate, updated, blocked_until FROM buckets WHERE name = ?",
+                    (self.name,)).fetchone()
+                now = time.time()
+                state = {"tokens": min(self.burst, tokens + max(0.0, now - updated) * rate), "rate": rate,
+                         "blocked_until": blocked_until}
+                result = change(state, now)
+                self._conn.execute("UPDATE buckets SET tokens = ?, rate = ?, updated = ?, blocked_until = ? "
+                                   "WHERE name = ?", (state["tokens"], state["rate"], now, state["blocked_until"],
+                                                      self.name))
+                self._conn.execute("COMMIT")
+                return result
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def acquire(self) -> None:
+        """Blockiert, bis ein Token frei ist und keine Drosselungssperre mehr besteht."""
+        def take(state, now):
+            if now < state["blocked_until"]:
+                return state["blocked_until"] - now
+            if state["tokens"] >= 1:
+                state["tokens"] -= 1
+                return 0.0
+            return (1 - state["tokens"]) / state["rate"]
+
+        while True:
+            wait_seconds = self._update(take)
+            if wait_seconds <= 0:
+                return
+            # Etwas Streuung, damit wartende Sessions nicht gleichzeitig wieder anfragen
+            time.sleep(wait_seconds * random.uniform(1.0, 1.2))
+
+    def on_success(self) -> None:
+        def increase(state, now):
+            state["rate"] = min(self.max_rate, state["rate"] + self.max_rate * 0.02)
+        self._update(increase)
+
+    def on_throttle(self, delay: float) -> None:
+        def decrease(state, now):
+            state["rate"] = max(self.min_rate, state["rate"] * 0.5)
+            state["tokens"] = min(state["tokens"], 0.0)
+            state["blocked_until"] = max(state["blocked_until"], now + delay)
+        self._update(decrease)
+
+    def current_rate(self) -> float:
+        return self._update(lambda state, now: state["rate"])
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider: str) -> AdaptiveRateLimiter:
+    with _limiters_lock:
+        if provider not in _limiters:
+            _limiters[provider] = AdaptiveRateLimiter(provider, **PROVIDER_LIMITS[provider])
+        return _limiters[provider]
+
+
+def is_throttling_error(exc: Exception) -> bool:
+    if isinstance(exc, deepl.TooManyRequestsException):
+        return True
+    if isinstance(exc, deepl.DeepLException):
+        return getattr(exc, "http_status_code", None) in THROTTLE_STATUS_CODES
+    if isinstance(exc, requests.exceptions.HTTPError) and exc.response is not None:
+        return exc.response.status_code in THROTTLE_STATUS_CODES
+    return False
+
+
+def retry_after_seconds(exc: Exception) -> float | None:
+    response = getattr(exc, "response", None)
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    try:
+        return float(retry_after) if retry_after else None
+    except ValueError:
+        return None
+
+
+def backoff_delay(attempt: int) -> float:
+    """Exponentieller Backoff mit "Full Jitter"."""
+    return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+
+def call_with_rate_limit(provider: str, func, max_attempts: int = MAX_ATTEMPTS, cost: float = 1.0):
+    """
+    Ruft `func()` erst auf, wenn der gemeinsame Token-Bucket des Anbieters es erlaubt. Warten mehrere Aufrufe,
+    kommt der nächste nach Priorität und fairem Anteil des Benutzers an die Reihe; `cost` (gesendete Zeichen)
+    bestimmt, wie weit der Benutzer damit in der Warteschlange nach hinten rückt.
+    Bei 429/503 wird die Rate gesenkt und bis zu `max_attempts`-mal wiederholt; andere Fehler werden
+    unverändert weitergereicht.
+    """
+    limiter = get_rate_limiter(provider)
+    scheduler = get_fair_scheduler(provider)
+    for attempt in range(max_attempts):
+        with scheduler.turn(cost):
+            limiter.acquire()
+        try:
+            result = func()
+        except Exception as e:
+            if not is_throttling_error(e) or attempt == max_attempts - 1:
+                raise
+            delay = retry_after_seconds(e) or backoff_delay(attempt)
+            print(f"DEBUG: {provider} drosselt ({e}); neuer Versuch in {delay:.1f}s")
+            limiter.on_throttle(delay)
+            continue
+        limiter.on_success()
+        return result
@@ -0,0 +1,140 @@
+"""
+Bundle-Ausgabe für Produktblätter: statt jedes Bild, Symbol und das komplette CSS in jede Sprachdatei
+einzubetten, landen sie einmal als Dateien unter assets/ (Dateiname = Inhalts-Hash) und alle Sprachseiten
+verweisen darauf. Ein Bundle wird entweder direkt in ein Verzeichnis geschrieben oder als ZIP gepackt.
+Das gemeinsame Stylesheet wird minifiziert (page_optimizer); mit `precompress` entstehen beim Schreiben in ein
+Verzeichnis zusätzlich .gz/.br-Varianten der Seiten, des Stylesheets und der SVG-Dateien.
+"""
+import base64
+import hashlib
+import io
+import mimetypes
+import os
+import threading
+import zipfile
+
+from page_optimizer import optimize_stylesheet, write_precompressed
+from template_engine import render_template
+
+ASSET_DIR = "assets"
+STYLESHEET_TEMPLATE = "produkt_vorlage_v2.css"
+
+_EXTENSIONS = {"image/svg+xml": ".svg", "image/webp": ".webp", "image/jpeg": ".jpg", "image/png": ".png",
+               "text/css": ".css", "font/woff2": ".woff2", "font/woff": ".woff"}
+
+
+def decode_data_url(data_url: str) -> tuple[bytes, str] | None:
+    """Zerlegt eine Base64-Daten-URL in (Inhalt, MIME-Typ); None für normale URLs."""
+    if not data_url or not data_url.startswith("data:") or ";base64," not in data_url:
+        return None
+    header, payload = data_url[5:].split(";base64,", 1)
+    return base64.b64decode(payload), header or "application/octet-stream"
+
+
+class SheetBundle:
+    """
+    Sammelt Seiten und Assets eines Exports (thread-sicher, für generate_sheets).
+
+    Mit `out_dir` wird jede Datei sofort geschrieben; bereits vorhandene Assets werden übersprungen, da der
+    Dateiname den Inhalt festlegt. Ohne `out_dir` bleiben die Dateien im Speicher und können mit to_zip()
+    gepackt werden.
+
+    Nur ohne `out_dir` merkt sich das Bundle die Daten-URLs selbst, weil inline_assets() sie wieder einsetzt. Beim
+    Schreiben in ein Verzeichnis (batch_generate --bundle über den ganzen Katalog) steht dort nur ein Digest der
+    URL, damit der Speicherbedarf nicht mit der Zahl der Bilder wächst.
+    """
+
+    def __init__(self, out_dir: str | None = None, precompress: bool = False):
+        self.out_dir = out_dir
+        self.precompress = precompress
+        self.files = {}
+        self._asset_paths = {}
+        self._written_assets = set()
+        self._lock = threading.Lock()
+        self._stylesheet_path = None
+        self._stylesheet_css = None
+
+    def _write(self, relative_path: str, content: bytes, skip_existing: bool = False) -> None:
+        if self.out_dir is None:
+            self.files[relative_path] = content
+            return
+        path = os.path.join(self.out_dir, relative_path)
+        if skip_existing and os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(content)
+        os.replace(temp_path, path)
+        if self.precompress:
+            write_precompressed(path, content)
+
+    def add_asset(self, content: bytes, mime_type: str) -> str:
+        """Legt eine Datei unter assets/<hash><endung> ab und gibt den relativen Pfad zurück."""
+        extension = _EXTENSIONS.get(mime_type) or mimetypes.guess_extension(mime_type) or ".bin"
+        relative_path = f"{ASSET_DIR}/{hashlib.sha256(content).hexdigest()[:16]}{extension}"
+        with self._lock:
+            if relative_path not in self._written_assets:
+                self._write(relative_path, content, skip_existing=True)
+                self._written_assets.add(relative_path)
+            return relative_path
+
+    def externalize(self, url: str | None) -> str | None:
+        """Ersetzt eine Daten-URL durch den Pfad einer Asset-Datei; andere URLs bleiben unverändert."""
+        if not url:
+            return url
+        if not url.startswith("data:"):
+            return url
+        # Dieselben Daten-URL-Objekte kommen für jede Sprache wieder, der Hash des Strings ist gecacht
+        memo_key = url if self.out_dir is None else hashlib.sha256(url.encode("utf-8")).digest()
+        with self._lock:
+            if memo_key in self._asset_paths:
+                return self._asset_paths[memo_key]
+        decoded = decode_data_url(url)
+        if decoded is None:
+            return url
+        relative_path = self.add_asset(*decoded)
+        with self._lock:
+            self._asset_paths[memo_key] = relative_path
+        return relative_path
+
+    def stylesheet_url(self) -> str:
+        """Schreibt das gemeinsame Stylesheet beim ersten Aufruf und gibt seinen Pfad zurück."""
+        with self._lock:
+            stylesheet_path = self._stylesheet_path
+        if stylesheet_path is None:
+            css = optimize_stylesheet(render_template(STYLESHEET_TEMPLATE, {}))
+            stylesheet_path = self.add_asset(css.encode("utf-8"), "text/css")
+            with self._lock:
+                self._stylesheet_path = stylesheet_path
+                self._stylesheet_css = css
+        return stylesheet_path
+
+    def add_page(self, filename: str, html: str) -> None:
+        if self.out_dir is None:
+            with self._lock:
+                self.files[filename] = html.encode("utf-8")
+        else:
+            self._write(filename, html.encode("utf-8"))
+
+    def inline_assets(self, html: str) -> str:
+        """Bettet die Assets einer Bundle-Seite wieder ein, z.B. für die Vorschau in Streamlit (nur ohne `out_dir`)."""
+        with self._lock:
+            asset_paths = dict(self._asset_paths)
+            stylesheet_path = self._stylesheet_path
+            css = self._stylesheet_css
+        for url, relative_path in asset_paths.items():
+            html = html.replace(f'"{relative_path}"', f'"{url}"')
+        if stylesheet_path:
+            html = html.replace(f'<link rel="stylesheet" href="{stylesheet_path}">', f"<style>{css}</style>")
+        return html
+
+    def total_size(self) -> int:
+        return sum(len(content) for content in self.files.values())
+
+    def to_zip(self) -> bytes:
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for filename, content in sorted(self.files.items()):
+                archive.writestr(filename, content)
+        return buffer.getvalue()
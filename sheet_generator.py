@@ -0,0 +1,191 @@
+"""
+Erzeugt Produktblätter unabhängig von der Streamlit-Oberfläche: Texte einsammeln, übersetzen (feste Texte
+über die Sprachkataloge), Pflegesymbole laden, die HTML-Vorlage rendern und die Schriften einbetten. Mehrere
+Zielsprachen werden parallel in einem begrenzten Thread-Pool erzeugt. Zum Schluss wird jede Seite minifiziert
+(page_optimizer).
+"""
+import base64
+import contextvars
+import io
+import os
+import zipfile
+from concurrent.futures import CancelledError, ThreadPoolExecutor, as_completed
+
+import jinja2
+
+from care_icons import CARE_ICON_MODE, build_care_items
+from catalogs import translate_with_catalog
+from generation_metrics import measure_stage, use_metrics
+from page_optimizer import optimize_page
+from product_data import get_product_catalog
+from sheet_texts import OEKO_TEX_KEYS, collect_sheet_texts, build_translated_context
+from template_engine import render_template
+from web_fonts import embed_fonts
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+TEMPLATE_FILENAME = "produkt_vorlage_v2.html"
+SOURCE_LANGUAGE = "Deutsch"
+MAX_PARALLEL_LANGUAGES = int(os.getenv("MAX_PARALLEL_LANGUAGES", "8"))
+
+# Felder des Eingabeformulars, die übersetzt werden
+USER_TEXT_FIELDS = ("product_name", "product_description_long", "warning_text", "color_name",
+                    "washing_instructions_before_first_use", "disclaimer_text", "package_size_weight_value")
+
+def get_html_lang_code(language_name: str) -> str:
+    return get_product_catalog().html_lang_code(language_name)
+
+
+def sheet_filename(article_number: str, language_name: str) -> str:
+    return f"{article_number}_{get_html_lang_code(language_name)}.html"
+
+
+def load_svg_data_url(filepath: str) -> str:
+    try:
+        with open(os.path.join(BASE_DIR, filepath), "rb") as f:
+            return f"data:image/svg+xml;base64,{base64.b64encode(f.read()).decode('utf-8')}"
+    except FileNotFoundError:
+        print(f"DEBUG: Lokale SVG-Datei nicht gefunden: {filepath}")
+        return ""
+
+
+def create_html_from_template(template_filename, context):
+    try:
+        return render_template(template_filename, context)
+    except jinja2.TemplateNotFound:
+        print(f"Fehler: Vorlage '{template_filename}' nicht im Verzeichnis '{BASE_DIR}' gefunden.")
+        return f"<p>Fehler: Vorlage '{template_filename}' nicht gefunden.</p>"
+    except Exception as e:
+        print(f"Fehler beim Rendern der Vorlage: {e}")
+        return f"<p>Fehler beim Rendern der Vorlage: {e}</p>"
+
+
+def split_features(features_text: str) -> list[str]:
+    return [f.strip() for f in features_text.split("\n") if f.strip()]
+
+
+def translate_sheet(product_form: dict, target_language: str, translate_batch,
+                    icon_mode: str = CARE_ICON_MODE) -> tuple[dict, dict[str, str]]:
+    """
+    Übersetzt alle Texte eines Produktblatts.
+
+    `product_form` enthält die Formularwerte (siehe USER_TEXT_FIELDS sowie "features", "has_oeko_tex",
+    "care_instructions" und "product_type"); optional "omit_default_texts" mit Schlüsseln fester Texte, die auf
+    dem Blatt fehlen sollen. `translate_batch(texts, source_language, target_language)` gibt
+    (Übersetzungen, Fehler) je Schlüssel zurück. `icon_mode` ist "data_url" oder "sprite" (siehe care_icons).
+    Ergebnis: (Template-Kontext ohne Bilder, Fehler je Feld).
+    """
+    user_texts = {key: product_form.get(key, "") for key in USER_TEXT_FIELDS}
+    features = split_features(product_form.get("features", ""))
+    product_catalog = get_product_catalog()
+    default_texts = {key: value for key, value in product_catalog.default_texts.items()
+                     if key not in product_form.get("omit_default_texts", ())}
+    has_oeko_tex = product_form.get("has_oeko_tex", True)
+    if not has_oeko_tex:
+        for key in OEKO_TEX_KEYS:
+            default_texts.pop(key, None)
+    product_type = product_form.get("product_type", "Keine")
+    chart_data = product_catalog.size_chart(product_type) if product_type != "Keine" else None
+    care_texts = product_form.get("care_instructions", [])
+
+    sheet_texts = collect_sheet_texts(user_texts, features, default_texts, care_texts, chart_data)
+    errors = {}
+    if target_language == SOURCE_LANGUAGE:
+        translations = dict(sheet_texts)
+    else:
+        with measure_stage("translation"):
+            translations, errors = translate_with_catalog(
+                sheet_texts, target_language,
+                lambda texts: translate_batch(texts, SOURCE_LANGUAGE, target_language))
+
+    with measure_stage("context"):
+        translated_context, translated_care_texts = build_translated_context(
+            translations, user_texts, features, default_texts, care_texts, chart_data, has_oeko_tex)
+
+    with measure_stage("care_items"):
+        translated_context["care_instructions"], translated_context["icon_sprite"] = build_care_items(
+            care_texts, translated_care_texts, icon_mode)
+    return translated_context, errors
+
+
+def generate_sheet(product_form: dict, target_language: str, translate_batch,
+                   assets: dict, icon_mode: str = CARE_ICON_MODE, bundle=None,
+                   metrics=None) -> tuple[str, dict[str, str]]:
+    """
+    Übersetzt und rendert ein Produktblatt für eine Zielsprache.
+    `assets` enthält die Bild-URLs der Vorlage (image_main_url, image_detail1_url, image_detail2_url,
+    suprima_logo_url). Mit einem `bundle` (sheet_bundle.SheetBundle) werden Bilder, Pflegesymbole und CSS als
+    gemeinsame Dateien unter assets/ abgelegt und nur referenziert. `metrics` (generation_metrics) sammelt
+    Dauer und API-Nutzung je Stufe. Gibt (HTML, Fehler je Feld) zurück.
+    """
+    with use_metrics(metrics):
+        return _generate_sheet(product_form, target_language, translate_batch, assets, icon_mode, bundle)
+
+
+def _generate_sheet(product_form: dict, target_language: str, translate_batch, assets: dict, icon_mode: str,
+                    bundle) -> tuple[str, dict[str, str]]:
+    if bundle is not None:
+        # Als einzelne Dateien lassen sich die Symbole zwischen allen Sprachen teilen
+        icon_mode = "data_url"
+    translated_context, errors = translate_sheet(product_form, target_language, translate_batch, icon_mode)
+    final_context = {**translated_context, "ean_code_value": product_form.get("ean_code_value", ""),
+                     "article_number_value": product_form.get("article_number_value", ""),
+                     "available_sizes_value": product_form.get("available_sizes_value", ""),
+                     "lang_code": get_html_lang_code(target_language), **assets}
+    if bundle is not None:
+        with measure_stage("assets"):
+            for key in assets:
+                final_context[key] = bundle.externalize(assets[key])
+            final_context["care_instructions"] = [{**item, "icon_url": bundle.externalize(item["icon_url"])}
+                                                  for item in final_context["care_instructions"]]
+            final_context["stylesheet_url"] = bundle.stylesheet_url()
+    with measure_stage("render"):
+        page_html = create_html_from_template(TEMPLATE_FILENAME, final_context)
+    with measure_stage("fonts"):
+        page_html = embed_fonts(page_html, bundle)
+    with measure_stage("optimize"):
+        return optimize_page(page_html), errors
+
+
+def generate_sheets(product_form: dict, target_languages: list[str], translate_batch, assets: dict,
+                    max_workers: int = MAX_PARALLEL_LANGUAGES, on_done=None, bundle=None,
+                    metrics=None, cancel_event=None) -> dict[str, tuple[str, dict[str, str]]]:
+    """
+    Erzeugt Produktblätter für mehrere Zielsprachen parallel (höchstens `max_workers` gleichzeitig).
+
+    `on_done(language, errors)` wird im aufrufenden Thread aufgerufen, sobald eine Sprache fertig ist, und
+    eignet sich daher für Streamlit-Fortschrittsanzeigen. `bundle` wie bei generate_sheet; alle Sprachen teilen
+    sich dann dieselben Asset-Dateien, `metrics` wie bei generate_sheet. Ist `cancel_event` (threading.Event)
+    gesetzt, werden noch nicht begonnene Sprachen übersprungen (Fehler "sheet": "abgebrochen"); laufende werden
+    fertig. Gibt {Sprache: (HTML, Fehler je Feld)} zurück.
+    """
+    def generate_unless_cancelled(language):
+        if cancel_event is not None and cancel_event.is_set():
+            raise CancelledError()
+        return generate_sheet(product_form, language, translate_batch, assets, bundle=bundle, metrics=metrics)
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(target_languages) or 1))) as executor:
+        # Jede Sprache im Kontext des Aufrufers (Benutzer und Priorität für fair_scheduler)
+        futures = {executor.submit(contextvars.copy_context().run, generate_unless_cancelled, language): language
+                   for language in target_languages}
+        for future in as_completed(futures):
+            language = futures[future]
+            try:
+                results[language] = future.result()
+            except CancelledError:
+                results[language] = ("", {"sheet": "abgebrochen"})
+            except Exception as e:
+                print(f"DEBUG: Produktblatt für {language} fehlgeschlagen: {e}")
+                results[language] = ("", {"sheet": str(e)})
+            if on_done:
+                on_done(language, results[language][1])
+    return {language: results[language] for language in target_languages}
+
+
+def build_zip(files: dict[str, str]) -> bytes:
+    """Packt {Dateiname: HTML} in ein ZIP-Archiv."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for filename, content in files.items():
+            archive.writestr(filename, content)
+    return buffer.getvalue()
@@ -0,0 +1,82 @@
+"""
+Sammelt alle übersetzbaren Texte eines Produktblatts unter eindeutigen Schlüsseln und baut aus den
+Übersetzungen wieder den Template-Kontext auf. So kann ein Produktblatt in einem Rutsch übersetzt werden.
+"""
+
+OEKO_TEX_KEYS = ("oeko_tex_standard_text", "oeko_tex_logo_alt_text", "oeko_tex_tested_text")
+# Schlüssel fester Texte aus den Daten-Bibliotheken (im Gegensatz zu Benutzereingaben und Merkmalen)
+STATIC_KEY_PREFIXES = ("default.", "care.", "chart.")
+
+
+def collect_sheet_texts(user_texts: dict, features: list, default_texts: dict, care_texts: list,
+                        chart_data: dict | None = None) -> dict[str, str]:
+    """Gibt alle zu übersetzenden Texte als flaches Dictionary {Schlüssel: deutscher Text} zurück."""
+    texts = {}
+    for key, text in default_texts.items():
+        texts[f"default.{key}"] = text
+    for key, text in user_texts.items():
+        texts[f"user.{key}"] = text
+    for i, feature in enumerate(features):
+        texts[f"feature.{i}"] = feature
+    for i, care_text in enumerate(care_texts):
+        texts[f"care.{i}"] = care_text
+
+    if chart_data:
+        texts["chart.title"] = chart_data["title"]
+        if "footer" in chart_data:
+            texts["chart.footer"] = chart_data["footer"]
+        for i, header in enumerate(chart_data.get("headers", [])):
+            texts[f"chart.headers.{i}"] = header
+        for t, sub_table_data in enumerate(chart_data.get("tables", [])):
+            texts[f"chart.tables.{t}.subtitle"] = sub_table_data["subtitle"]
+            if "title_full" in sub_table_data:
+                texts[f"chart.tables.{t}.title_full"] = sub_table_data["title_full"]
+            for i, header in enumerate(sub_table_data.get("headers", [])):
+                texts[f"chart.tables.{t}.headers.{i}"] = header
+    return texts
+
+
+def build_translated_chart(chart_data: dict, translations: dict[str, str]) -> dict:
+    translated_chart = {"type": chart_data["type"], "rows": chart_data.get("rows", []),
+                        "groups": chart_data.get("groups", []), "tables": [],
+                        "title": translations["chart.title"]}
+    if "footer" in chart_data:
+        translated_chart["footer"] = translations["chart.footer"]
+    if "headers" in chart_data:
+        translated_chart["headers"] = [translations[f"chart.headers.{i}"] for i in range(len(chart_data["headers"]))]
+    for t, sub_table_data in enumerate(chart_data.get("tables", [])):
+        translated_sub_table = {"rows": sub_table_data["rows"],
+                                "subtitle": translations[f"chart.tables.{t}.subtitle"]}
+        if "title_full" in sub_table_data:
+            translated_sub_table["title_full"] = translations[f"chart.tables.{t}.title_full"]
+        if "headers" in sub_table_data:
+            translated_sub_table["headers"] = [translations[f"chart.tables.{t}.headers.{i}"]
+                                               for i in range(len(sub_table_data["headers"]))]
+        translated_chart["tables"].append(translated_sub_table)
+    return translated_chart
+
+
+def build_translated_context(translations: dict[str, str], user_texts: dict, features: list, default_texts: dict,
+                             care_texts: list, chart_data: dict | None = None,
+                             has_oeko_tex: bool = True) -> tuple[dict, list[str]]:
+    """
+    Setzt die Übersetzungen wieder zum Template-Kontext zusammen.
+    Gibt den Kontext und die übersetzten Pflegehinweise (in Auswahlreihenfolge) zurück.
+    """
+    translated_context = {key: translations[f"default.{key}"] for key in default_texts}
+    # Benutzereingaben haben Vorrang vor den Standardtexten (z.B. Waschanleitung vor Erstgebrauch)
+    translated_context.update({key: translations[f"user.{key}"] for key in user_texts})
+    translated_context["features_list"] = [translations[f"feature.{i}"] for i in range(len(features))]
+    if not has_oeko_tex:
+        translated_context.update({key: "" for key in OEKO_TEX_KEYS})
+    if chart_data:
+        translated_context["size_chart"] = build_translated_chart(chart_data, translations)
+    translated_care_texts = [translations[f"care.{i}"] for i in range(len(care_texts))]
+    return translated_context, translated_care_texts
+
+
+def describe_failed_fields(errors: dict[str, str], limit: int = 5) -> str:
+    """Kurze Auflistung der fehlgeschlagenen Felder für die Statusmeldung."""
+    keys = list(errors)
+    suffix = f" und {len(keys) - limit} weitere" if len(keys) > limit else ""
+    return ", ".join(keys[:limit]) + suffix
@@ -0,0 +1,39 @@
+"""
+Prozessweite Jinja-Umgebung für die HTML-Vorlagen.
+
+Kompilierte Vorlagen bleiben im Speicher, der Bytecode wird zusätzlich unter .cache/jinja_bytecode abgelegt,
+damit auch ein frisch gestarteter Prozess die Vorlage nicht neu kompilieren muss. Nur im Entwicklungsmodus
+(TEMPLATE_DEV_MODE=1) prüft Jinja bei jedem Zugriff, ob sich die Vorlagendatei geändert hat.
+"""
+import os
+import threading
+
+import jinja2
+
+TEMPLATE_DIR = os.path.dirname(os.path.abspath(__file__))
+BYTECODE_CACHE_DIR = os.getenv("JINJA_BYTECODE_CACHE_DIR", os.path.join(TEMPLATE_DIR, ".cache", "jinja_bytecode"))
+TEMPLATE_DEV_MODE = os.getenv("TEMPLATE_DEV_MODE", "").lower() in ("1", "true", "ja", "yes")
+
+_environment = None
+_environment_lock = threading.Lock()
+
+
+def get_template_environment() -> jinja2.Environment:
+    global _environment
+    with _environment_lock:
+        if _environment is None:
+            bytecode_cache = None
+            try:
+                os.makedirs(BYTECODE_CACHE_DIR, exist_ok=True)
+                bytecode_cache = jinja2.FileSystemBytecodeCache(BYTECODE_CACHE_DIR)
+            except OSError as e:
+                print(f"DEBUG: Jinja-Bytecode-Cache nicht verfügbar: {e}")
+            _environment = jinja2.Environment(loader=jinja2.FileSystemLoader(searchpath=TEMPLATE_DIR),
+                                              bytecode_cache=bytecode_cache,
+                                              auto_reload=TEMPLATE_DEV_MODE)
+        return _environment
+
+
+def render_template(template_filename: str, context: dict) -> str:
+    """Rendert eine Vorlage; jinja2.TemplateNotFound und Renderfehler werden an den Aufrufer weitergegeben."""
+    return get_template_environment().get_template(template_filename).render(context)
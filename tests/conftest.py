@@ -0,0 +1,41 @@
+"""
+Gemeinsame Einstellungen der Tests: Repository und benchmarks/ (Ersatzserver) im Importpfad, alle Caches und
+SQLite-Dateien in einem temporären Verzeichnis. Die Umgebungsvariablen müssen gesetzt sein, bevor die
+App-Module importiert werden, weil sie ihre Pfade beim Import lesen.
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, os.path.join(REPO_DIR, "benchmarks"))
+
+_WORK_DIR = tempfile.mkdtemp(prefix="produktblatt_tests_")
+os.environ.update({
+    "TRANSLATION_MEMORY_PATH": os.path.join(_WORK_DIR, "tm.sqlite3"),
+    "RATE_LIMIT_DB_PATH": os.path.join(_WORK_DIR, "rate_limits.sqlite3"),
+    "USER_USAGE_DB_PATH": os.path.join(_WORK_DIR, "user_usage.sqlite3"),
+    "DEEPL_GLOSSARY_CACHE_PATH": os.path.join(_WORK_DIR, "deepl_glossaries.json"),
+    "BLOB_STORE_DIR": os.path.join(_WORK_DIR, "blobs"),
+    "IMAGE_CACHE_DIR": os.path.join(_WORK_DIR, "images"),
+    "FONT_CACHE_DIR": os.path.join(_WORK_DIR, "fonts"),
+    "JINJA_BYTECODE_CACHE_DIR": os.path.join(_WORK_DIR, "jinja_bytecode"),
+    "LEARNED_CATALOG_DIR": os.path.join(_WORK_DIR, "learned_catalogs"),
+})
+for name in ("DEEPL_API_KEY", "GEMINI_API_KEY", "TRANSLATION_PROVIDERS", "METRICS_FILE", "USER_DAILY_CHARACTER_QUOTA",
+             "USER_CHARACTER_QUOTAS"):
+    os.environ.pop(name, None)
+
+
+@pytest.fixture
+def fake_deepl(monkeypatch):
+    """Lokaler DeepL-Ersatzserver; create_deepl_translator spricht für die Dauer des Tests mit ihm."""
+    import http_client
+    from fake_servers import FakeDeepLServer
+    server = FakeDeepLServer(latency=0.0, jitter=0.0).start()
+    monkeypatch.setattr(http_client, "DEEPL_SERVER_URL", server.url)
+    yield server
+    server.stop()
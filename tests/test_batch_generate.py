@@ -0,0 +1,51 @@
+import json
+import sys
+import uuid
+
+import batch_generate
+import catalogs
+import protected_terms
+from sheet_generator import sheet_filename
+from translation_cache import get_translation_cache
+
+
+def test_cli_creates_deepl_glossary(fake_deepl, tmp_path, monkeypatch):
+    monkeypatch.setattr(catalogs, "CATALOG_DIR", str(tmp_path / "catalogs"))
+    monkeypatch.setattr(protected_terms, "GLOSSARY_CACHE_PATH", str(tmp_path / "glossaries.json"))
+    monkeypatch.setattr(protected_terms, "_glossary_ids", None)
+    monkeypatch.setattr(protected_terms, "_glossary_failed_at", {})
+    monkeypatch.setattr(protected_terms, "_glossary_pairs", None)
+    get_translation_cache().invalidate()
+    # Eindeutige Texte, damit nichts aus Cache oder Translation Memory kommt
+    marker = uuid.uuid4().hex[:8]
+    articles = tmp_path / "artikel.jsonl"
+    articles.write_text(json.dumps({"article_number": "T-1", "name": f"suprima Slip {marker}",
+                                    "description": f"Bequemer Slip mit OEKO-TEX® STANDARD 100, Modell {marker}.",
+                                    "features": "weich|waschbar", "care": "Nicht bleichen"}) + "\n",
+                        encoding="utf-8")
+    monkeypatch.setenv("DEEPL_API_KEY", "test:fx")
+    monkeypatch.setattr(sys, "argv", ["batch_generate.py", str(articles), "--out", str(tmp_path / "out"),
+                                      "--lang", "Englisch", "--providers", "deepl"])
+
+    batch_generate.main()
+
+    assert len(fake_deepl.glossaries) == 1
+    entries = next(iter(fake_deepl.glossaries.values()))
+    assert "suprima\tsuprima" in entries
+    page = (tmp_path / "out" / sheet_filename("T-1", "Englisch")).read_text(encoding="utf-8")
+    assert f"] suprima Slip {marker}" in page
+    assert fake_deepl.counters["ok"] > 0
+
+
+def test_counting_translator_forwards_other_methods():
+    class Translator:
+        def translate_text(self, text, **kwargs):
+            return text
+
+        def get_glossary_languages(self):
+            return ["DE>EN"]
+
+    counting = batch_generate.CountingTranslator(Translator())
+    assert counting.get_glossary_languages() == ["DE>EN"]
+    counting.translate_text(["ab", "cde"], target_lang="EN-GB")
+    assert (counting.api_calls, counting.characters) == (1, 5)
@@ -0,0 +1,62 @@
+import io
+import os
+import time
+
+from PIL import Image
+
+from blob_store import BlobStore
+
+
+def png_bytes(color=(30, 120, 200)):
+    buffer = io.BytesIO()
+    Image.new("RGB", (600, 600), color).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def age(store, blob_id, seconds):
+    mtime = time.time() - seconds
+    for path in (store._path(blob_id), f"{store._path(blob_id)}.type"):
+        os.utime(path, (mtime, mtime))
+
+
+def test_put_is_content_addressed_and_get_returns_mime_type(tmp_path):
+    store = BlobStore(str(tmp_path))
+    blob_id = store.put(b"abc", "image/png")
+    assert store.put(b"abc", "image/png") == blob_id
+    assert store.get(blob_id) == (b"abc", "image/png")
+    assert store.get("0" * 64) is None
+
+
+def test_data_urls_are_kept_in_memory_within_the_byte_limit(tmp_path):
+    store = BlobStore(str(tmp_path), memory_max_bytes=10 ** 6)
+    blob_id = store.put(png_bytes(), "image/png")
+    data_url = store.image_data_url(blob_id, "detail")
+    assert data_url.startswith("data:image/")
+    os.remove(store._path(blob_id))
+    assert store.image_data_url(blob_id, "detail") == data_url
+    assert store.image_data_url(None) is None
+    assert store.stats()["memory_entries"] == 1
+
+
+def test_old_blobs_are_removed_with_their_type_file(tmp_path):
+    store = BlobStore(str(tmp_path), max_age_days=1)
+    old_id = store.put(b"alt", "image/png")
+    age(store, old_id, 2 * 86400)
+    store._last_prune = 0.0
+    new_id = store.put(b"neu", "image/png")
+    assert store.get(old_id) is None
+    assert sorted(os.listdir(tmp_path)) == [new_id, f"{new_id}.type"]
+
+
+def test_least_recently_read_blob_goes_first_when_over_size(tmp_path):
+    store = BlobStore(str(tmp_path), disk_max_bytes=60)
+    first_id = store.put(b"a" * 20, "image/png")
+    second_id = store.put(b"b" * 20, "image/png")
+    age(store, first_id, 200)
+    age(store, second_id, 100)
+    # Lesen zählt als Verwendung
+    store.get(first_id)
+    store._last_prune = 0.0
+    third_id = store.put(b"c" * 20, "image/png")
+    assert store.get(second_id) is None
+    assert store.get(first_id) and store.get(third_id)
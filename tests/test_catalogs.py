@@ -0,0 +1,92 @@
+import pytest
+
+import catalogs
+from product_data import get_product_catalog
+from translation_providers import TranslationRouter
+
+
+class StubProvider:
+    """Übersetzt mit Präfix; Schlüssel in `failing` schlagen fehl."""
+
+    def __init__(self, name, failing=()):
+        self.name = name
+        self.failing = set(failing)
+        self.calls = []
+
+    def translate_batch(self, texts, source_language, target_language):
+        self.calls.append(dict(texts))
+        translations = {key: f"[{self.name}] {text}" for key, text in texts.items()}
+        return translations, {key: "Fehler" for key in texts if key in self.failing}
+
+
+@pytest.fixture
+def catalog_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(catalogs, "CATALOG_DIR", str(tmp_path / "catalogs"))
+    monkeypatch.setattr(catalogs, "LEARNED_CATALOG_DIR", str(tmp_path / "learned"))
+    catalogs._catalog_cache.clear()
+    yield tmp_path
+    catalogs._catalog_cache.clear()
+
+
+def static_texts():
+    default_texts = get_product_catalog().default_texts
+    (first_key, first_text), (second_key, second_text) = list(default_texts.items())[:2]
+    return {f"default.{first_key}": first_text, f"default.{second_key}": second_text}
+
+
+def translate(router, sheet_texts):
+    return catalogs.translate_with_catalog(sheet_texts, "Englisch",
+                                           lambda texts: router.translate_batch(texts, "Deutsch", "Englisch"))
+
+
+def test_deepl_translations_are_learned_and_reused(catalog_dir):
+    sheet_texts = static_texts()
+    deepl = StubProvider("deepl")
+    translations, errors = translate(TranslationRouter(deepl), sheet_texts)
+    assert not errors
+    assert set(catalogs.get_catalog("Englisch")) == set(sheet_texts.values())
+    # Gelernt wird nur unter LEARNED_CATALOG_DIR, der eingecheckte Katalog bleibt unverändert
+    assert not (catalog_dir / "catalogs").exists()
+    assert catalogs._read_catalog_file("Englisch", catalogs.LEARNED_CATALOG_DIR)["provider"] == "deepl"
+
+    # Zweiter Durchlauf kommt vollständig aus dem Katalog
+    assert translate(TranslationRouter(deepl), sheet_texts) == (translations, {})
+    assert len(deepl.calls) == 1
+
+
+def test_gemini_translations_are_not_learned(catalog_dir):
+    translations, errors = translate(TranslationRouter(StubProvider("gemini")), static_texts())
+    assert not errors and all(value.startswith("[gemini]") for value in translations.values())
+    assert catalogs.get_catalog("Englisch") == {}
+    assert not list(catalog_dir.iterdir())
+
+
+def test_built_catalog_wins_over_learned_entries(catalog_dir):
+    sheet_texts = static_texts()
+    first_text, second_text = sheet_texts.values()
+    catalogs._write_catalog_file("Englisch", {first_text: "gebaut"})
+    catalogs._write_catalog_file("Englisch", {first_text: "gelernt", second_text: "gelernt"},
+                                 directory=catalogs.LEARNED_CATALOG_DIR)
+    assert catalogs.get_catalog("Englisch") == {first_text: "gebaut", second_text: "gelernt"}
+    deepl = StubProvider("deepl")
+    translations, _ = translate(TranslationRouter(deepl), sheet_texts)
+    assert sorted(translations.values()) == ["gebaut", "gelernt"] and not deepl.calls
+
+
+def test_only_fields_answered_by_deepl_are_learned(catalog_dir):
+    sheet_texts = static_texts()
+    first_key, second_key = sheet_texts
+    router = TranslationRouter(StubProvider("gemini", failing=[second_key]), StubProvider("deepl"))
+    translations, errors = translate(router, {**sheet_texts, "user.name": "Kissen"})
+    assert not errors
+    assert translations[first_key].startswith("[gemini]") and translations[second_key].startswith("[deepl]")
+    assert catalogs.get_catalog("Englisch") == {sheet_texts[second_key]: translations[second_key]}
+
+
+def test_user_texts_and_failed_fields_are_not_learned(catalog_dir):
+    sheet_texts = static_texts()
+    first_key, second_key = sheet_texts
+    router = TranslationRouter(StubProvider("deepl", failing=[first_key]))
+    translations, errors = translate(router, {**sheet_texts, "user.name": "Kissen"})
+    assert set(errors) == {first_key}
+    assert catalogs.get_catalog("Englisch") == {sheet_texts[second_key]: translations[second_key]}
@@ -0,0 +1,114 @@
+import threading
+import time
+
+import pytest
+
+import fair_scheduler
+from fair_scheduler import FairScheduler, QuotaExceededError, UsageStore, charge_quota, use_requester
+
+
+@pytest.fixture
+def usage_store(tmp_path, monkeypatch):
+    store = UsageStore(str(tmp_path / "usage.sqlite3"))
+    monkeypatch.setattr(fair_scheduler, "_usage_store", store)
+    monkeypatch.setattr(fair_scheduler, "DAILY_CHARACTER_QUOTA", 100)
+    monkeypatch.setattr(fair_scheduler, "USER_CHARACTER_QUOTAS", {"chef@firma.de": 0})
+    return store
+
+
+def test_quota_is_reserved_and_exceeding_it_raises(usage_store):
+    with use_requester("Anna@Firma.de"):
+        with charge_quota(60):
+            pass
+        with pytest.raises(QuotaExceededError):
+            with charge_quota(50):
+                pytest.fail("Request trotz erschöpftem Kontingent gesendet")
+    assert fair_scheduler.quota_status("anna@firma.de") == {"used": 60, "quota": 100, "remaining": 40}
+
+
+def test_failed_request_is_refunded(usage_store):
+    with use_requester("anna@firma.de"):
+        with pytest.raises(RuntimeError):
+            with charge_quota(80):
+                raise RuntimeError("Anbieter nicht erreichbar")
+    assert usage_store.used("anna@firma.de") == 0
+
+
+def test_unlimited_users_and_anonymous_calls(usage_store):
+    with use_requester("chef@firma.de"):
+        with charge_quota(1000):
+            pass
+    with charge_quota(1000):
+        pass
+    assert fair_scheduler.quota_status("chef@firma.de")["remaining"] is None
+    assert usage_store.used("") == 0
+
+
+def test_quota_is_unlimited_by_default(tmp_path, monkeypatch):
+    store = UsageStore(str(tmp_path / "usage.sqlite3"))
+    monkeypatch.setattr(fair_scheduler, "_usage_store", store)
+    assert fair_scheduler.DAILY_CHARACTER_QUOTA == 0
+    with use_requester("anna@firma.de"):
+        with charge_quota(10 ** 7):
+            pass
+    assert fair_scheduler.quota_status("anna@firma.de") == {"used": 10 ** 7, "quota": 0, "remaining": None}
+
+
+def test_quota_resets_on_the_next_day(usage_store, monkeypatch):
+    monkeypatch.setattr(UsageStore, "today", staticmethod(lambda: "2026-10-17"))
+    with use_requester("anna@firma.de"):
+        with charge_quota(100):
+            pass
+        with pytest.raises(QuotaExceededError):
+            with charge_quota(1):
+                pass
+        monkeypatch.setattr(UsageStore, "today", staticmethod(lambda: "2026-10-18"))
+        assert fair_scheduler.quota_status("anna@firma.de")["used"] == 0
+        with charge_quota(100):
+            pass
+    assert usage_store.used("anna@firma.de", "2026-10-17") == 100
+
+
+def test_refund_goes_to_the_day_of_the_reservation(usage_store, monkeypatch):
+    monkeypatch.setattr(UsageStore, "today", staticmethod(lambda: "2026-10-17"))
+    with use_requester("anna@firma.de"):
+        with pytest.raises(RuntimeError):
+            with charge_quota(70):
+                monkeypatch.setattr(UsageStore, "today", staticmethod(lambda: "2026-10-18"))
+                raise RuntimeError("Anbieter nicht erreichbar")
+    assert usage_store.used("anna@firma.de", "2026-10-17") == 0
+
+
+def test_interactive_calls_go_before_bulk_calls():
+    scheduler = FairScheduler("test")
+    order, started = [], threading.Event()
+
+    def call(user, priority, cost=1.0):
+        with use_requester(user, priority):
+            with scheduler.turn(cost):
+                order.append(user)
+
+    def hold():
+        with scheduler.turn():
+            started.set()
+            # Warten, bis beide anderen Aufrufe in der Warteschlange stehen
+            while sum(scheduler.waiting().values()) < 2:
+                time.sleep(0.001)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    started.wait()
+    threads = [threading.Thread(target=call, args=("export@firma.de", "bulk")),
+               threading.Thread(target=call, args=("anna@firma.de", "interactive"))]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.01)
+    for thread in [holder, *threads]:
+        thread.join(timeout=5)
+    assert order == ["anna@firma.de", "export@firma.de"]
+
+
+def test_unknown_priority_is_rejected():
+    with pytest.raises(ValueError):
+        with use_requester("anna@firma.de", "sofort"):
+            pass
@@ -0,0 +1,85 @@
+import json
+import uuid
+
+import pytest
+
+import gemini_batch
+from gemini_batch import parse_structured_response, plan_structured_requests, translate_texts_gemini_structured
+
+
+def test_parse_structured_response_keeps_only_valid_values():
+    texts = {"t0": "Hallo", "t1": "Welt", "t2": "⟦0⟧ Slip", "t3": "leer"}
+    response = json.dumps({"t0": "Hello", "t1": 42, "t2": "⟦0⟧ briefs", "t3": "  ", "extra": "x"})
+    assert parse_structured_response(response, texts, {"t2": ["suprima"]}) == {"t0": "Hello",
+                                                                                "t2": "suprima briefs"}
+
+
+def test_parse_structured_response_rejects_missing_placeholder():
+    assert parse_structured_response('{"t0": "briefs"}', {"t0": "⟦0⟧ Slip"}, {"t0": ["suprima"]}) == {}
+
+
+@pytest.mark.parametrize("response_text", [None, "", "kein JSON", "[1, 2]"])
+def test_parse_structured_response_invalid_documents(response_text):
+    assert parse_structured_response(response_text, {"t0": "Hallo"}) == {}
+
+
+def test_parse_structured_response_strips_code_fence():
+    assert parse_structured_response('```json\n{"t0": "Hello"}\n```', {"t0": "Hallo"}) == {"t0": "Hello"}
+
+
+def test_plan_structured_requests_respects_token_budget():
+    texts = {f"t{i}": "x" * 60 for i in range(10)}
+    chunks = plan_structured_requests(texts, token_budget=100)
+    assert [key for chunk in chunks for key in chunk] == list(texts)
+    assert all(sum(gemini_batch.estimate_tokens(text) for text in chunk.values()) <= 100 for chunk in chunks)
+
+
+@pytest.fixture
+def gemini_calls(monkeypatch):
+    """Zeichnet strukturierte und Einzel-Requests auf, ohne das Netz zu benutzen."""
+    calls = {"structured": [], "per_field": []}
+    monkeypatch.setattr(gemini_batch, "GEMINI_API_KEY", "test")
+
+    def per_field(texts, source_language, target_language):
+        calls["per_field"].append(dict(texts))
+        return {key: f"einzeln {text}" for key, text in texts.items()}, {}
+
+    monkeypatch.setattr(gemini_batch, "translate_texts_gemini_per_field", per_field)
+    return calls
+
+
+def unique_texts(count: int) -> dict[str, str]:
+    marker = uuid.uuid4().hex[:8]
+    return {f"user.field{i}": f"Text {i} {marker}" for i in range(count)}
+
+
+def test_structured_request_failure_becomes_field_errors(gemini_calls, monkeypatch):
+    def fail(payload, characters=0):
+        gemini_calls["structured"].append(payload)
+        raise RuntimeError("Circuit offen")
+
+    monkeypatch.setattr(gemini_batch, "_generate_content", fail)
+    texts = unique_texts(3)
+    translations, errors = translate_texts_gemini_structured(texts, "Deutsch", "Englisch")
+    assert len(gemini_calls["structured"]) == 1
+    assert gemini_calls["per_field"] == []
+    assert errors == {key: "Circuit offen" for key in texts}
+    assert set(translations) == set(texts)
+
+
+def test_only_missing_fields_of_a_successful_response_are_retried(gemini_calls, monkeypatch):
+    def answer_all_but_first(payload, characters=0):
+        prompt = payload["contents"][0]["parts"][0]["text"]
+        sent = json.loads(prompt[prompt.index("\n") + 1:])
+        gemini_calls["structured"].append(sent)
+        answer = {id_: f"EN {text}" for id_, text in list(sent.items())[1:]}
+        return {"candidates": [{"content": {"parts": [{"text": json.dumps(answer)}]}}]}
+
+    monkeypatch.setattr(gemini_batch, "_generate_content", answer_all_but_first)
+    texts = unique_texts(3)
+    translations, errors = translate_texts_gemini_structured(texts, "Deutsch", "Englisch")
+    first_key = next(iter(texts))
+    assert errors == {}
+    assert gemini_calls["per_field"] == [{first_key: texts[first_key]}]
+    assert translations[first_key] == f"einzeln {texts[first_key]}"
+    assert all(translations[key] == f"EN {texts[key]}" for key in list(texts)[1:])
@@ -0,0 +1,147 @@
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+import generation_jobs
+import sheet_generator
+from generation_jobs import cancel_job, cancelled_message, get_job, latest_job, run_sheet_generation, submit_job
+from generation_metrics import GenerationMetrics
+from translation_snapshot import TranslationSnapshot
+
+FORM = {"product_name": "suprima Slip", "article_number_value": "T-1", "features": "weich\nwaschbar",
+        "care_instructions": ["Nicht bleichen"], "product_type": "Keine"}
+ASSETS = {"image_main_url": "https://example.com/a.png", "image_detail1_url": None, "image_detail2_url": None,
+          "suprima_logo_url": ""}
+LANGUAGES = ["Englisch", "Französisch", "Italienisch", "Spanisch"]
+
+
+@pytest.fixture
+def job_pool(monkeypatch):
+    """Ein einzelner Job-Platz, damit sich ein Job gezielt in der Warteschlange halten lässt."""
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(generation_jobs, "_executor", executor)
+    monkeypatch.setattr(generation_jobs, "_jobs", {})
+    yield executor
+    executor.shutdown(wait=True)
+
+
+def wait_finished(job):
+    deadline = time.monotonic() + 10
+    while not job.finished:
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+    return job
+
+
+def submit_generation(translate_batch, languages=LANGUAGES, owner=""):
+    metrics = GenerationMetrics(app="test", user=owner)
+    return submit_job(lambda job: run_sheet_generation(job, FORM, languages, lambda: dict(ASSETS), translate_batch,
+                                                       TranslationSnapshot(), True, False),
+                      owner=owner, languages=languages, metrics=metrics)
+
+
+def prefixed(texts, source_language, target_language):
+    return {key: f"[{target_language}] {text}" for key, text in texts.items()}, {}
+
+
+def test_finished_job_hands_over_preview_and_zip(job_pool):
+    job = wait_finished(submit_generation(prefixed))
+    assert job.status == "done"
+    assert job.result["error_message"] == "Produktblatt erfolgreich generiert!"
+    assert "[Englisch] suprima Slip" in job.result["generated_html_content"]
+    assert job.result["generated_zip_content"] and job.result["zip_filename"] == "T-1_produktblaetter.zip"
+    assert job.progress()["done"] == len(LANGUAGES)
+
+
+def test_cancel_before_start(job_pool):
+    release = threading.Event()
+    job_pool.submit(release.wait, 5)
+    calls = []
+    job = submit_generation(lambda *args: calls.append(args) or prefixed(*args))
+    assert job.status == "queued"
+    assert cancel_job(job.job_id)
+    release.set()
+    wait_finished(job)
+    assert job.status == "cancelled" and not calls
+    # Dieselbe Meldung wie bei einem Abbruch während der Generierung, kein "Fehler bei der Generierung"
+    assert job.result == {"error_message": cancelled_message(0, len(LANGUAGES))}
+    assert not job.error
+    assert set(job.progress()["languages"].values()) == {generation_jobs.LANGUAGE_STATES["cancelled"]}
+
+
+def test_cancel_mid_run_keeps_running_languages(job_pool, monkeypatch):
+    # Eine Sprache nach der anderen: beim Abbruch läuft genau die erste
+    monkeypatch.setattr(generation_jobs, "generate_sheets", functools.partial(sheet_generator.generate_sheets,
+                                                                              max_workers=1))
+    started, release = threading.Event(), threading.Event()
+
+    def blocking(texts, source_language, target_language):
+        started.set()
+        assert release.wait(5)
+        return prefixed(texts, source_language, target_language)
+
+    job = submit_generation(blocking)
+    assert started.wait(5)
+    assert cancel_job(job.job_id)
+    release.set()
+    wait_finished(job)
+    assert job.status == "cancelled"
+    assert job.result["error_message"] == cancelled_message(1, len(LANGUAGES))
+    # Die bereits laufende erste Sprache wurde fertig und steht in der Vorschau
+    assert job.result["preview_language"] == "Englisch"
+    assert "[Englisch] suprima Slip" in job.result["generated_html_content"]
+    assert not cancel_job(job.job_id)
+
+
+def test_jobs_of_other_users_are_invisible(job_pool):
+    job = wait_finished(submit_job(lambda job: {"error_message": "ok"}, owner="anna@firma.de"))
+    assert get_job(job.job_id, "anna@firma.de") is job
+    assert get_job(job.job_id, "ben@firma.de") is None
+    assert get_job(job.job_id) is None
+    assert not cancel_job(job.job_id, "ben@firma.de")
+    assert latest_job("anna@firma.de") is job and latest_job("ben@firma.de") is None
+    anonymous = wait_finished(submit_job(lambda job: {}))
+    assert get_job(anonymous.job_id, "ben@firma.de") is anonymous
+
+
+def progress_page(job_id, owner):
+    import streamlit as st
+
+    from app_components import show_generation_job
+
+    st.session_state.setdefault("generation_job_id", job_id)
+    st.session_state.setdefault("error_message", "")
+    if st.session_state.generation_job_id:
+        show_generation_job(owner)
+
+
+@pytest.mark.parametrize("outcome", ["done", "cancelled", "failed"])
+def test_finished_job_is_taken_over_into_session_state(job_pool, outcome):
+    def work(job):
+        if outcome == "failed":
+            raise RuntimeError("Vorlage fehlt")
+        if outcome == "cancelled":
+            job.cancel_event.set()
+            job.language_done("Englisch", {"sheet": "abgebrochen"})
+            return {"error_message": cancelled_message(0, 1)}
+        return {"error_message": "Produktblatt erfolgreich generiert!", "generated_html_content": "<html>"}
+
+    job = wait_finished(submit_job(work, owner="anna@firma.de", languages=["Englisch"]))
+    app = AppTest.from_function(progress_page, args=(job.job_id, "anna@firma.de"), default_timeout=10).run()
+    assert not app.exception
+    assert app.session_state.generation_job_id is None
+    expected = {"done": "Produktblatt erfolgreich generiert!", "cancelled": cancelled_message(0, 1),
+                "failed": "Fehler bei der Generierung: Vorlage fehlt"}[outcome]
+    assert app.session_state.error_message == expected
+    assert job.collected == (outcome != "failed")
+
+
+def test_other_users_job_is_not_taken_over(job_pool):
+    job = wait_finished(submit_job(lambda job: {"error_message": "geheim"}, owner="anna@firma.de"))
+    app = AppTest.from_function(progress_page, args=(job.job_id, "ben@firma.de"), default_timeout=10).run()
+    assert app.session_state.generation_job_id is None
+    assert app.session_state.error_message == "" and not job.collected
@@ -0,0 +1,22 @@
+import generation_metrics
+
+
+def summary(characters):
+    return {"app": "app_azure", "user": "anna", "languages": 1, "wall_ms": 1500.0,
+            "stages": {"translation": {"duration_ms": 1234.5, "api_calls": 3, "characters": characters,
+                                       "cache_hits": 0}},
+            "providers": {"deepl": {"api_calls": 3, "characters": characters}},
+            "page_bytes": {"before": 2_000_000, "after": 1_500_000}}
+
+
+def test_prometheus_counters_are_written_exactly(tmp_path, monkeypatch):
+    metrics_file = tmp_path / "metrics" / "produktblatt.prom"
+    monkeypatch.setattr(generation_metrics, "METRICS_FILE", str(metrics_file))
+    monkeypatch.setattr(generation_metrics, "_totals", {name: {} for name in generation_metrics._totals})
+    generation_metrics.publish(summary(1_234_567))
+    generation_metrics.publish(summary(1))
+    lines = metrics_file.read_text(encoding="utf-8").splitlines()
+    assert 'produktblatt_provider_characters_total{provider="deepl",user="anna"} 1234568' in lines
+    assert 'produktblatt_page_bytes_total{phase="before"} 4000000' in lines
+    assert 'produktblatt_stage_seconds_total{stage="translation"} 2.469' in lines
+    assert 'produktblatt_generations_total{app="app_azure"} 2' in lines
@@ -0,0 +1,72 @@
+import pytest
+import requests
+
+import http_client
+from http_client import CircuitBreaker, CircuitOpenError
+
+
+def test_deepl_translator_uses_pooled_adapter_without_retries(fake_deepl):
+    translator = http_client.create_deepl_translator("test-key")
+    adapter = translator._client._session.get_adapter(fake_deepl.url)
+    assert adapter._pool_maxsize == http_client.HTTP_POOL_SIZE
+    assert adapter.max_retries.total == 0
+    assert translator.translate_text("Hallo", source_lang="DE", target_lang="EN-GB").text
+
+
+def test_breaker_opens_after_threshold_and_lets_one_probe_through(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(http_client.time, "monotonic", lambda: now[0])
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_seconds=10)
+    breaker.on_failure()
+    breaker.before_call()
+    breaker.on_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    now[0] += 10
+    assert breaker.state == "half_open"
+    breaker.before_call()
+    # Während der Probe läuft, bleiben weitere Aufrufe gesperrt
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.on_success()
+    assert breaker.state == "closed"
+    breaker.before_call()
+
+
+def test_failed_probe_reopens_breaker(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(http_client.time, "monotonic", lambda: now[0])
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_seconds=10)
+    breaker.on_failure()
+    now[0] += 10
+    breaker.before_call()
+    breaker.on_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_call_provider_counts_only_transient_errors(monkeypatch):
+    breaker = CircuitBreaker("test-provider", failure_threshold=1)
+    monkeypatch.setitem(http_client._breakers, "test-provider", breaker)
+    monkeypatch.setattr(http_client, "call_with_rate_limit", lambda provider, func, cost: func())
+
+    def bad_request():
+        response = requests.Response()
+        response.status_code = 400
+        raise requests.HTTPError(response=response)
+
+    with pytest.raises(requests.HTTPError):
+        http_client.call_provider("test-provider", bad_request)
+    assert breaker.state == "closed"
+
+    def connection_error():
+        raise requests.exceptions.ConnectionError("weg")
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        http_client.call_provider("test-provider", connection_error)
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        http_client.call_provider("test-provider", lambda: "nie aufgerufen")
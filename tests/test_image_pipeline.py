@@ -0,0 +1,74 @@
+import io
+import os
+import time
+
+import pytest
+from PIL import Image
+
+import image_pipeline
+
+
+def png_bytes(size=(1200, 800), color=(200, 40, 40)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def image_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(image_pipeline, "IMAGE_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(image_pipeline, "_last_prune", 0.0)
+    return tmp_path
+
+
+def write_file(path, size, age_seconds):
+    path.write_bytes(b"x" * size)
+    mtime = time.time() - age_seconds
+    os.utime(path, (mtime, mtime))
+
+
+def test_images_are_downscaled_and_cached(image_cache):
+    data_url = image_pipeline.optimized_image_data_url(png_bytes(), "detail")
+    assert data_url.startswith("data:image/webp;base64,")
+    cached = list(image_cache.iterdir())
+    assert len(cached) == 1
+    data, _ = image_pipeline.optimize_image(png_bytes(), "detail")
+    assert max(Image.open(io.BytesIO(data)).size) == image_pipeline.IMAGE_SIZES["detail"]
+    assert image_pipeline.optimized_image_data_url(png_bytes(), "detail") == data_url
+
+
+def test_unreadable_image_is_embedded_unchanged(image_cache):
+    assert image_pipeline.optimized_image_data_url(b"kein Bild", "main", "image/png") == \
+        "data:image/png;base64,a2VpbiBCaWxk"
+    assert not list(image_cache.iterdir())
+
+
+def test_prune_removes_least_recently_used_files(tmp_path):
+    write_file(tmp_path / "alt", 400, 300)
+    write_file(tmp_path / "mittel", 400, 200)
+    write_file(tmp_path / "neu", 400, 100)
+    image_pipeline.mark_used(str(tmp_path / "alt"))
+    assert image_pipeline.prune_directory(str(tmp_path), 800) == 1
+    assert sorted(os.listdir(tmp_path)) == ["alt", "neu"]
+
+
+def test_prune_by_age_and_grouped_entries(tmp_path):
+    write_file(tmp_path / "a", 10, 5000)
+    write_file(tmp_path / "a.type", 5, 5000)
+    write_file(tmp_path / "b.type", 5, 6000)
+    write_file(tmp_path / "b", 10, 10)
+    write_file(tmp_path / "c.123.tmp", 10, 10)
+    write_file(tmp_path / "d.456.tmp", 10, 2 * image_pipeline.STALE_TEMP_SECONDS)
+    removed = image_pipeline.prune_directory(str(tmp_path), 10 ** 6, max_age_seconds=1000,
+                                             entry_name=lambda name: name.removesuffix(".type"))
+    assert removed == 2
+    # "b" wurde kürzlich geschrieben, also bleibt auch seine ältere .type-Datei
+    assert sorted(os.listdir(tmp_path)) == ["b", "b.type", "c.123.tmp"]
+
+
+def test_image_cache_is_pruned_after_writes(image_cache, monkeypatch):
+    monkeypatch.setattr(image_pipeline, "IMAGE_CACHE_MAX_BYTES", image_pipeline.IMAGE_MAX_BYTES)
+    write_file(image_cache / "alt.webp", image_pipeline.IMAGE_MAX_BYTES, 1000)
+    image_pipeline.optimized_image_data_url(png_bytes(), "main")
+    remaining = os.listdir(image_cache)
+    assert len(remaining) == 1 and remaining[0] != "alt.webp"
@@ -0,0 +1,70 @@
+import page_optimizer
+from page_optimizer import minify_css, minify_html, prune_css, used_classes
+
+CSS = """
+@import url('fonts.css');
+/* Kommentar */
+.sheet { color: red; }
+.size-chart, .sheet h1 { margin: 0; }
+.size-chart td { padding: 2px; }
+li:not(.highlight) { opacity: .8; }
+.sheet:is(.print, .screen) > p { margin: 1px; }
+a[href$=".pdf"], .download { color: blue; }
+@media print {
+    .size-chart { display: none; }
+    .sheet { color: black; }
+}
+@media screen { .detail-image { width: 10px; } }
+@font-face { font-family: 'Poppins'; src: url(x.woff2); }
+"""
+
+
+def pruned(classes):
+    return minify_css(prune_css(CSS, set(classes)))
+
+
+def test_rules_for_unused_classes_are_removed():
+    css = pruned({"sheet"})
+    assert ".size-chart" not in css and ".detail-image" not in css
+    assert ".sheet{color:red}" in css and ".sheet h1{margin:0}" in css
+    assert "@media print{.sheet{color:black}}" in css
+    assert "@media screen" not in css
+
+
+def test_at_rules_without_classes_are_kept():
+    css = pruned(set())
+    assert "@import url('fonts.css');" in css
+    assert "@font-face{font-family:'Poppins'" in css
+    assert "Kommentar" not in css
+
+
+def test_negated_classes_are_not_required():
+    assert "li:not(.highlight){opacity:.8}" in pruned(set())
+    assert "li:not(.highlight){opacity:.8}" in pruned({"highlight"})
+
+
+def test_alternatives_inside_is_count_as_one_selector():
+    assert ".sheet:is(.print,.screen)>p{margin:1px}" in pruned({"sheet"})
+    assert ":is(" not in pruned({"print"})
+
+
+def test_attribute_values_are_not_classes():
+    assert 'a[href$=".pdf"]{color:blue}' in pruned(set())
+    assert 'a[href$=".pdf"],.download{color:blue}' in pruned({"download"})
+
+
+def test_used_classes_reads_both_quote_styles():
+    assert used_classes("""<div class="a  b"><p class='c'>x</p><span>y</span></div>""") == {"a", "b", "c"}
+
+
+def test_minify_html_keeps_inline_whitespace():
+    page = "<div>\n    <p>Größe <strong>M</strong> <em>38</em></p>\n    <!-- Hinweis -->\n</div>"
+    assert minify_html(page) == "<div><p>Größe <strong>M</strong> <em>38</em></p></div>"
+
+
+def test_optimize_page_prunes_embedded_styles(monkeypatch):
+    monkeypatch.setattr(page_optimizer, "PAGE_OPTIMIZE", True)
+    page = ("<html><head><style>.used { color: red; } .unused { color: blue; }</style></head>"
+            "<body>\n  <p class=\"used\">Text</p>\n</body></html>")
+    assert page_optimizer.optimize_page(page) == \
+        "<html><head><style>.used{color:red}</style></head><body><p class=\"used\">Text</p></body></html>"
@@ -0,0 +1,71 @@
+import copy
+import json
+import os
+
+import pytest
+
+import product_data
+from product_data import load_product_catalog, validate_product_data
+
+with open(product_data.PRODUCT_DATA_PATH, "r", encoding="utf-8") as f:
+    RAW = json.load(f)
+
+
+def test_shipped_data_is_valid_and_indexed():
+    assert validate_product_data(RAW) == []
+    catalog = load_product_catalog()
+    first_care = catalog.care_instructions[0]
+    assert catalog.icon_by_care_text[first_care["text"]] == first_care["icon_filename"]
+    assert catalog.deepl_code("Englisch")
+    assert catalog.language_name(catalog.language_options[0]) == catalog.languages[0]["name"]
+    assert catalog.size_chart("Keine") is None
+
+
+@pytest.mark.parametrize("change, expected", [
+    (lambda raw: raw.update(format_version=99), "format_version 99"),
+    (lambda raw: raw.pop("size_charts"), "Abschnitt 'size_charts' fehlt."),
+    (lambda raw: raw["care_instructions"].append(dict(raw["care_instructions"][0])), "ist doppelt"),
+    (lambda raw: raw["care_instructions"].append({"text": "Neu", "icon_filename": "fehlt.svg"}), "fehlt.svg"),
+    (lambda raw: raw["size_charts"].update(Keine={"type": "simple"}), "'Keine' ist als Produkttyp reserviert."),
+    (lambda raw: raw["size_charts"].update(Test={"type": "rund"}), "unbekannter Typ 'rund'"),
+    (lambda raw: raw["default_texts"].update(zahl=5), "default_texts.zahl"),
+    (lambda raw: raw["languages"].append({"name": "Klingonisch"}), "label, deepl, html fehlt"),
+    (lambda raw: raw.update(languages=[]), "languages: Liste mit mindestens einer Sprache erwartet."),
+    (lambda raw: raw.update(glossary={"Klingonisch": {"a": "b"}}), "glossary.Klingonisch: unbekannte Sprache."),
+])
+def test_validation_reports_problems(change, expected):
+    raw = copy.deepcopy(RAW)
+    change(raw)
+    assert any(expected in problem for problem in validate_product_data(raw))
+
+
+@pytest.fixture
+def data_file(tmp_path, monkeypatch):
+    path = tmp_path / "product_data.json"
+    path.write_text(json.dumps(RAW), encoding="utf-8")
+    monkeypatch.setattr(product_data, "PRODUCT_DATA_PATH", str(path))
+    monkeypatch.setattr(product_data, "PRODUCT_DATA_RELOAD_SECONDS", 0)
+    monkeypatch.setattr(product_data, "_catalog", None)
+    yield path
+    product_data._catalog = None
+
+
+def rewrite(path, content):
+    mtime = os.path.getmtime(path)
+    path.write_text(content, encoding="utf-8")
+    os.utime(path, (mtime + 10, mtime + 10))
+
+
+def test_changed_file_is_reloaded(data_file):
+    first = product_data.get_product_catalog()
+    assert product_data.get_product_catalog() is first
+    rewrite(data_file, json.dumps({**RAW, "version": "neu"}))
+    assert product_data.get_product_catalog().version == "neu"
+
+
+def test_invalid_file_keeps_the_previous_data(data_file):
+    first = product_data.get_product_catalog()
+    rewrite(data_file, "{ kaputt")
+    assert product_data.get_product_catalog() is first
+    rewrite(data_file, json.dumps({**RAW, "languages": []}))
+    assert product_data.get_product_catalog() is first
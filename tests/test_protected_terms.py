@@ -0,0 +1,111 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import protected_terms
+from protected_terms import ProtectedTerms, get_deepl_glossary
+
+
+@pytest.fixture
+def glossary_state(tmp_path, monkeypatch):
+    monkeypatch.setattr(protected_terms, "GLOSSARY_CACHE_PATH", str(tmp_path / "glossaries.json"))
+    monkeypatch.setattr(protected_terms, "_glossary_ids", None)
+    monkeypatch.setattr(protected_terms, "_glossary_failed_at", {})
+    monkeypatch.setattr(protected_terms, "_glossary_pairs", None)
+    monkeypatch.setattr(protected_terms, "_glossary_pair_locks", {})
+
+
+class SlowGlossaryTranslator:
+    """Legt Glossare an; das Anlegen für `blocked_target` wartet, bis `release` gesetzt ist."""
+
+    def __init__(self, blocked_target: str):
+        self.blocked_target = blocked_target
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.created = []
+        self._lock = threading.Lock()
+
+    def get_glossary_languages(self):
+        return [SimpleNamespace(source_lang="de", target_lang=target) for target in ("en", "fr")]
+
+    def create_glossary(self, name, source, target, entries):
+        if target == self.blocked_target:
+            self.started.set()
+            assert self.release.wait(5)
+        with self._lock:
+            self.created.append(target)
+            return SimpleNamespace(glossary_id=f"g-{target}-{len(self.created)}")
+
+    def delete_glossary(self, glossary_id):
+        pass
+
+
+def test_glossary_creation_does_not_block_other_pairs(glossary_state):
+    terms = ProtectedTerms(["suprima"])
+    translator = SlowGlossaryTranslator("EN")
+    results = {}
+    slow = threading.Thread(target=lambda: results.setdefault(
+        "en", get_deepl_glossary(translator, terms, "DE", "EN-GB", "Englisch")))
+    slow.start()
+    assert translator.started.wait(5)
+    try:
+        # Während EN noch angelegt wird, kommt FR sofort durch
+        assert get_deepl_glossary(translator, terms, "DE", "FR", "Französisch").startswith("g-FR")
+    finally:
+        translator.release.set()
+        slow.join(5)
+    assert results["en"].startswith("g-EN")
+
+
+def test_concurrent_requests_for_one_pair_create_one_glossary(glossary_state):
+    terms = ProtectedTerms(["suprima"])
+    translator = SlowGlossaryTranslator("EN")
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(
+        get_deepl_glossary(translator, terms, "DE", "EN-GB", "Englisch"))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    assert translator.started.wait(5)
+    translator.release.set()
+    for thread in threads:
+        thread.join(5)
+    assert translator.created == ["EN"]
+    assert len(set(results)) == 1 and results[0]
+
+
+TERMS = ProtectedTerms(["Suprima", "Suprima Care", "OEKO-TEX"], {"Englisch": {"Inkontinenz": "incontinence"}})
+
+
+def test_mask_and_unmask_round_trip():
+    masked, originals = TERMS.mask("Suprima Care von suprima, geprüft nach OEKO-TEX®.")
+    assert masked == "⟦0⟧ von ⟦1⟧, geprüft nach ⟦2⟧®."
+    # Längster Begriff zuerst, Schreibweise wie im Text
+    assert originals == ["Suprima Care", "suprima", "OEKO-TEX"]
+    assert ProtectedTerms.unmask("⟦1⟧ presents ⟦0⟧, tested to ⟦2⟧®.", originals) == \
+        "suprima presents Suprima Care, tested to OEKO-TEX®."
+
+
+def test_mask_respects_word_boundaries():
+    assert TERMS.mask("Suprimax und Suprima-Ware") == ("Suprimax und ⟦0⟧-Ware", ["Suprima"])
+    assert ProtectedTerms([]).mask("Suprima") == ("Suprima", [])
+
+
+@pytest.mark.parametrize("translated", ["⟦0⟧ presents", "⟦0⟧ and ⟦2⟧", "no placeholders"])
+def test_unmask_rejects_missing_or_unknown_placeholders(translated):
+    assert ProtectedTerms.unmask(translated, ["Suprima Care", "suprima"]) is None
+
+
+def test_keep_tags_and_preservation_check():
+    tagged = TERMS.keep_tags("Bezug von Suprima")
+    assert tagged == "Bezug von <keep>Suprima</keep>"
+    assert ProtectedTerms.strip_keep_tags("Cover by <keep>Suprima</keep> ") == "Cover by Suprima"
+    assert TERMS.preserved("Bezug von Suprima", "Cover by SUPRIMA")
+    assert not TERMS.preserved("Bezug von Suprima", "Cover by Supreme")
+
+
+def test_glossary_hint_lists_only_used_entries():
+    assert TERMS.glossary_hint(["Hose bei Inkontinenz"], "Englisch") == \
+        "Verwende für Englisch diese festen Übersetzungen: Inkontinenz = incontinence. "
+    assert TERMS.glossary_hint(["Hose"], "Englisch") == ""
+    assert TERMS.glossary_entries("Englisch")["Suprima"] == "Suprima"
@@ -0,0 +1,120 @@
+import pytest
+import requests
+
+import rate_limiter
+from rate_limiter import AdaptiveRateLimiter, call_with_rate_limit, is_throttling_error
+
+
+class FakeClock:
+    """Ersetzt time in rate_limiter: sleep lässt nur die Zeit vergehen."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter, "time", clock)
+    monkeypatch.setattr(rate_limiter.random, "uniform", lambda low, high: low)
+    return clock
+
+
+@pytest.fixture
+def limiter(tmp_path, clock):
+    return AdaptiveRateLimiter("test", initial_rate=2.0, min_rate=0.5, max_rate=10.0, burst=3,
+                               db_path=str(tmp_path / "rate_limits.sqlite3"))
+
+
+def http_error(status, retry_after=None):
+    response = requests.Response()
+    response.status_code = status
+    if retry_after:
+        response.headers["Retry-After"] = retry_after
+    return requests.HTTPError(response=response)
+
+
+def test_burst_is_free_then_calls_wait_for_the_rate(limiter, clock):
+    for _ in range(3):
+        limiter.acquire()
+    assert clock.sleeps == []
+    limiter.acquire()
+    assert clock.sleeps == [pytest.approx(0.5)]
+
+
+def test_rate_halves_on_throttling_and_recovers_slowly(limiter, clock):
+    limiter.on_throttle(4.0)
+    assert limiter.current_rate() == 1.0
+    limiter.acquire()
+    # Gesperrt bis zum Ende der Drosselung, danach fehlt noch ein Token
+    assert sum(clock.sleeps) >= 4.0
+    for _ in range(5):
+        limiter.on_throttle(0)
+    assert limiter.current_rate() == 0.5
+    limiter.on_success()
+    assert limiter.current_rate() == pytest.approx(0.7)
+    for _ in range(100):
+        limiter.on_success()
+    assert limiter.current_rate() == 10.0
+
+
+def test_state_is_shared_through_the_database(limiter, tmp_path):
+    other = AdaptiveRateLimiter("test", initial_rate=2.0, min_rate=0.5, max_rate=10.0, burst=3,
+                                db_path=str(tmp_path / "rate_limits.sqlite3"))
+    other.on_throttle(1.0)
+    assert limiter.current_rate() == 1.0
+
+
+@pytest.fixture
+def deepl_limiter(limiter, monkeypatch):
+    monkeypatch.setitem(rate_limiter._limiters, "deepl", limiter)
+    return limiter
+
+
+def test_throttled_calls_are_retried_with_retry_after(deepl_limiter, clock):
+    responses = [http_error(429, retry_after="7"), http_error(503), "ok"]
+
+    def func():
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    assert call_with_rate_limit("deepl", func) == "ok"
+    assert clock.sleeps[0] == pytest.approx(7.0)
+    assert deepl_limiter.current_rate() == pytest.approx(0.5 + 0.2)
+
+
+def test_other_errors_and_the_last_attempt_are_raised(deepl_limiter):
+    calls = []
+
+    def bad_request():
+        calls.append(1)
+        raise http_error(400)
+
+    with pytest.raises(requests.HTTPError):
+        call_with_rate_limit("deepl", bad_request)
+    assert len(calls) == 1
+
+    def always_throttled():
+        calls.append(1)
+        raise http_error(429)
+
+    with pytest.raises(requests.HTTPError):
+        call_with_rate_limit("deepl", always_throttled, max_attempts=2)
+    assert len(calls) == 3
+
+
+def test_is_throttling_error():
+    assert is_throttling_error(http_error(429)) and is_throttling_error(http_error(503))
+    assert not is_throttling_error(http_error(500))
+    assert is_throttling_error(rate_limiter.deepl.TooManyRequestsException("zu viele"))
+    assert not is_throttling_error(ValueError())
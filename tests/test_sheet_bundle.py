@@ -0,0 +1,35 @@
+import base64
+import io
+import os
+import zipfile
+
+from sheet_bundle import SheetBundle
+
+
+def data_url(content: bytes, mime_type: str = "image/webp") -> str:
+    return f"data:{mime_type};base64,{base64.b64encode(content).decode('ascii')}"
+
+
+def test_directory_bundle_does_not_keep_data_urls(tmp_path):
+    bundle = SheetBundle(str(tmp_path))
+    urls = [data_url(os.urandom(16) + b"x" * 60_000) for _ in range(200)]
+    paths = [bundle.externalize(url) for url in urls]
+    # Zweiter Durchlauf (weitere Sprache) trifft die gemerkten Pfade
+    assert [bundle.externalize(url) for url in urls] == paths
+    assert len(set(paths)) == 200
+    assert len(os.listdir(tmp_path / "assets")) == 200
+    assert all(not isinstance(key, str) for key in bundle._asset_paths)
+    assert sum(len(key) for key in bundle._asset_paths) < 200 * 64
+    assert not bundle.files
+
+
+def test_in_memory_bundle_inlines_assets_again():
+    bundle = SheetBundle()
+    url = data_url(b"<svg/>", "image/svg+xml")
+    path = bundle.externalize(url)
+    assert path.startswith("assets/") and path.endswith(".svg")
+    assert bundle.externalize("https://example.com/bild.png") == "https://example.com/bild.png"
+    bundle.add_page("de.html", f'<img src="{path}">')
+    assert bundle.inline_assets(f'<img src="{path}">') == f'<img src="{url}">'
+    with zipfile.ZipFile(io.BytesIO(bundle.to_zip())) as archive:
+        assert sorted(archive.namelist()) == [path, "de.html"]
@@ -0,0 +1,21 @@
+from sheet_generator import SOURCE_LANGUAGE, translate_sheet
+
+FORM = {"product_name": "suprima Slip", "features": "weich\nwaschbar", "care_instructions": ["Nicht bleichen"],
+        "product_type": "Keine"}
+
+
+def no_translation(texts, source_language, target_language):
+    raise AssertionError("Quellsprache darf nicht übersetzt werden")
+
+
+def test_translate_sheet_keeps_default_texts():
+    context, errors = translate_sheet(FORM, SOURCE_LANGUAGE, no_translation)
+    assert errors == {}
+    assert context["translation_disclaimer"]
+    assert context["product_name"] == "suprima Slip"
+
+
+def test_translate_sheet_omits_requested_default_texts():
+    context, _ = translate_sheet({**FORM, "omit_default_texts": ["translation_disclaimer"]}, SOURCE_LANGUAGE,
+                                 no_translation)
+    assert not context.get("translation_disclaimer")
@@ -0,0 +1,66 @@
+import pytest
+
+from translatability import classify_text, split_translatable, translate_translatable
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("", "empty"),
+    ("   ", "empty"),
+    ("4051512345678", "numeric"),
+    ("36-38", "numeric"),
+    ("25 x 15 x 5 cm, 200g", "unit"),
+    ("60 °C", "unit"),
+    ("S", "size"),
+    ("3XL", "size"),
+    ("L/XL", "size"),
+    ("XL - XXL", "size"),
+    ("ART-12345", "code"),
+    ("suprima", "protected"),
+    ("Suprima®", "protected"),
+    ("Erhältlich in S, M und L", "text"),
+    ("100% Baumwolle", "text"),
+    ("Waschen 95 Grad", "text"),
+    ("10:30 Uhr", "text"),
+])
+def test_classify_text(text, expected):
+    assert classify_text(text) == expected
+
+
+@pytest.mark.parametrize("text", ["Größe: 38", "Farbe: Blau; Größe: L", "Maße: 25 x 15 cm\nGewicht: 200 g",
+                                  "Erhältlich in S, M und L", "ART-12345"])
+def test_split_keeps_the_original_text(text):
+    assert "".join(part for part, _ in split_translatable(text)) == text
+
+
+def test_fully_translatable_text_stays_whole():
+    assert split_translatable("Farbe: Blau") == [("Farbe: Blau", True)]
+    assert split_translatable("Größe: 38") == [("Größe", True), (": ", False), ("38", False)]
+
+
+def test_only_translatable_parts_are_sent():
+    sent = []
+
+    def translate_batch(texts):
+        sent.append(dict(texts))
+        return {key: text.upper() for key, text in texts.items()}, {}
+
+    texts = {"ean": "4051512345678", "size": "XL", "name": "Hose", "mixed": "Farbe: Blau; Größe: L", "empty": ""}
+    translations, errors = translate_translatable(texts, translate_batch)
+    assert sent == [{"name": "Hose", "mixed#0": "Farbe", "mixed#2": "Blau", "mixed#4": "Größe"}]
+    assert translations == {"ean": "4051512345678", "size": "XL", "name": "HOSE",
+                            "mixed": "FARBE: BLAU; GRÖSSE: L", "empty": ""}
+    assert errors == {}
+
+
+def test_nothing_is_sent_without_translatable_texts():
+    assert translate_translatable({"a": "S", "b": "36-38"}, lambda texts: pytest.fail("unnötiger Request")) == \
+        ({"a": "S", "b": "36-38"}, {})
+
+
+def test_errors_of_parts_are_reported_for_the_whole_field():
+    def translate_batch(texts):
+        return {key: f"EN {text}" for key, text in texts.items()}, {"mixed#2": "Fehler"}
+
+    translations, errors = translate_translatable({"mixed": "Farbe: Blau; Größe: L"}, translate_batch)
+    assert errors == {"mixed": "Fehler"}
+    assert translations["mixed"] == "EN Farbe: EN Blau; EN Größe: L"
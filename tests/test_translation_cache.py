@@ -0,0 +1,141 @@
+import threading
+import time
+
+import pytest
+
+from translation_cache import TranslationCache
+
+
+class BlockingBatch:
+    """translate_batch, das bis zur Freigabe wartet; `result` bestimmt Übersetzung, Fehler oder Ausnahme."""
+
+    def __init__(self, result="ok"):
+        self.result = result
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(dict(texts))
+        self.started.set()
+        self.release.wait(5)
+        if self.result == "raise":
+            raise RuntimeError("Anbieter nicht erreichbar")
+        if self.result == "error":
+            return {key: "" for key in texts}, {key: "Fehler" for key in texts}
+        return {key: f"EN {text}" for key, text in texts.items()}, {}
+
+
+def direct(texts):
+    return {key: f"direkt {text}" for key, text in texts.items()}, {}
+
+
+def translate(cache, texts, batch):
+    return cache.translate_batch(texts, "Deutsch", "Englisch", "deepl", batch)
+
+
+def run_first_in_thread(cache, batch, texts):
+    outcome = {}
+
+    def run():
+        try:
+            outcome["result"] = translate(cache, texts, batch)
+        except Exception as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    assert batch.started.wait(5)
+    return thread, outcome
+
+
+def wait_until_coalesced(cache, count=1):
+    deadline = time.monotonic() + 5
+    while cache.stats()["coalesced"] < count:
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_hits_and_duplicate_texts():
+    cache = TranslationCache()
+    calls = []
+
+    def batch(texts):
+        calls.append(dict(texts))
+        return direct(texts)
+
+    assert translate(cache, {"a": "Kissen", "b": "Kissen", "c": "Decke"}, batch) == \
+        ({"a": "direkt Kissen", "b": "direkt Kissen", "c": "direkt Decke"}, {})
+    assert calls == [{"a": "Kissen", "c": "Decke"}]
+    assert translate(cache, {"x": "Kissen"}, batch) == ({"x": "direkt Kissen"}, {})
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_expired_and_evicted_entries_are_translated_again():
+    cache = TranslationCache(max_entries=2, ttl_seconds=0)
+    translate(cache, {"a": "Kissen"}, direct)
+    calls = []
+    translate(cache, {"a": "Kissen"}, lambda texts: calls.append(texts) or direct(texts))
+    assert calls == [{"a": "Kissen"}]
+
+    cache = TranslationCache(max_entries=2)
+    translate(cache, {"a": "A", "b": "B", "c": "C"}, direct)
+    assert cache.stats()["entries"] == 2 and cache.stats()["evictions"] == 1
+
+
+def test_concurrent_request_waits_for_the_running_one():
+    cache = TranslationCache()
+    first = BlockingBatch()
+    thread, outcome = run_first_in_thread(cache, first, {"a": "Kissen"})
+
+    second_calls = []
+    second = {}
+    waiter = threading.Thread(target=lambda: second.update(result=translate(
+        cache, {"b": "Kissen", "c": "Decke"}, lambda texts: second_calls.append(texts) or direct(texts))))
+    waiter.start()
+    wait_until_coalesced(cache)
+    first.release.set()
+    thread.join(5)
+    waiter.join(5)
+
+    assert outcome["result"] == ({"a": "EN Kissen"}, {})
+    assert second["result"] == ({"b": "EN Kissen", "c": "direkt Decke"}, {})
+    # Nur der nicht laufende Text ging beim zweiten Aufrufer hinaus
+    assert second_calls == [{"c": "Decke"}]
+    assert cache.stats()["in_flight"] == 0
+
+
+@pytest.mark.parametrize("failure", ["error", "raise"])
+def test_waiting_request_retries_when_the_running_one_fails(failure):
+    cache = TranslationCache()
+    first = BlockingBatch(result=failure)
+    thread, outcome = run_first_in_thread(cache, first, {"a": "Kissen"})
+
+    second = {}
+    waiter = threading.Thread(target=lambda: second.update(result=translate(cache, {"b": "Kissen"}, direct)))
+    waiter.start()
+    wait_until_coalesced(cache)
+    first.release.set()
+    thread.join(5)
+    waiter.join(5)
+
+    if failure == "raise":
+        assert isinstance(outcome["error"], RuntimeError)
+    else:
+        assert outcome["result"] == ({"a": ""}, {"a": "Fehler"})
+    assert second["result"] == ({"b": "direkt Kissen"}, {})
+    # Fehlgeschlagenes wird nicht zwischengespeichert, das Ergebnis des zweiten schon
+    assert translate(cache, {"c": "Kissen"}, lambda texts: pytest.fail("Cache nicht getroffen")) == \
+        ({"c": "direkt Kissen"}, {})
+
+
+def test_waiting_request_gives_up_after_the_wait_limit():
+    cache = TranslationCache(wait_seconds=0.05)
+    first = BlockingBatch()
+    thread, _ = run_first_in_thread(cache, first, {"a": "Kissen"})
+    try:
+        assert translate(cache, {"b": "Kissen"}, direct) == ({"b": "direkt Kissen"}, {})
+    finally:
+        first.release.set()
+        thread.join(5)
@@ -0,0 +1,130 @@
+import threading
+
+import pytest
+
+from translation_providers import TranslationRouter, merge_results, track_providers
+
+
+class StubProvider:
+    """Übersetzt mit Präfix; Schlüssel in `failing` schlagen fehl, mit `release` wartet der Aufruf darauf."""
+
+    def __init__(self, name, failing=(), release=None, raises=False):
+        self.name = name
+        self.failing = set(failing)
+        self.release = release
+        self.raises = raises
+        self.calls = []
+        self.started = threading.Event()
+
+    def translate_batch(self, texts, source_language, target_language):
+        self.calls.append(dict(texts))
+        self.started.set()
+        if self.release is not None:
+            assert self.release.wait(5)
+        if self.raises:
+            raise RuntimeError("Anbieter nicht erreichbar")
+        translations = {key: f"[{self.name}] {text}" for key, text in texts.items()}
+        return translations, {key: "Fehler" for key in texts if key in self.failing}
+
+
+TEXTS = {"a": "Kissen", "b": "Decke", "c": "Bezug"}
+
+
+def translate(router, texts=TEXTS):
+    return router.translate_batch(dict(texts), "Deutsch", "Englisch")
+
+
+def test_merge_results_fills_failed_fields():
+    first = ({"a": "A1", "b": "", "c": ""}, {"b": "Zeitüberschreitung", "c": "Zeitüberschreitung"})
+    second = ({"b": "B2", "c": ""}, {"c": "Kontingent"})
+    assert merge_results(first, second, "deepl", "gemini") == (
+        {"a": "A1", "b": "B2", "c": ""}, {"c": "deepl: Zeitüberschreitung / gemini: Kontingent"})
+
+
+def test_only_failed_fields_go_to_the_fallback():
+    primary = StubProvider("deepl", failing=["b"])
+    fallback = StubProvider("gemini")
+    router = TranslationRouter(primary, fallback)
+    with track_providers() as providers:
+        translations, errors = translate(router)
+    assert not errors
+    assert translations == {"a": "[deepl] Kissen", "b": "[gemini] Decke", "c": "[deepl] Bezug"}
+    assert fallback.calls == [{"b": "Decke"}]
+    assert providers == {"a": "deepl", "b": "gemini", "c": "deepl"}
+    assert router.counters["fallback_requests"] == 1
+
+
+def test_exception_of_the_primary_becomes_field_errors():
+    router = TranslationRouter(StubProvider("deepl", raises=True), StubProvider("gemini", failing=["c"]))
+    with track_providers() as providers:
+        translations, errors = translate(router)
+    assert translations["a"] == "[gemini] Kissen" and set(errors) == {"c"}
+    assert "Anbieter nicht erreichbar" in errors["c"] and errors["c"].startswith("deepl: ")
+    assert providers == {"a": "gemini", "b": "gemini"}
+
+
+def test_without_fallback_errors_are_returned():
+    router = TranslationRouter(StubProvider("deepl", failing=["a"]))
+    with track_providers() as providers:
+        _, errors = translate(router)
+    assert set(errors) == {"a"} and providers == {"b": "deepl", "c": "deepl"}
+
+
+def test_no_hedge_when_the_primary_answers_in_time():
+    fallback = StubProvider("gemini")
+    router = TranslationRouter(StubProvider("deepl"), fallback, hedge_after=5)
+    assert translate(router)[0]["a"] == "[deepl] Kissen"
+    assert not fallback.calls and router.counters["hedged_requests"] == 0
+
+
+def test_hedge_fires_and_the_faster_complete_answer_wins():
+    release = threading.Event()
+    primary = StubProvider("deepl", release=release)
+    fallback = StubProvider("gemini")
+    router = TranslationRouter(primary, fallback, hedge_after=0.05)
+    try:
+        with track_providers() as providers:
+            translations, errors = translate(router)
+        assert not errors and set(translations.values()) == {"[gemini] Kissen", "[gemini] Decke", "[gemini] Bezug"}
+        # Der Ausweichanbieter bekommt den ganzen Auftrag, nicht nur Teile
+        assert fallback.calls == [TEXTS]
+        assert providers == {"a": "gemini", "b": "gemini", "c": "gemini"}
+        assert router.counters["hedged_requests"] == 1 and router.counters["hedge_wins"] == 1
+    finally:
+        release.set()
+
+
+def test_incomplete_winner_is_filled_from_the_loser():
+    release = threading.Event()
+    primary = StubProvider("deepl", release=release)
+    fallback = StubProvider("gemini", failing=["b"])
+    router = TranslationRouter(primary, fallback, hedge_after=0.05)
+    outcome = {}
+
+    def run():
+        with track_providers() as providers:
+            outcome["result"] = translate(router)
+            outcome["providers"] = providers
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    assert fallback.started.wait(5)
+    # Der Gewinner ist unvollständig, also wartet der Router auf den langsameren Hauptanbieter
+    thread.join(0.1)
+    assert thread.is_alive()
+    release.set()
+    thread.join(5)
+    translations, errors = outcome["result"]
+    assert not errors
+    assert translations == {"a": "[gemini] Kissen", "b": "[deepl] Decke", "c": "[gemini] Bezug"}
+    assert outcome["providers"] == {"a": "gemini", "b": "deepl", "c": "gemini"}
+
+
+@pytest.mark.parametrize("hedge_after", [None, 0.05])
+def test_fields_failing_everywhere_keep_both_errors(hedge_after):
+    router = TranslationRouter(StubProvider("deepl", failing=["a"]), StubProvider("gemini", failing=["a"]),
+                               hedge_after=hedge_after)
+    with track_providers() as providers:
+        _, errors = translate(router)
+    assert errors == {"a": "deepl: Fehler / gemini: Fehler"}
+    assert "a" not in providers
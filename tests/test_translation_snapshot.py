@@ -0,0 +1,89 @@
+import json
+
+from translation_snapshot import TranslationSnapshot
+
+
+class RecordingBatch:
+    """translate_batch mit Präfix; Schlüssel in `failing` schlagen fehl."""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.calls = []
+
+    def __call__(self, texts, source_language, target_language):
+        self.calls.append(dict(texts))
+        translations = {key: f"[{target_language}] {text}" for key, text in texts.items()}
+        return translations, {key: "Fehler" for key in texts if key in self.failing}
+
+
+TEXTS = {"user.product_name": "suprima Slip", "user.color_name": "weiß", "feature.0": "weich"}
+
+
+def test_only_changed_fields_are_sent():
+    snapshot = TranslationSnapshot()
+    batch = RecordingBatch()
+    translate = snapshot.wrap(batch)
+    first, _ = translate(dict(TEXTS), "Deutsch", "Englisch")
+    translations, errors = translate({**TEXTS, "user.color_name": "schwarz"}, "Deutsch", "Englisch")
+    assert not errors
+    assert batch.calls[1] == {"user.color_name": "schwarz"}
+    assert translations == {**first, "user.color_name": "[Englisch] schwarz"}
+    # Nur Leerraum geändert: gleicher Quell-Hash, kein neuer Request
+    translate({**TEXTS, "user.color_name": " schwarz "}, "Deutsch", "Englisch")
+    assert len(batch.calls) == 2
+    # Jede Zielsprache hat ihren eigenen Schnappschuss
+    translate(dict(TEXTS), "Deutsch", "Französisch")
+    assert batch.calls[2] == TEXTS
+
+
+def test_failed_fields_are_not_stored():
+    snapshot = TranslationSnapshot()
+    translate = snapshot.wrap(RecordingBatch(failing=["user.color_name"]))
+    _, errors = translate(dict(TEXTS), "Deutsch", "Englisch")
+    assert set(errors) == {"user.color_name"}
+    assert set(snapshot.entries["Englisch"]) == {"user.product_name", "feature.0"}
+    retry = RecordingBatch()
+    snapshot.wrap(retry)(dict(TEXTS), "Deutsch", "Englisch")
+    assert retry.calls == [{"user.color_name": "weiß"}]
+
+
+def test_describe_last_run_counts_reused_and_translated_fields():
+    snapshot = TranslationSnapshot()
+    translate = snapshot.wrap(RecordingBatch())
+    for language in ("Englisch", "Französisch"):
+        translate(dict(TEXTS), "Deutsch", language)
+    snapshot.reset_last_run()
+    assert snapshot.describe_last_run() == ""
+    for language in ("Englisch", "Französisch"):
+        translate({**TEXTS, "user.product_name": "suprima Body"}, "Deutsch", language)
+    message = snapshot.describe_last_run()
+    assert message.startswith("4 Texte aus dem letzten Lauf übernommen, neu übersetzt: ")
+    assert message.endswith("(2 Sprachen).")
+    snapshot.reset_last_run()
+    translate(dict(TEXTS), "Deutsch", "Englisch")
+    translate(dict(TEXTS), "Deutsch", "Englisch")
+    assert snapshot.describe_last_run() == ("3 Texte aus dem letzten Lauf übernommen, keine neuen Übersetzungen "
+                                            "nötig (1 Sprache).")
+
+
+def test_saved_snapshot_is_reloaded(tmp_path):
+    path = tmp_path / "snapshots" / "anna.json"
+    snapshot = TranslationSnapshot(str(path))
+    snapshot.wrap(RecordingBatch())(dict(TEXTS), "Deutsch", "Englisch")
+    snapshot.save()
+    assert json.loads(path.read_text(encoding="utf-8")) == snapshot.entries
+    assert [name for name in path.parent.iterdir()] == [path]
+
+    reloaded = TranslationSnapshot(str(path))
+    batch = RecordingBatch()
+    translations, _ = reloaded.wrap(batch)(dict(TEXTS), "Deutsch", "Englisch")
+    assert not batch.calls
+    assert translations["user.product_name"] == "[Englisch] suprima Slip"
+
+
+def test_unreadable_or_unsaved_snapshot_starts_empty(tmp_path):
+    broken = tmp_path / "kaputt.json"
+    broken.write_text("{", encoding="utf-8")
+    assert TranslationSnapshot(str(broken)).entries == {}
+    assert TranslationSnapshot(str(tmp_path / "fehlt.json")).entries == {}
+    TranslationSnapshot().save()
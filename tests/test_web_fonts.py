@@ -0,0 +1,72 @@
+import pytest
+from fontTools.fontBuilder import FontBuilder
+from fontTools.pens.ttGlyphPen import TTGlyphPen
+
+import web_fonts
+
+PAGE = "<html><head><title>Titel</title></head><body><p>Kissen Äö</p></body></html>"
+
+
+def build_font(path, characters):
+    """Minimale TrueType-Schrift, die `characters` als Quadrate enthält."""
+    glyph_names = [".notdef"] + [f"uni{ord(character):04X}" for character in characters]
+    pen = TTGlyphPen(None)
+    pen.moveTo((0, 0))
+    pen.lineTo((0, 500))
+    pen.lineTo((500, 500))
+    pen.lineTo((500, 0))
+    pen.closePath()
+    glyph = pen.glyph()
+    builder = FontBuilder(1000, isTTF=True)
+    builder.setupGlyphOrder(glyph_names)
+    builder.setupCharacterMap({ord(character): f"uni{ord(character):04X}" for character in characters})
+    builder.setupGlyf({name: glyph for name in glyph_names})
+    builder.setupHorizontalMetrics({name: (600, 0) for name in glyph_names})
+    builder.setupHorizontalHeader(ascent=800, descent=-200)
+    builder.setupNameTable({"familyName": "Test", "styleName": "Regular"})
+    builder.setupOS2()
+    builder.setupPost()
+    builder.save(str(path))
+
+
+@pytest.fixture
+def font_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(web_fonts, "FONT_DIR", str(tmp_path / "fonts"))
+    monkeypatch.setattr(web_fonts, "FONT_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(web_fonts, "WEB_FONTS_EMBED", True)
+    monkeypatch.setattr(web_fonts, "_fonts", None)
+    monkeypatch.setattr(web_fonts, "_font_error", None)
+    monkeypatch.setattr(web_fonts, "_subsets", web_fonts.OrderedDict())
+    (tmp_path / "fonts").mkdir()
+    return tmp_path / "fonts"
+
+
+def test_missing_fonts_are_reported_as_configuration_error(font_dir):
+    assert web_fonts.font_face_css(PAGE) == web_fonts.GOOGLE_FONTS_IMPORT
+    error = web_fonts.font_setup_error()
+    assert error and "Poppins" in error and str(font_dir) in error
+
+
+def test_disabled_embedding_is_not_an_error(font_dir, monkeypatch):
+    monkeypatch.setattr(web_fonts, "WEB_FONTS_EMBED", False)
+    assert web_fonts.font_setup_error() is None
+    assert web_fonts.font_face_css(PAGE) == web_fonts.GOOGLE_FONTS_IMPORT
+
+
+def test_present_fonts_are_subset_and_embedded(font_dir):
+    characters = "".join(chr(code) for code in range(0x20, 0x7F)) + "ÄäÖö"
+    for filename in web_fonts.FONT_FAMILIES[0][1].values():
+        build_font(font_dir / filename, characters)
+    css = web_fonts.font_face_css(PAGE)
+    assert web_fonts.font_setup_error() is None
+    assert "@import" not in css
+    assert css.count("@font-face") == 3 and "font-weight:600" in css
+    assert web_fonts.page_characters(PAGE) == set("KissenÄö")
+
+
+def test_bundled_poppins_is_embedded_by_default(font_dir, monkeypatch):
+    monkeypatch.setattr(web_fonts, "FONT_DIR", web_fonts.os.path.join(web_fonts.BASE_DIR, "fonts"))
+    css = web_fonts.font_face_css(PAGE)
+    assert web_fonts.font_setup_error() is None
+    assert "@import" not in css and "fonts.googleapis.com" not in css
+    assert [font.weight for font in web_fonts._fonts if font.family == "Poppins"] == [400, 600, 700]
@@ -0,0 +1,106 @@
+"""
+Erkennt Texte, die sich beim Übersetzen nicht ändern und daher nie an einen Anbieter gehen müssen:
+Zahlen ("4051512345678", "36-38"), Maße und Gewichte ("25 x 15 x 5 cm, 200g"), Größenbezeichnungen
+("S", "XXL", "L/XL"), Artikel- und Prüfcodes ("ART-12345") sowie Texte, die nur aus geschützten Begriffen
+bestehen ("suprima", siehe protected_terms).
+
+Gemischte Texte werden an Zeilenumbrüchen, ";", "|" und "Beschriftung: Wert" zerlegt; übersetzt werden dann
+nur die übersetzbaren Teile, der Rest bleibt stehen. Kommas trennen nicht, damit Sätze wie "Erhältlich in S,
+M und L" als Ganzes übersetzt werden.
+"""
+import re
+
+from product_data import get_product_catalog
+
+CLASS_LABELS = {"empty": "leer", "numeric": "Zahl", "unit": "Maßangabe", "size": "Größe", "code": "Code",
+                "protected": "geschützter Begriff", "text": "Text"}
+
+_QUANTITY = re.compile(r"[±~]?\d+(?:[.,]\d+)*\s*(?:%|‰|°\s?[CF]?|(?:mm|cm|dm|m|km|mg|g|kg|ml|cl|dl|l|dtex)\b)?",
+                       re.IGNORECASE)
+_UNIT = re.compile(r"\d\s*(?:%|‰|°|(?:mm|cm|dm|m|km|mg|g|kg|ml|cl|dl|l|dtex)\b)", re.IGNORECASE)
+_SEPARATORS = re.compile(r"[\s x×*/,;:()+=\-–]+")
+_SIZE_TOKEN = re.compile(r"\d?X{0,4}[SL]|M|\d+")
+_CODE = re.compile(r"(?=\S*\d)[A-Z0-9][A-Z0-9._/#\-]*")
+# Trennstellen gemischter Texte (mit umgebendem Leerraum); "Beschriftung: Wert" nur mit Leerzeichen nach dem
+# Doppelpunkt, damit Uhrzeiten wie 10:30 zusammenbleiben
+_SEGMENT_SEPARATOR = re.compile(r"(\s*(?:\n|;|\|)\s*|:\s+)")
+
+
+def classify_text(text: str) -> str:
+    """Gibt die Art eines Textes zurück (siehe CLASS_LABELS); nur "text" muss übersetzt werden."""
+    stripped = text.strip() if text else ""
+    if not stripped:
+        return "empty"
+    if any(character.isdigit() for character in stripped) and not _SEPARATORS.sub("", _QUANTITY.sub("", stripped)):
+        return "unit" if _UNIT.search(stripped) else "numeric"
+    size_tokens = [token for token in re.split(r"[\s/,;()+\-–]+", stripped) if token]
+    if size_tokens and all(_SIZE_TOKEN.fullmatch(token) for token in size_tokens) and \
+            any(not token.isdigit() for token in size_tokens):
+        return "size"
+    if _CODE.fullmatch(stripped):
+        return "code"
+    protected_terms = get_product_catalog().protected_terms
+    if protected_terms.find(stripped) and not _SEPARATORS.sub("", _QUANTITY.sub(
+            "", protected_terms.strip_terms(stripped)).replace("®", "").replace("™", "")):
+        return "protected"
+    return "text"
+
+
+def is_translatable(text: str) -> bool:
+    return classify_text(text) == "text"
+
+
+def split_translatable(text: str) -> list[tuple[str, bool]]:
+    """
+    Zerlegt einen Text in Teile (Teil, übersetzbar); "".join der Teile ergibt wieder den Originaltext.
+    Sind alle Teile übersetzbar, bleibt der Text ganz, damit der Anbieter den Zusammenhang sieht.
+    """
+    parts = [(part, i % 2 == 0 and is_translatable(part))
+             for i, part in enumerate(_SEGMENT_SEPARATOR.split(text)) if part]
+    if all(is_text for i, (part, is_text) in enumerate(parts) if not _SEGMENT_SEPARATOR.fullmatch(part)):
+        return [(text, bool(parts))]
+    return parts
+
+
+def translate_translatable(texts: dict[str, str], translate_batch) -> tuple[dict[str, str], dict[str, str]]:
+    """
+    Übersetzt nur, was übersetzt werden muss. `translate_batch` bekommt {Schlüssel: Text} und gibt
+    (Übersetzungen, Fehler) zurück; nicht übersetzbare Texte werden unverändert übernommen. Teile gemischter
+    Texte werden unter "<Schlüssel>#<Nr>" gesendet und danach wieder zusammengesetzt.
+    """
+    translations, pending, mixed = {}, {}, {}
+    for key, text in texts.items():
+        parts = split_translatable(text or "")
+        translatable = [i for i, (part, is_text) in enumerate(parts) if is_text]
+        if not translatable:
+            translations[key] = (text or "").strip()
+        elif len(parts) == 1:
+            pending[key] = text
+        else:
+            mixed[key] = parts
+            for i in translatable:
+                pending[f"{key}#{i}"] = parts[i][0].strip()
+    if not pending:
+        return translations, {}
+
+    live_translations, live_errors = translate_batch(pending)
+    errors = {}
+    for key, text in pending.items():
+        if key in texts:
+            translations[key] = live_translations.get(key, "")
+            if key in live_errors:
+                errors[key] = live_errors[key]
+    for key, parts in mixed.items():
+        assembled = []
+        for i, (part, is_text) in enumerate(parts):
+            if not is_text:
+                assembled.append(part)
+                continue
+            part_key = f"{key}#{i}"
+            leading = part[:len(part) - len(part.lstrip())]
+            trailing = part[len(part.rstrip()):]
+            assembled.append(f"{leading}{live_translations.get(part_key, '')}{trailing}")
+            if part_key in live_errors:
+                errors.setdefault(key, live_errors[part_key])
+        translations[key] = "".join(assembled).strip()
+    return {key: translations[key] for key in texts}, errors
@@ -0,0 +1,161 @@
+"""
+Prozessweiter Übersetzungs-Cache im Speicher mit Zusammenfassung gleichzeitiger Anfragen (Single-Flight).
+
+Sitzt vor dem Translation Memory und den Anbietern (deepl_batch, gemini_batch) und wird von allen
+Streamlit-Sitzungen und Jobs eines Prozesses geteilt:
+- Häufige Texte ("Pflegehinweise", "Waschen 95 Grad") kommen ohne SQLite-Zugriff direkt aus dem Speicher.
+  Einträge verfallen nach TRANSLATION_CACHE_TTL_SECONDS; über TRANSLATION_CACHE_MAX_ENTRIES hinaus werden die am
+  längsten nicht genutzten verdrängt (LRU).
+- Fragen zwei Sitzungen gleichzeitig denselben Text (Quelltext, Quellsprache, Zielsprache, Anbieter) an, geht nur
+  ein Request hinaus; die zweite wartet auf dessen Ergebnis. Schlägt die Übersetzung beim ersten fehl, versucht
+  es die wartende Anfrage selbst und legt ihr Ergebnis im Cache ab.
+
+Der Schlüssel enthält die Version der geschützten Begriffe; nach einer Änderung der Produktdaten werden alte
+Einträge also nicht mehr getroffen. Zähler (Treffer, Fehlschläge, zusammengefasste Anfragen) liefert stats().
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+from generation_metrics import record_cache_hits
+from product_data import get_product_catalog
+from translation_memory import PROTECTED_TERMS_VERSION, normalize_source_text
+
+CACHE_MAX_ENTRIES = int(os.getenv("TRANSLATION_CACHE_MAX_ENTRIES", "20000"))
+CACHE_TTL_SECONDS = float(os.getenv("TRANSLATION_CACHE_TTL_SECONDS", "3600"))
+# Längste Wartezeit auf eine laufende Anfrage einer anderen Sitzung, danach wird selbst übersetzt
+CACHE_WAIT_SECONDS = float(os.getenv("TRANSLATION_CACHE_WAIT_SECONDS", "60"))
+
+
+class TranslationCache:
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl_seconds: float = CACHE_TTL_SECONDS,
+                 wait_seconds: float = CACHE_WAIT_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.wait_seconds = wait_seconds
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(text: str, source_language: str, target_language: str, provider: str) -> tuple:
+        terms_version = f"{PROTECTED_TERMS_VERSION}:{get_product_catalog().protected_terms.version}"
+        return normalize_source_text(text), source_language, target_language, provider, terms_version
+
+    def _store(self, key: tuple, translation: str) -> None:
+        self._entries[key] = (translation, time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def translate_batch(self, texts: dict[str, str], source_language: str, target_language: str, provider: str,
+                        translate_batch) -> tuple[dict[str, str], dict[str, str]]:
+        """
+        Übersetzt {Schlüssel: Text} über den Cache. `translate_batch({Schlüssel: Text})` -> (Übersetzungen, Fehler)
+        wird nur für Texte aufgerufen, die weder im Cache stehen noch gerade von einer anderen Anfrage übersetzt
+        werden. Gibt (Übersetzungen, Fehler) mit denselben Schlüsseln wie `texts` zurück.
+        """
+        keys_by_text = {}
+        for key, text in texts.items():
+            keys_by_text.setdefault(text, []).append(key)
+        translated, waiting, own = {}, {}, {}
+        now = time.monotonic()
+        with self._lock:
+            for text in keys_by_text:
+                cache_key = self._key(text, source_language, target_language, provider)
+                entry = self._entries.get(cache_key)
+                if entry is not None and entry[1] > now:
+                    self._entries.move_to_end(cache_key)
+                    translated[text] = entry[0]
+                    self.hits += 1
+                elif cache_key in self._in_flight:
+                    waiting[text] = self._in_flight[cache_key]
+                    self.coalesced += 1
+                else:
+                    if entry is not None:
+                        del self._entries[cache_key]
+                    own[text] = cache_key
+                    self._in_flight[cache_key] = Future()
+                    self.misses += 1
+        record_cache_hits(key for text in translated for key in keys_by_text[text])
+
+        results, errors = {}, {}
+        if own:
+            results, errors = self._translate_own(own, keys_by_text, translate_batch)
+        # Erst nach den eigenen Texten warten, damit sich zwei Anfragen nie gegenseitig blockieren
+        retry = {}
+        for text, future in waiting.items():
+            try:
+                value = future.result(timeout=self.wait_seconds)
+            except FutureTimeoutError:
+                value = None
+            if value is None:
+                retry[keys_by_text[text][0]] = text
+            else:
+                translated[text] = value
+                record_cache_hits(keys_by_text[text])
+        if retry:
+            retry_results, retry_errors = translate_batch(retry)
+            results.update(retry_results)
+            errors.update(retry_errors)
+            with self._lock:
+                for key, text in retry.items():
+                    if retry_results.get(key) and key not in retry_errors:
+                        self._store(self._key(text, source_language, target_language, provider), retry_results[key])
+
+        translations, field_errors = {}, {}
+        for text, keys in keys_by_text.items():
+            first_key = keys[0]
+            for key in keys:
+                translations[key] = translated[text] if text in translated else results.get(first_key, "")
+                if text not in translated and first_key in errors:
+                    field_errors[key] = errors[first_key]
+        return translations, field_errors
+
+    def _translate_own(self, own: dict[str, tuple], keys_by_text: dict[str, list[str]],
+                       translate_batch) -> tuple[dict[str, str], dict[str, str]]:
+        """Übersetzt die selbst übernommenen Texte und gibt das Ergebnis an wartende Anfragen weiter."""
+        results, errors = {}, {}
+        try:
+            results, errors = translate_batch({keys_by_text[text][0]: text for text in own})
+        finally:
+            with self._lock:
+                for text, cache_key in own.items():
+                    first_key = keys_by_text[text][0]
+                    value = results.get(first_key) if first_key not in errors else None
+                    if value:
+                        self._store(cache_key, value)
+                    future = self._in_flight.pop(cache_key, None)
+                    if future is not None:
+                        future.set_result(value or None)
+        return results, errors
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "max_entries": self.max_entries, "hits": self.hits,
+                    "misses": self.misses, "coalesced": self.coalesced, "evictions": self.evictions,
+                    "in_flight": len(self._in_flight)}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_translation_cache() -> TranslationCache:
+    """Gibt den prozessweit geteilten Übersetzungs-Cache zurück."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = TranslationCache()
+        return _cache
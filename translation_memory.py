@@ -0,0 +1,219 @@
+"""
+Persistentes Translation Memory (SQLite), das von allen App-Varianten gemeinsam genutzt wird.
+
+Schlüssel eines Eintrags: (normalisierter Quelltext, Quellsprache, Zielsprache, Anbieter, Version der
+geschützten Begriffe). Die Anzahl der Einträge ist begrenzt; bei Überschreitung werden die am längsten
+nicht mehr genutzten Einträge entfernt (LRU).
+
+Kommandozeile:
+    python translation_memory.py stats
+    python translation_memory.py invalidate [--provider deepl] [--source-lang Deutsch] [--target-lang Englisch]
+                                            [--text "Pflegehinweise"] [--all]
+"""
+import argparse
+import functools
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+from dotenv import load_dotenv
+
+from product_data import get_product_catalog
+
+load_dotenv()
+
+TM_DB_PATH = os.getenv("TRANSLATION_MEMORY_PATH",
+                       os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "translation_memory.sqlite3"))
+TM_MAX_ENTRIES = int(os.getenv("TRANSLATION_MEMORY_MAX_ENTRIES", "50000"))
+
+# Muss erhöht werden, wenn sich der Umgang mit geschützten Begriffen ändert. Änderungen an der Liste der Begriffe
+# oder am Glossar in den Produktdaten fließen über deren Version automatisch in den Schlüssel ein, damit alte
+# Übersetzungen nicht mehr verwendet werden.
+PROTECTED_TERMS_VERSION = "terms-v2"
+
+
+def normalize_source_text(text: str) -> str:
+    """Vereinheitlicht Unicode-Form und Leerraum, damit gleiche Texte denselben Schlüssel bekommen."""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+
+class TranslationMemory:
+    def __init__(self, db_path: str = TM_DB_PATH, max_entries: int = TM_MAX_ENTRIES,
+                 terms_version: str = PROTECTED_TERMS_VERSION):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.terms_version = terms_version
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        # Eine Verbindung pro Prozess; Streamlit-Threads werden über das Lock serialisiert
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS translations (
+                source_text TEXT NOT NULL,
+                source_lang TEXT NOT NULL,
+                target_lang TEXT NOT NULL,
+                provider TEXT NOT NULL,
+                terms_version TEXT NOT NULL,
+                translation TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (source_text, source_lang, target_lang, provider, terms_version)
+            )""")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_translations_last_used ON translations (last_used)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self._conn.commit()
+
+    def _key(self, text: str, source_language: str, target_language: str, provider: str) -> tuple:
+        terms_version = f"{self.terms_version}:{get_product_catalog().protected_terms.version}"
+        return normalize_source_text(text), source_language, target_language, provider, terms_version
+
+    def _count(self, hits: int, misses: int) -> None:
+        self.hits += hits
+        self.misses += misses
+        for name, value in (("hits", hits), ("misses", misses)):
+            if value:
+                self._conn.execute("INSERT INTO counters (name, value) VALUES (?, ?) "
+                                   "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value", (name, value))
+
+    def lookup_many(self, texts: list[str], source_language: str, target_language: str,
+                    provider: str) -> dict[str, str]:
+        """Gibt die bereits bekannten Übersetzungen als {Quelltext: Übersetzung} zurück."""
+        found = {}
+        now = time.time()
+        with self._lock:
+            for text in texts:
+                key = self._key(text, source_language, target_language, provider)
+                row = self._conn.execute(
+                    "SELECT translation FROM translations WHERE source_text = ? AND source_lang = ? "
+                    "AND target_lang = ? AND provider = ? AND terms_version = ?", key).fetchone()
+                if row:
+                    found[text] = row[0]
+                    self._conn.execute(
+                        "UPDATE translations SET last_used = ? WHERE source_text = ? AND source_lang = ? "
+                        "AND target_lang = ? AND provider = ? AND terms_version = ?", (now, *key))
+            self._count(len(found), len(texts) - len(found))
+            self._conn.commit()
+        return found
+
+    def lookup(self, text: str, source_language: str, target_language: str, provider: str) -> str | None:
+        return self.lookup_many([text], source_language, target_language, provider).get(text)
+
+    def store_many(self, translations: dict[str, str], source_language: str, target_language: str,
+                   provider: str) -> None:
+        if not translations:
+            return
+        now = time.time()
+        with self._lock:
+            for text, translation in translations.items():
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO translations (source_text, source_lang, target_lang, provider, "
+                    "terms_version, translation, created_at, last_used) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (*self._key(text, source_language, target_language, provider), translation, now, now))
+            self._evict()
+            self._conn.commit()
+
+    def store(self, text: str, source_language: str, target_language: str, provider: str,
+              translation: str) -> None:
+        self.store_many({text: translation}, source_language, target_language, provider)
+
+    def _evict(self) -> None:
+        (entries,) = self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()
+        if entries > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM translations WHERE rowid IN "
+                "(SELECT rowid FROM translations ORDER BY last_used LIMIT ?)", (entries - self.max_entries,))
+
+    def invalidate(self, provider: str | None = None, source_language: str | None = None,
+                   target_language: str | None = None, text: str | None = None) -> int:
+        """Löscht passende Einträge (ohne Filter: alle) und gibt deren Anzahl zurück."""
+        conditions, params = [], []
+        for column, value in (("provider", provider), ("source_lang", source_language),
+                              ("target_lang", target_language)):
+            if value:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if text:
+            conditions.append("source_text = ?")
+            params.append(normalize_source_text(text))
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._lock:
+            deleted = self._conn.execute(f"DELETE FROM translations{where}", params).rowcount
+            self._conn.commit()
+        return deleted
+
+    def stats(self) -> dict:
+        """Zähler dieses Prozesses sowie die dauerhaft gespeicherten Gesamtzähler."""
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()
+            totals = dict(self._conn.execute("SELECT name, value FROM counters").fetchall())
+        return {"entries": entries, "max_entries": self.max_entries, "hits": self.hits, "misses": self.misses,
+                "total_hits": totals.get("hits", 0), "total_misses": totals.get("misses", 0)}
+
+
+_memory = None
+_memory_lock = threading.Lock()
+
+
+def get_translation_memory() -> TranslationMemory:
+    """Gibt das prozessweit geteilte Translation Memory zurück."""
+    global _memory
+    with _memory_lock:
+        if _memory is None:
+            _memory = TranslationMemory()
+        return _memory
+
+
+def cached_translation(provider: str):
+    """
+    Decorator für Funktionen mit der Signatur (text, source_language, target_language) -> (text, error).
+    Fragt zuerst das Translation Memory und speichert nur fehlerfreie Übersetzungen.
+    """
+    def decorator(translate_func):
+        @functools.wraps(translate_func)
+        def wrapper(text_to_translate: str, source_language: str, target_language: str) -> tuple[str, str | None]:
+            if not text_to_translate or not text_to_translate.strip() or not target_language:
+                return translate_func(text_to_translate, source_language, target_language)
+            memory = get_translation_memory()
+            cached = memory.lookup(text_to_translate, source_language, target_language, provider)
+            if cached is not None:
+                return cached, None
+            translated_text, error = translate_func(text_to_translate, source_language, target_language)
+            if error is None:
+                memory.store(text_to_translate, source_language, target_language, provider, translated_text)
+            return translated_text, error
+        return wrapper
+    return decorator
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Translation Memory verwalten")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("stats", help="Anzahl der Einträge und Treffer/Fehlschläge anzeigen")
+    invalidate_parser = subparsers.add_parser("invalidate", help="Einträge löschen")
+    invalidate_parser.add_argument("--provider", help="z.B. deepl oder gemini")
+    invalidate_parser.add_argument("--source-lang", help="z.B. Deutsch")
+    invalidate_parser.add_argument("--target-lang", help="z.B. Englisch")
+    invalidate_parser.add_argument("--text", help="Nur diesen Quelltext löschen")
+    invalidate_parser.add_argument("--all", action="store_true", help="Alle Einträge löschen")
+    args = parser.parse_args()
+
+    memory = get_translation_memory()
+    if args.command == "stats":
+        for name, value in memory.stats().items():
+            print(f"{name}: {value}")
+    elif args.command == "invalidate":
+        if not any([args.provider, args.source_lang, args.target_lang, args.text, args.all]):
+            parser.error("Bitte einen Filter oder --all angeben.")
+        deleted = memory.invalidate(args.provider, args.source_lang, args.target_lang, args.text)
+        print(f"{deleted} Einträge gelöscht.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""
+Einheitliche Schnittstelle für Übersetzungsanbieter (DeepL, Gemini, Offline-Stub) und Routing zwischen ihnen.
+
+Jeder Anbieter bietet `translate_batch(texts, source_language, target_language) -> (Übersetzungen, Fehler)`
+mit denselben Schlüsseln wie `texts`. Der TranslationRouter schickt alles an den Hauptanbieter und nur die
+dort fehlgeschlagenen Felder an den Ausweichanbieter. Mit Hedging geht derselbe Auftrag zusätzlich an den
+Ausweichanbieter, wenn der Hauptanbieter nach `hedge_after` Sekunden noch nicht geantwortet hat; verwendet
+wird die erste vollständige Antwort. Innerhalb von `track_providers()` hält der Router fest, welcher Anbieter
+welches Feld übersetzt hat (catalogs.py lernt nur DeepL-Übersetzungen).
+
+Konfiguration über die Umgebung:
+    TRANSLATION_PROVIDERS=deepl,gemini   Hauptanbieter, danach Ausweichanbieter (deepl, gemini, offline)
+    TRANSLATION_HEDGE_SECONDS=2.5        Hedging ab dieser Wartezeit (leer oder 0 = aus)
+"""
+import contextlib
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from dotenv import load_dotenv
+
+import gemini_batch
+from deepl_batch import translate_texts_deepl_batch
+from http_client import create_deepl_translator
+
+load_dotenv()
+
+TRANSLATION_PROVIDERS = os.getenv("TRANSLATION_PROVIDERS", "")
+TRANSLATION_HEDGE_SECONDS = float(os.getenv("TRANSLATION_HEDGE_SECONDS") or 0)
+# Threads für gehedgte Aufrufe; ein verlorener Aufruf läuft im Hintergrund zu Ende (und füllt das TM)
+HEDGE_POOL_SIZE = int(os.getenv("TRANSLATION_HEDGE_POOL_SIZE", "32"))
+
+PROVIDER_LABELS = {"deepl": "DeepL", "gemini": "Gemini", "offline": "Offline (ohne Übersetzung)"}
+
+_field_providers = contextvars.ContextVar("field_providers", default=None)
+
+
+@contextlib.contextmanager
+def track_providers():
+    """Liefert ein Dict, in das der Router im Block {Schlüssel: Anbietername} der erfolgreichen Felder einträgt."""
+    providers = {}
+    token = _field_providers.set(providers)
+    try:
+        yield providers
+    finally:
+        _field_providers.reset(token)
+
+
+def _note_providers(provider_name: str, result: tuple[dict, dict], keys=None) -> None:
+    providers = _field_providers.get()
+    if providers is None:
+        return
+    translations, errors = result
+    for key in translations if keys is None else keys:
+        if key in translations and key not in errors:
+            providers[key] = provider_name
+
+
+class DeepLProvider:
+    name = "deepl"
+
+    def __init__(self, translator=None):
+        if translator is None and os.getenv("DEEPL_API_KEY"):
+            translator = create_deepl_translator(os.getenv("DEEPL_API_KEY"))
+        self.translator = translator
+
+    @property
+    def available(self) -> bool:
+        return self.translator is not None
+
+    def translate_batch(self, texts: dict[str, str], source_language: str, target_language: str):
+        return translate_texts_deepl_batch(self.translator, texts, source_language, target_language)
+
+
+class GeminiProvider:
+    name = "gemini"
+
+    @property
+    def available(self) -> bool:
+        return bool(gemini_batch.GEMINI_API_KEY)
+
+    def translate_batch(self, texts: dict[str, str], source_language: str, target_language: str):
+        return gemini_batch.translate_texts_gemini(texts, source_language, target_language)
+
+
+class OfflineProvider:
+    """Gibt die Quelltexte unverändert zurück; für Entwicklung und Tests ohne API-Schlüssel."""
+    name = "offline"
+    available = True
+
+    def translate_batch(self, texts: dict[str, str], source_language: str, target_language: str):
+        return dict(texts), {}
+
+
+def create_provider(name: str, translator=None):
+    """Erzeugt einen Anbieter nach Namen; `translator` ist ein bereits konfigurierter deepl.Translator."""
+    name = name.strip().lower()
+    if name == "deepl":
+        return DeepLProvider(translator)
+    if name == "gemini":
+        return GeminiProvider()
+    if name == "offline":
+        return OfflineProvider()
+    raise ValueError(f"Unbekannter Übersetzungsanbieter: {name}")
+
+
+_hedge_executor = None
+_hedge_executor_lock = threading.Lock()
+
+
+def _get_hedge_executor() -> ThreadPoolExecutor:
+    global _hedge_executor
+    with _hedge_executor_lock:
+        if _hedge_executor is None:
+            _hedge_executor = ThreadPoolExecutor(max_workers=HEDGE_POOL_SIZE, thread_name_prefix="hedge")
+        return _hedge_executor
+
+
+def _safe_translate(provider, texts: dict[str, str], source_language: str, target_language: str):
+    """Wie provider.translate_batch, aber unerwartete Ausnahmen werden zu Fehlern je Feld."""
+    try:
+        return provider.translate_batch(texts, source_language, target_language)
+    except Exception as e:
+        print(f"DEBUG: Anbieter {provider.name} fehlgeschlagen: {e}")
+        return {key: f"[{PROVIDER_LABELS.get(provider.name, provider.name)} Fehler]" for key in texts}, \
+            {key: str(e) for key in texts}
+
+
+def merge_results(first: tuple[dict, dict], second: tuple[dict, dict], first_name: str,
+                  second_name: str) -> tuple[dict[str, str], dict[str, str]]:
+    """Ersetzt die fehlgeschlagenen Felder von `first` durch die erfolgreichen von `second`."""
+    translations, errors = dict(first[0]), {}
+    second_translations, second_errors = second
+    for key, error in first[1].items():
+        if key in second_translations and key not in second_errors:
+            translations[key] = second_translations[key]
+        else:
+            errors[key] = f"{first_name}: {error} / {second_name}: {second_errors.get(key, 'nicht versucht')}"
+    return translations, errors
+
+
+class TranslationRouter:
+    def __init__(self, primary, fallback=None, hedge_after: float | None = None):
+        self.primary = primary
+        self.fallback = fallback
+        self.hedge_after = hedge_after if fallback is not None and hedge_after else None
+        self._lock = threading.Lock()
+        self.counters = {"requests": 0, "fallback_requests": 0, "hedged_requests": 0, "hedge_wins": 0}
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.counters[name] += 1
+
+    def describe(self) -> str:
+        description = PROVIDER_LABELS.get(self.primary.name, self.primary.name)
+        if self.fallback is not None:
+            description += f", Ausweichanbieter {PROVIDER_LABELS.get(self.fallback.name, self.fallback.name)}"
+        if self.hedge_after:
+            description += f" (Hedging nach {self.hedge_after:g}s)"
+        return description
+
+    def translate_batch(self, texts: dict[str, str], source_language: str,
+                        target_language: str) -> tuple[dict[str, str], dict[str, str]]:
+        self._count("requests")
+        if self.hedge_after:
+            return self._translate_hedged(texts, source_language, target_language)
+        result = _safe_translate(self.primary, texts, source_language, target_language)
+        return self._with_fallback(result, texts, source_language, target_language)
+
+    def _with_fallback(self, result, texts: dict[str, str], source_language: str, target_language: str):
+        """Schickt nur die beim Hauptanbieter fehlgeschlagenen Felder an den Ausweichanbieter."""
+        _note_providers(self.primary.name, result)
+        if not result[1] or self.fallback is None:
+            return result
+        self._count("fallback_requests")
+        print(f"DEBUG: {len(result[1])} Felder ({target_language}) gehen an Ausweichanbieter {self.fallback.name}")
+        retry_texts = {key: texts[key] for key in result[1]}
+        fallback_result = _safe_translate(self.fallback, retry_texts, source_language, target_language)
+        _note_providers(self.fallback.name, fallback_result)
+        return merge_results(result, fallback_result, self.primary.name, self.fallback.name)
+
+    def _translate_hedged(self, texts: dict[str, str], source_language: str, target_language: str):
+        executor = _get_hedge_executor()
+        # Kontext mitgeben, damit die Messwerte (generation_metrics) der aufrufenden Generierung zugeordnet werden
+        primary_future = executor.submit(contextvars.copy_context().run, _safe_translate, self.primary, texts,
+                                         source_language, target_language)
+        try:
+            result = primary_future.result(timeout=self.hedge_after)
+        except FutureTimeoutError:
+            pass
+        else:
+            return self._with_fallback(result, texts, source_language, target_language)
+
+        self._count("hedged_requests")
+        started = time.monotonic()
+        fallback_future = executor.submit(contextvars.copy_context().run, _safe_translate, self.fallback, texts,
+                                          source_language, target_language)
+        done, _ = wait([primary_future, fallback_future], return_when=FIRST_COMPLETED)
+        winner = primary_future if primary_future in done else fallback_future
+        loser = fallback_future if winner is primary_future else primary_future
+        result = winner.result()
+        if winner is fallback_future:
+            self._count("hedge_wins")
+            print(f"DEBUG: Ausweichanbieter {self.fallback.name} war schneller ({target_language}, "
+                  f"{time.monotonic() - started:.1f}s nach dem Hedge)")
+        winner_name, loser_name = (self.primary.name, self.fallback.name) if winner is primary_future else \
+            (self.fallback.name, self.primary.name)
+        _note_providers(winner_name, result)
+        if not result[1]:
+            return result
+        # Unvollständige erste Antwort: die Lücken aus der anderen Antwort füllen
+        loser_result = loser.result()
+        _note_providers(loser_name, loser_result, keys=result[1])
+        return merge_results(result, loser_result, winner_name, loser_name)
+
+
+def build_translation_router(provider_names: str, translator=None,
+                             hedge_after: float | None = None) -> TranslationRouter:
+    """
+    Baut den Router aus einer Liste wie "deepl,gemini" (Hauptanbieter, danach Ausweichanbieter). Als
+    Ausweichanbieter dient der erste weitere Anbieter mit API-Schlüssel. Ohne `hedge_after` gilt
+    TRANSLATION_HEDGE_SECONDS.
+    """
+    names = [name for name in provider_names.split(",") if name.strip()]
+    providers = [create_provider(name, translator) for name in names]
+    if not providers:
+        raise ValueError("Kein Übersetzungsanbieter konfiguriert.")
+    fallbacks = [provider for provider in providers[1:] if provider.available]
+    return TranslationRouter(providers[0], fallbacks[0] if fallbacks else None,
+                             TRANSLATION_HEDGE_SECONDS if hedge_after is None else hedge_after)
@@ -0,0 +1,107 @@
+"""
+Schnappschuss der letzten Übersetzungen einer Session für inkrementelles Neugenerieren.
+
+Pro Zielsprache wird für jedes übersetzte Feld der Hash des deutschen Quelltexts und die Übersetzung
+gemerkt. Beim nächsten Generieren gehen nur Felder mit geändertem Quelltext an den Anbieter, alle anderen
+werden aus dem Schnappschuss übernommen. Optional wird der Schnappschuss als JSON-Datei gespeichert, damit er
+einen Neustart übersteht.
+"""
+import hashlib
+import json
+import os
+import threading
+
+from generation_metrics import record_cache_hits
+from sheet_texts import describe_failed_fields
+from translation_memory import normalize_source_text
+
+# Ist das Verzeichnis gesetzt, überdauern die Schnappschüsse angemeldeter Benutzer einen Neustart
+TRANSLATION_SNAPSHOT_DIR = os.getenv("TRANSLATION_SNAPSHOT_DIR")
+
+
+def source_hash(text: str) -> str:
+    return hashlib.sha256(normalize_source_text(text).encode("utf-8")).hexdigest()[:16]
+
+
+def snapshot_path(owner: str) -> str | None:
+    """Dateipfad für den Schnappschuss eines Benutzers oder None, wenn nicht gespeichert werden soll."""
+    if not TRANSLATION_SNAPSHOT_DIR or not owner:
+        return None
+    return os.path.join(TRANSLATION_SNAPSHOT_DIR, f"{hashlib.sha256(owner.encode('utf-8')).hexdigest()[:16]}.json")
+
+
+class TranslationSnapshot:
+    def __init__(self, path: str | None = None):
+        self.path = path
+        # {Zielsprache: {Feldschlüssel: [Quell-Hash, Übersetzung]}}
+        self.entries = {}
+        # Ergebnis des letzten Laufs je Zielsprache: {"reused": [...], "translated": [...]}
+        self.last_run = {}
+        self._lock = threading.Lock()
+        if path:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError) as e:
+                print(f"DEBUG: Übersetzungs-Schnappschuss {path} nicht lesbar: {e}")
+
+    def wrap(self, translate_batch):
+        """
+        Umhüllt `translate_batch(texts, source_language, target_language)`: unveränderte Felder kommen aus dem
+        Schnappschuss, nur geänderte werden übersetzt. Fehlerhafte Übersetzungen werden nicht übernommen.
+        """
+        def incremental_translate_batch(texts: dict, source_language: str, target_language: str):
+            hashes = {key: source_hash(text) for key, text in texts.items()}
+            with self._lock:
+                known = self.entries.get(target_language, {})
+                translations = {key: known[key][1] for key in texts
+                                if key in known and known[key][0] == hashes[key]}
+            remaining = {key: text for key, text in texts.items() if key not in translations}
+            record_cache_hits(translations)
+            errors = {}
+            if remaining:
+                new_translations, errors = translate_batch(remaining, source_language, target_language)
+                translations.update(new_translations)
+            with self._lock:
+                language_entries = self.entries.setdefault(target_language, {})
+                for key in remaining:
+                    if key not in errors and key in translations:
+                        language_entries[key] = [hashes[key], translations[key]]
+                self.last_run[target_language] = {"reused": [key for key in texts if key not in remaining],
+                                                  "translated": list(remaining)}
+            return translations, errors
+
+        return incremental_translate_batch
+
+    def reset_last_run(self) -> None:
+        with self._lock:
+            self.last_run = {}
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            data = json.dumps(self.entries, ensure_ascii=False)
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(temp_path, self.path)
+
+    def describe_last_run(self) -> str:
+        """Kurze Statusmeldung: wie viele Felder wiederverwendet und welche neu übersetzt wurden."""
+        with self._lock:
+            runs = list(self.last_run.values())
+        if not runs:
+            return ""
+        reused = sum(len(run["reused"]) for run in runs)
+        translated_keys = list(dict.fromkeys(key for run in runs for key in run["translated"]))
+        message = f"{reused} Texte aus dem letzten Lauf übernommen"
+        if translated_keys:
+            message += f", neu übersetzt: {describe_failed_fields(dict.fromkeys(translated_keys))}"
+        else:
+            message += ", keine neuen Übersetzungen nötig"
+        return message + f" ({len(runs)} Sprache{'n' if len(runs) != 1 else ''})."
@@ -0,0 +1,188 @@
+"""
+Selbst gehostete Schriften für die Produktblätter statt des Google-Fonts-@imports.
+
+Nach dem Rendern wird jede Seite auf die tatsächlich verwendeten Zeichen untersucht. Für jede Schriftstärke
+entsteht daraus eine WOFF2-Teilmenge der mitgelieferten Poppins-Dateien (fonts/), die als @font-face direkt in
+die Seite eingebettet oder im Bundle-Modus als Asset abgelegt wird. Die Seite lädt damit nichts mehr von
+Drittanbietern und sieht offline und im Druck genauso aus.
+
+- Zeichen, die Poppins nicht enthält (Griechisch, Kyrillisch), kommen aus Noto Sans, sofern die Dateien in
+  fonts/ liegen; CJK-Zeichen übernehmen die Systemschriften aus dem font-family-Stack des Stylesheets.
+- Jede Teilmenge enthält zusätzlich alle druckbaren ASCII-Zeichen. So bekommen Seiten derselben Sprache fast
+  immer denselben Schlüssel und die Teilmenge kommt aus dem Cache (Speicher, dann .cache/fonts/).
+- Die Poppins-Dateien liegen mit ihrer Lizenz (OFL 1.1) im Repository, Noto Sans nicht (siehe
+  fonts/LIESMICH.txt). Fehlen die Poppins-Dateien oder fontTools, laden die Blätter die Schrift wieder per
+  @import von Google Fonts. Das ist ein Konfigurationsfehler: font_setup_error() liefert die Meldung, die Apps
+  zeigen sie in der Seitenleiste und batch_generate gibt sie aus. Ohne brotli entstehen WOFF- statt WOFF2-Dateien.
+
+WEB_FONTS_EMBED=0 schaltet bewusst zurück auf den @import (dann ohne Fehlermeldung).
+"""
+import base64
+import hashlib
+import html
+import importlib.util
+import io
+import os
+import re
+import threading
+from collections import OrderedDict
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+FONT_DIR = os.getenv("FONT_DIR", os.path.join(BASE_DIR, "fonts"))
+FONT_CACHE_DIR = os.getenv("FONT_CACHE_DIR", os.path.join(BASE_DIR, ".cache", "fonts"))
+WEB_FONTS_EMBED = os.getenv("WEB_FONTS_EMBED", "1") not in ("0", "false", "")
+GOOGLE_FONTS_IMPORT = "@import url('https://fonts.googleapis.com/css2?family=Poppins:wght@400;600;700&display=swap');"
+# Familien in der Reihenfolge des font-family-Stacks; das Stylesheet verwendet die Stärken 400, 600 und 700
+FONT_FAMILIES = (
+    ("Poppins", {400: "Poppins-Regular.ttf", 600: "Poppins-SemiBold.ttf", 700: "Poppins-Bold.ttf"}),
+    ("Noto Sans", {400: "NotoSans-Regular.ttf", 600: "NotoSans-SemiBold.ttf", 700: "NotoSans-Bold.ttf"}),
+)
+SUBSET_CACHE_ENTRIES = 256
+BASE_CHARACTERS = frozenset(chr(code) for code in range(0x20, 0x7F))
+
+_NOT_RENDERED = re.compile(r"<(style|script|svg|title)\b.*?</\1>", re.DOTALL | re.IGNORECASE)
+_TAG = re.compile(r"<[^>]+>")
+
+_fonts = None
+_font_error = None
+_fonts_lock = threading.Lock()
+_subsets = OrderedDict()
+# Eine Teilmenge nach der anderen: fontTools rechnet ohnehin unter dem GIL, und gleichzeitige Anfragen
+# für dieselbe Sprache warten so auf das erste Ergebnis, statt es erneut zu berechnen
+_subset_lock = threading.Lock()
+
+
+class FontFile:
+    def __init__(self, family: str, weight: int, path: str):
+        self.family = family
+        self.weight = weight
+        self.path = path
+        with open(path, "rb") as f:
+            self.data = f.read()
+        self.digest = hashlib.sha256(self.data).hexdigest()[:16]
+        from fontTools.ttLib import TTFont
+        self.characters = frozenset(chr(code) for code in TTFont(io.BytesIO(self.data)).getBestCmap())
+
+
+def _load_fonts() -> list[FontFile]:
+    """Lädt die vorhandenen Schriftdateien einmal pro Prozess; leere Liste, wenn nichts einzubetten ist."""
+    global _fonts, _font_error
+    with _fonts_lock:
+        if _fonts is not None:
+            return _fonts
+        _fonts = []
+        if importlib.util.find_spec("fontTools") is None:
+            _font_error = ("fontTools ist nicht installiert (requirements.txt); die Produktblätter laden Poppins "
+                           "von Google Fonts.")
+            print(f"FEHLER: {_font_error}")
+            return _fonts
+        for family, files in FONT_FAMILIES:
+            for weight, filename in files.items():
+                path = os.path.join(FONT_DIR, filename)
+                if not os.path.exists(path):
+                    continue
+                try:
+                    _fonts.append(FontFile(family, weight, path))
+                except Exception as e:
+                    print(f"DEBUG: Schrift {filename} nicht lesbar: {e}")
+        if not any(font.family == FONT_FAMILIES[0][0] for font in _fonts):
+            _font_error = (f"Keine {FONT_FAMILIES[0][0]}-Dateien in {FONT_DIR} (siehe LIESMICH.txt); die "
+                           "Produktblätter laden die Schrift von Google Fonts. WEB_FONTS_EMBED=0 setzen, wenn das "
+                           "gewollt ist.")
+            print(f"FEHLER: {_font_error}")
+            _fonts = []
+        return _fonts
+
+
+def font_setup_error() -> str | None:
+    """Meldung, warum die Schriften nicht eingebettet werden können, obwohl WEB_FONTS_EMBED es verlangt."""
+    if not WEB_FONTS_EMBED:
+        return None
+    _load_fonts()
+    return _font_error
+
+
+def _woff_flavor() -> tuple[str, str]:
+    if importlib.util.find_spec("brotli") is None:
+        return "woff", "font/woff"
+    return "woff2", "font/woff2"
+
+
+def page_characters(page_html: str) -> set[str]:
+    """Zeichen, die auf der Seite als Text erscheinen (ohne Markup, Stylesheets und SVG)."""
+    text = html.unescape(_TAG.sub(" ", _NOT_RENDERED.sub(" ", page_html)))
+    return {character for character in text if not character.isspace()}
+
+
+def subset_font(font: FontFile, characters: frozenset[str]) -> tuple[bytes, str]:
+    """Teilmenge einer Schrift als (Bytes, MIME-Typ); zwischengespeichert im Speicher und unter FONT_CACHE_DIR."""
+    flavor, mime_type = _woff_flavor()
+    key = hashlib.sha256(f"{font.digest}:{flavor}:{''.join(sorted(characters))}".encode("utf-8")).hexdigest()[:24]
+    with _subset_lock:
+        if key in _subsets:
+            _subsets.move_to_end(key)
+            return _subsets[key], mime_type
+        cache_path = os.path.join(FONT_CACHE_DIR, f"{key}.{flavor}")
+        try:
+            with open(cache_path, "rb") as f:
+                content = f.read()
+        except OSError:
+            from fontTools import subset
+            from fontTools.ttLib import TTFont
+            subsetter = subset.Subsetter(subset.Options())
+            subsetter.populate(text="".join(characters))
+            ttfont = TTFont(io.BytesIO(font.data))
+            subsetter.subset(ttfont)
+            ttfont.flavor = flavor
+            buffer = io.BytesIO()
+            ttfont.save(buffer)
+            content = buffer.getvalue()
+            try:
+                os.makedirs(FONT_CACHE_DIR, exist_ok=True)
+                temp_path = f"{cache_path}.{os.getpid()}.tmp"
+                with open(temp_path, "wb") as f:
+                    f.write(content)
+                os.replace(temp_path, cache_path)
+            except OSError as e:
+                print(f"DEBUG: Schrift-Teilmenge nicht gespeichert: {e}")
+        _subsets[key] = content
+        if len(_subsets) > SUBSET_CACHE_ENTRIES:
+            _subsets.popitem(last=False)
+        return content, mime_type
+
+
+def font_face_css(page_html: str, bundle=None) -> str:
+    """
+    @font-face-Regeln für die Zeichen der Seite. Mit `bundle` (sheet_bundle.SheetBundle) liegen die Schriften als
+    Assets daneben, sonst als Daten-URL in der Regel. Ohne Schriften: der bisherige Google-Fonts-@import.
+    """
+    fonts = _load_fonts() if WEB_FONTS_EMBED else []
+    if not fonts:
+        return GOOGLE_FONTS_IMPORT
+    remaining = page_characters(page_html)
+    rules = []
+    for family, _ in FONT_FAMILIES:
+        family_fonts = [font for font in fonts if font.family == family]
+        if not family_fonts or not remaining:
+            continue
+        covered = frozenset(remaining & family_fonts[0].characters)
+        if not covered:
+            continue
+        for font in family_fonts:
+            characters = covered | (BASE_CHARACTERS & font.characters if family == FONT_FAMILIES[0][0] else set())
+            content, mime_type = subset_font(font, frozenset(characters))
+            url = f"data:{mime_type};base64,{base64.b64encode(content).decode('ascii')}"
+            if bundle is not None:
+                url = bundle.externalize(url)
+            rules.append(f"@font-face{{font-family:'{family}';font-style:normal;font-weight:{font.weight};"
+                         f"font-display:swap;src:url(\"{url}\") format('{mime_type.split('/')[1]}')}}")
+        remaining -= covered
+    return "\n".join(rules)
+
+
+def embed_fonts(page_html: str, bundle=None) -> str:
+    """Fügt die Schriften der Seite als <style>-Block am Ende von <head> ein."""
+    css = font_face_css(page_html, bundle)
+    if "</head>" not in page_html:
+        return page_html
+    return page_html.replace("</head>", f"<style>\n{css}\n</style>\n</head>", 1)